@@ -1,5 +1,5 @@
 import os
-from flask import Flask
+from flask import Flask, jsonify
 
 def create_app(test_config=None):
     """Flaskアプリケーションファクトリ関数"""
@@ -7,23 +7,16 @@ def create_app(test_config=None):
     # アプリケーションの作成と設定
     app = Flask(__name__, instance_relative_config=True)
     
+    # アップロードを受信中に検査するリクエストクラスを使用
+    from .utils.upload_guard import GuardedRequest
+    app.request_class = GuardedRequest
+    
     # 設定の読み込み
     if test_config is None:
         # テスト設定がない場合は、config.pyから設定を読み込む
         from .config import Config
         config = Config()
         app.config.from_object(config)
-        
-        # selectors.jsonからセレクタ設定を読み込む
-        import json
-        import os
-        selector_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'selectors.json')
-        try:
-            with open(selector_path, 'r', encoding='utf-8') as f:
-                app.config['SELECTORS'] = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            app.logger.error(f"セレクタ設定の読み込みに失敗しました: {e}")
-            app.config['SELECTORS'] = {}
     else:
         # テスト設定がある場合は、それを適用
         # 辞書の場合はfrom_mapping、オブジェクトの場合はfrom_objectを使用
@@ -32,14 +25,46 @@ def create_app(test_config=None):
         else:
             app.config.from_object(test_config)
     
+    # セレクタ設定（selectors.json、変更されたらワーカーを再起動せずに再読み込みする）
+    from .utils.selectors import init_selectors
+    init_selectors(app)
+    
+    # リクエストの計測（Server-Timing ヘッダー、遅いリクエストの記録、プロファイル）
+    from .utils.timing import init_request_timing
+    init_request_timing(app)
+    
+    # メトリクスの収集と /metrics エンドポイント（Prometheus形式）
+    from .utils.metrics import init_metrics
+    init_metrics(app)
+    
+    # ログの書き込みをバックグラウンドのスレッドで行う（リクエストのスレッドでI/Oを待たない）
+    from .utils.log_queue import init_log_queue
+    init_log_queue(app)
+    
     # アップロードフォルダの作成（存在しない場合）
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # 一時ファイルスイーパーの起動（テスト時は起動しない）
+    if not app.testing and app.config.get('UPLOAD_SWEEP_INTERVAL', 0) > 0:
+        from .utils.sweeper import TempUploadSweeper
+        sweeper = TempUploadSweeper.from_app(app)
+        sweeper.start()
+        app.extensions['upload_sweeper'] = sweeper
+    
     # ルートルートの設定
     @app.route('/hello')
     def hello():
         return 'Hello, HPB Blog Generator!'
     
+    # 準備完了の確認（ロードバランサのヘルスチェック用、ウォームアップ中は503）
+    @app.route('/ready')
+    def ready():
+        warmup = app.extensions.get('warmup')
+        if warmup is None:
+            return jsonify({'ready': True})
+        report = warmup.report()
+        return jsonify(report), 200 if report['ready'] else 503
+    
     # 認証Blueprintの登録
     from .blueprints.auth import bp as auth_bp
     app.register_blueprint(auth_bp)
@@ -48,4 +73,11 @@ def create_app(test_config=None):
     from .blueprints.blog import bp as blog_bp
     app.register_blueprint(blog_bp)
     
+    # 重いクライアントの事前初期化（テスト時は起動しない）
+    if not app.testing and app.config.get('WARMUP_ENABLED', False):
+        from .utils.warmup import WarmUp
+        warmup = WarmUp(app)
+        app.extensions['warmup'] = warmup
+        warmup.start()
+    
     return app
@@ -0,0 +1,162 @@
+import math
+import atexit
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Coroutine, Dict, Optional
+from .browser_pool import BrowserPool
+from .post_scheduler import PostScheduler
+
+class AutomationEngine:
+    """ブラウザ自動操作を専用スレッドのイベントループで実行するエンジン
+
+    Playwrightの非同期APIのオブジェクトは生成したイベントループに紐づくため、
+    ブラウザプールと投稿処理はすべてこのエンジンのループ上で実行する。
+    Flaskのリクエストスレッドからは run() で処理を投入して結果を待つ。
+    複数のリクエストから投入された処理は同じループ上で並行に実行される。
+    """
+
+    def __init__(self, pool: Optional[BrowserPool] = None, scheduler: Optional[PostScheduler] = None,
+                 logger=None):
+        """初期化
+
+        Args:
+            pool: ブラウザプール（Noneの場合は処理ごとにブラウザを起動）
+            scheduler: 投稿ジョブのスケジューラ（省略時は同時実行数1）
+            logger: ログ出力先
+        """
+        self.pool = pool
+        self.scheduler = scheduler or PostScheduler(max_parallel=1)
+        self.logger = logger
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='sb-automation-engine', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine):
+        """コルーチンをエンジンのループに投入する
+
+        Args:
+            coro: 実行するコルーチン
+
+        Returns:
+            concurrent.futures.Future: 実行結果
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """コルーチンをエンジンのループで実行し、結果を待つ
+
+        Args:
+            coro: 実行するコルーチン
+            timeout: 結果を待つ最大時間（秒）
+
+        Returns:
+            Any: コルーチンの戻り値
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_post_job(self, account: str, make_job) -> Any:
+        """スケジューラの実行枠を確保し、ブラウザを借りて投稿ジョブを実行する
+
+        Args:
+            account: アカウントの識別子（サロンボードID）
+            make_job: ブラウザ（またはNone）を受け取り、投稿処理のコルーチンを返す関数
+
+        Returns:
+            Any: 投稿処理の戻り値
+        """
+        async def job():
+            async with self.lease_browser() as browser:
+                return await make_job(browser)
+
+        return await self.scheduler.run(account, job)
+
+    @asynccontextmanager
+    async def lease_browser(self):
+        """プールからブラウザを借りる（プールが無効な場合はNone）
+
+        Yields:
+            Optional[Browser]: 起動済みのブラウザ
+        """
+        if self.pool is None:
+            yield None
+            return
+        async with self.pool.lease() as browser:
+            yield browser
+
+    def stats(self, timeout: float = 5) -> Dict:
+        """エンジンの利用状況を返す
+
+        スケジューラとプールの状態はループ上で更新されるため、ループ上で収集する。
+        """
+        async def collect():
+            stats = {
+                'running_tasks': len(asyncio.all_tasks()) - 1,
+                'scheduler': self.scheduler.stats()
+            }
+            if self.pool is not None:
+                stats['pool'] = self.pool.stats()
+            return stats
+
+        return self.run(collect(), timeout)
+
+    def close(self, timeout: float = 30):
+        """ブラウザプールを終了し、イベントループを停止する"""
+        if not self.loop.is_running():
+            return
+        if self.pool is not None:
+            try:
+                self.run(self.pool.close(), timeout)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"ブラウザプールの終了エラー: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+_engine_lock = threading.Lock()
+
+def get_automation_engine(app) -> AutomationEngine:
+    """アプリケーションの自動操作エンジンを取得する（初回呼び出し時に起動）
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        AutomationEngine: 自動操作エンジン
+    """
+    engine = app.extensions.get('sb_automation_engine')
+    if engine is None:
+        with _engine_lock:
+            engine = app.extensions.get('sb_automation_engine')
+            if engine is None:
+                from .sb_automation import get_browser_profile
+
+                max_parallel = max(1, app.config.get('SB_MAX_PARALLEL_POSTS', 2))
+                pool = None
+                size = app.config.get('SB_BROWSER_POOL_SIZE', 0)
+                if size > 0:
+                    pool = BrowserPool(
+                        size=size,
+                        launch_options=get_browser_profile(app)['launch_options'],
+                        max_jobs_per_browser=app.config.get('SB_BROWSER_MAX_JOBS', 50),
+                        # 同時実行数の上限まで、各ブラウザに複数のコンテキストを作成する
+                        contexts_per_browser=math.ceil(max_parallel / size),
+                        logger=app.logger
+                    )
+                scheduler = PostScheduler(max_parallel=max_parallel)
+                engine = AutomationEngine(pool=pool, scheduler=scheduler, logger=app.logger)
+                if pool is not None:
+                    # ブラウザの起動を待たずに返す
+                    engine.submit(pool.start())
+                atexit.register(engine.close)
+                app.extensions['sb_automation_engine'] = engine
+    return engine
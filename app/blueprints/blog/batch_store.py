@@ -0,0 +1,170 @@
+import os
+import re
+import json
+import secrets
+import time
+import tempfile
+from typing import Dict, List, Optional, Set
+
+_BATCH_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class BatchStore:
+    """投稿待ちのブログ（バッチ）をファイルに保存するストア
+
+    Flaskのセッションはクッキーに保存されるため、本文と画像情報を複数件保持すると
+    クッキーのサイズ上限を超えてしまう。セッションにはバッチIDのみを保存し、
+    投稿内容はバッチIDごとのJSONファイルに保存する。
+
+    バッチファイルの更新時刻を最終利用時刻とし（読み込み時にも更新する）、
+    ttl_seconds 以上利用されていないバッチは prune() で削除する
+    （セッションのクッキーを失ったバッチが残り続けないように）。
+    """
+
+    def __init__(self, directory: str, ttl_seconds: int = 0):
+        """初期化
+
+        Args:
+            directory: バッチファイルの保存先ディレクトリ
+            ttl_seconds: バッチの保持期間（秒、0以下で削除しない）
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def new_batch_id() -> str:
+        """新しいバッチIDを生成する"""
+        return secrets.token_hex(16)
+
+    def _path(self, batch_id: str) -> str:
+        """バッチIDに対応するファイルのパスを返す"""
+        if not _BATCH_ID_PATTERN.match(batch_id or ''):
+            raise ValueError('不正なバッチIDです')
+        return os.path.join(self.directory, f"{batch_id}.json")
+
+    def load(self, batch_id: str) -> List[Dict]:
+        """バッチの投稿内容を取得する
+
+        Args:
+            batch_id: バッチID
+
+        Returns:
+            List[Dict]: 投稿内容のリスト（存在しない場合は空のリスト）
+        """
+        path = self._path(batch_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                posts = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        try:
+            # 最終利用時刻を更新する（保持期間の起点）
+            os.utime(path, None)
+        except OSError:
+            pass
+        return posts
+
+    def save(self, batch_id: str, posts: List[Dict]):
+        """バッチの投稿内容を保存する（空の場合はファイルを削除する）
+
+        Args:
+            batch_id: バッチID
+            posts: 投稿内容のリスト
+        """
+        path = self._path(batch_id)
+        if not posts:
+            self.delete(batch_id)
+            return
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # 書き込み途中のファイルを読まないよう一時ファイル経由で置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(posts, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def delete(self, batch_id: str):
+        """バッチを削除する"""
+        try:
+            os.remove(self._path(batch_id))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """保持期間を過ぎたバッチ（と書き込み途中で残った一時ファイル）を削除する
+
+        Args:
+            now: 基準時刻（省略時は現在時刻）
+
+        Returns:
+            int: 削除したバッチの数
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+        if now is None:
+            now = time.time()
+
+        removed = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(('.json', '.tmp')):
+                        continue
+                    try:
+                        if now - entry.stat(follow_symlinks=False).st_mtime <= self.ttl_seconds:
+                            continue
+                        os.remove(entry.path)
+                    except OSError:
+                        continue
+                    if entry.name.endswith('.json'):
+                        removed += 1
+        except FileNotFoundError:
+            return 0
+        return removed
+
+    def referenced_paths(self) -> Set[str]:
+        """保存されているすべてのバッチが参照している画像のパスを返す
+
+        Returns:
+            Set[str]: 画像の一時ファイルの絶対パス
+        """
+        paths = set()
+        try:
+            with os.scandir(self.directory) as it:
+                names = [entry.name for entry in it if entry.name.endswith('.json')]
+        except FileNotFoundError:
+            return paths
+
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                    posts = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            for post in posts:
+                for img in post.get('images', []):
+                    if 'path' in img:
+                        paths.add(os.path.abspath(img['path']))
+        return paths
+
+def get_batch_store(app) -> BatchStore:
+    """アプリケーションのバッチストアを取得する
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        BatchStore: バッチストア
+    """
+    store = app.extensions.get('sb_batch_store')
+    if store is None:
+        directory = app.config.get('SB_BATCH_DIR') or os.path.join(app.instance_path, 'sb_batches')
+        store = BatchStore(directory, ttl_seconds=app.config.get('SB_BATCH_TTL_SECONDS', 3 * 24 * 60 * 60))
+        app.extensions['sb_batch_store'] = store
+    return store
@@ -0,0 +1,207 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from playwright.async_api import async_playwright
+
+class _PooledBrowser:
+    """プール内のブラウザと使用状況"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.jobs = 0
+        self.active = 0
+        # 再起動のたびに更新し、古い貸し出し枠を無効にする
+        self.generation = 0
+        self.retiring = False
+
+    def is_healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+class BrowserPool:
+    """起動済みChromiumプロセスを使い回すブラウザプール
+
+    プールは自動操作エンジンのイベントループ上で動作する。lease() で貸し出した
+    ブラウザには呼び出し側がジョブごとに独立したコンテキストを作成する。
+    1つのブラウザは最大 contexts_per_browser 件のジョブで同時に使用できる。
+    クラッシュしたブラウザや規定回数使用したブラウザは、使用中のジョブが
+    すべて終わった時点で再起動する。
+    """
+
+    def __init__(self, size: int, launch_options: Dict, max_jobs_per_browser: int = 50,
+                 health_check_interval: float = 30.0, contexts_per_browser: int = 1, logger=None):
+        """初期化
+
+        Args:
+            size: プールするブラウザ数
+            launch_options: chromium.launch() に渡すオプション
+            max_jobs_per_browser: ブラウザを再起動するまでのジョブ数
+            health_check_interval: アイドル中のブラウザの状態を確認する間隔（秒）
+            contexts_per_browser: 1つのブラウザで同時に実行するジョブ（コンテキスト）数
+            logger: ログ出力先
+        """
+        self.size = size
+        self.launch_options = launch_options
+        self.max_jobs_per_browser = max_jobs_per_browser
+        self.health_check_interval = health_check_interval
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.logger = logger
+        self._playwright = None
+        # 貸し出し枠 (ブラウザ, 世代) のキュー
+        self._slots: Optional[asyncio.Queue] = None
+        self._all: List[_PooledBrowser] = []
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._busy = 0
+        self._waiting = 0
+        self._closed = False
+
+    async def start(self):
+        """Playwrightを起動し、ブラウザを事前に立ち上げる"""
+        if self._slots is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._slots is not None:
+                return
+            self._playwright = await async_playwright().start()
+            slots = asyncio.Queue()
+            for _ in range(self.size):
+                pooled = _PooledBrowser(None)
+                try:
+                    pooled.browser = await self._launch()
+                except Exception as e:
+                    # 起動に失敗したブラウザは貸し出し時に再起動する
+                    self._log_error(f"プールのブラウザ起動エラー: {str(e)}")
+                self._all.append(pooled)
+                self._add_slots(slots, pooled)
+            self._slots = slots
+            self._health_task = asyncio.get_running_loop().create_task(self._health_check_loop())
+
+    def _add_slots(self, slots: asyncio.Queue, pooled: _PooledBrowser):
+        """ブラウザの貸し出し枠をキューに追加する"""
+        for _ in range(self.contexts_per_browser):
+            slots.put_nowait((pooled, pooled.generation))
+
+    async def _acquire(self) -> _PooledBrowser:
+        """有効な貸し出し枠を取得する（再起動待ちのブラウザの枠は破棄する）"""
+        while True:
+            pooled, generation = await self._slots.get()
+            if generation != pooled.generation or pooled.retiring:
+                continue
+            if pooled.is_healthy():
+                return pooled
+            # 待機中にクラッシュしていた場合は再起動してから貸し出す
+            pooled.retiring = True
+            if pooled.active == 0:
+                try:
+                    await self._recycle(pooled)
+                except BaseException:
+                    self._add_slots(self._slots, pooled)
+                    raise
+                self._add_slots(self._slots, pooled)
+
+    @asynccontextmanager
+    async def lease(self):
+        """ブラウザを貸し出す（空きがなければ返却を待つ）
+
+        Yields:
+            Browser: 起動済みのブラウザ
+        """
+        if self._closed:
+            raise RuntimeError('ブラウザプールは終了しています')
+        await self.start()
+
+        self._waiting += 1
+        try:
+            pooled = await self._acquire()
+        finally:
+            self._waiting -= 1
+
+        self._busy += 1
+        pooled.active += 1
+        generation = pooled.generation
+        try:
+            yield pooled.browser
+        finally:
+            self._busy -= 1
+            pooled.active -= 1
+            pooled.jobs += 1
+            if not pooled.is_healthy() or pooled.jobs >= self.max_jobs_per_browser:
+                pooled.retiring = True
+            if not pooled.retiring:
+                self._slots.put_nowait((pooled, generation))
+            elif pooled.active == 0:
+                # 使用中のジョブがなくなったら再起動して枠を戻す
+                try:
+                    await self._recycle(pooled)
+                except Exception as e:
+                    self._log_error(f"プールのブラウザ再起動エラー: {str(e)}")
+                finally:
+                    self._add_slots(self._slots, pooled)
+
+    def stats(self) -> Dict:
+        """プールの利用状況を返す"""
+        return {
+            'size': self.size,
+            'contexts_per_browser': self.contexts_per_browser,
+            'busy': self._busy,
+            'waiting': self._waiting
+        }
+
+    async def close(self):
+        """すべてのブラウザとPlaywrightを終了する"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for pooled in self._all:
+            await self._close_browser(pooled.browser)
+        self._all = []
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def _log_error(self, message: str):
+        if self.logger:
+            self.logger.error(message)
+
+    async def _launch(self):
+        """ブラウザを起動する"""
+        return await self._playwright.chromium.launch(**self.launch_options)
+
+    async def _close_browser(self, browser):
+        """ブラウザを終了する（既に終了している場合も例外を出さない）"""
+        if browser is None:
+            return
+        try:
+            await browser.close()
+        except Exception as e:
+            self._log_error(f"プールのブラウザ終了エラー: {str(e)}")
+
+    async def _recycle(self, pooled: _PooledBrowser):
+        """ブラウザを終了して起動し直す（失敗した場合も古い枠は無効にする）"""
+        browser, pooled.browser = pooled.browser, None
+        pooled.generation += 1
+        pooled.retiring = False
+        pooled.jobs = 0
+        await self._close_browser(browser)
+        pooled.browser = await self._launch()
+
+    async def _health_check_loop(self):
+        """アイドル中のブラウザを定期的に確認し、停止していれば再起動する"""
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            for pooled in self._all:
+                if pooled.active or pooled.retiring or pooled.is_healthy():
+                    continue
+                try:
+                    await self._recycle(pooled)
+                except Exception as e:
+                    self._log_error(f"プールのブラウザ再起動エラー: {str(e)}")
+                finally:
+                    self._add_slots(self._slots, pooled)
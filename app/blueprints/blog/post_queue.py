@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+from typing import Dict, List, Optional
+from ...utils.images import file_content_hash
+
+# 投稿処理のチェックポイント（この順に進む）
+# logged_in: ログイン済み、images_uploaded: 画像アップロード済み、submitted: 投稿フォームを送信した
+CHECKPOINTS = ('logged_in', 'images_uploaded', 'submitted')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS post_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL UNIQUE,
+    account TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    checkpoint TEXT,
+    checkpoint_data TEXT NOT NULL DEFAULT '{}',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS post_jobs_updated_at ON post_jobs (updated_at);
+"""
+
+# 実行できない投稿の結果
+CLAIM_MESSAGES = {
+    'skip': 'この内容のブログは投稿済みのため、再投稿しませんでした。',
+    'busy': 'この内容のブログは現在投稿処理中です。しばらくしてから投稿一覧を確認してください。',
+    'uncertain': '前回の投稿処理がフォーム送信後に中断されたため、二重投稿を避けて再投稿しませんでした。'
+                 'サロンボードの投稿一覧を確認してください。'
+}
+
+class PostQueue:
+    """サロンボードへの投稿ジョブを記録する永続キュー（SQLite、WALモード）
+
+    投稿内容（画像は内容ハッシュ）から計算したフィンガープリントごとに、投稿内容・
+    状態・チェックポイントを記録する。投稿処理が途中で中断された場合、同じ内容の
+    再投稿はチェックポイントから再開し（アップロード済みの画像は再利用する）、
+    投稿済みの内容やフォーム送信後に中断した内容は二重投稿を避けて再投稿しない。
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600, retention_seconds: float = 7 * 24 * 60 * 60):
+        """初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            lease_seconds: 実行中のジョブを他のワーカーが再開しない期間（秒）
+            retention_seconds: 完了したジョブを保持する期間（秒、過ぎると同じ内容を再投稿できる）
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), mode=0o700, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を開く（自動コミット、トランザクションは明示的に開始する）"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @staticmethod
+    def fingerprint(account: str, post: Dict) -> str:
+        """アカウントと投稿内容のフィンガープリントを計算する
+
+        Args:
+            account: サロンボードID
+            post: 投稿内容（title, body, stylist, images, coupon）
+
+        Returns:
+            str: 16進数表記のハッシュ値
+        """
+        images = []
+        for img_info in post.get('images', []):
+            path = img_info['path']
+            images.append(file_content_hash(path) if os.path.exists(path) else path)
+        content = {
+            'account': account,
+            'title': post.get('title'),
+            'body': post.get('body'),
+            'stylist': post.get('stylist'),
+            'coupon': post.get('coupon') or None,
+            'images': images
+        }
+        return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _lease_expired(self, row: sqlite3.Row, now: float) -> bool:
+        """実行中のジョブのワーカーが終了しているかどうか"""
+        if row['lease_until'] is None or row['lease_until'] <= now:
+            return True
+        host, _, pid = (row['worker'] or '').rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit() or row['worker'] == self.worker:
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass
+        return False
+
+    def claim(self, account: str, post: Dict, lease_seconds: Optional[float] = None,
+              now: Optional[float] = None) -> Dict:
+        """投稿ジョブの実行権を取得する
+
+        Args:
+            account: サロンボードID
+            post: 投稿内容（title, body, stylist, images, coupon）
+            lease_seconds: 実行期限（秒、省略時は lease_seconds。バッチ投稿では投稿数に応じて延ばす）
+            now: 基準時刻（省略時は現在時刻）
+
+        Returns:
+            Dict: id, action（run: 実行、skip: 投稿済み、busy: 他のワーカーが実行中、
+                uncertain: フォーム送信後に中断）, checkpoint, checkpoint_data, attempts
+        """
+        if now is None:
+            now = time.time()
+        lease_until = now + (lease_seconds or self.lease_seconds)
+        fingerprint = self.fingerprint(account, post)
+        account_key = hashlib.sha256(account.encode('utf-8')).hexdigest()[:12]
+        payload = json.dumps({
+            'title': post.get('title'),
+            'body': post.get('body'),
+            'stylist': post.get('stylist'),
+            'coupon': post.get('coupon'),
+            'images': [img_info['path'] for img_info in post.get('images', [])]
+        }, ensure_ascii=False)
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                "DELETE FROM post_jobs WHERE updated_at < ? AND status != 'running'",
+                (now - self.retention_seconds,)
+            )
+            row = conn.execute('SELECT * FROM post_jobs WHERE fingerprint = ?', (fingerprint,)).fetchone()
+            if row is None:
+                cursor = conn.execute(
+                    "INSERT INTO post_jobs (fingerprint, account, payload, status, attempts, worker, lease_until, "
+                    "created_at, updated_at) VALUES (?, ?, ?, 'running', 1, ?, ?, ?, ?)",
+                    (fingerprint, account_key, payload, self.worker, lease_until, now, now)
+                )
+                conn.execute('COMMIT')
+                return {'id': cursor.lastrowid, 'action': 'run', 'checkpoint': None, 'checkpoint_data': {}, 'attempts': 1}
+
+            if row['status'] == 'succeeded':
+                action = 'skip'
+            elif row['status'] == 'running' and not self._lease_expired(row, now):
+                action = 'busy'
+            elif row['checkpoint'] == 'submitted':
+                action = 'uncertain'
+                conn.execute(
+                    "UPDATE post_jobs SET status = 'uncertain', lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (now, row['id'])
+                )
+            else:
+                action = 'run'
+                conn.execute(
+                    "UPDATE post_jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (self.worker, lease_until, now, row['id'])
+                )
+            conn.execute('COMMIT')
+            return {
+                'id': row['id'],
+                'action': action,
+                'checkpoint': row['checkpoint'],
+                'checkpoint_data': json.loads(row['checkpoint_data']),
+                'attempts': row['attempts'] + (1 if action == 'run' else 0)
+            }
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def checkpoint(self, job_id: int, name: str, data: Optional[Dict] = None):
+        """チェックポイントを記録する（実行期限も延長する）
+
+        Args:
+            job_id: ジョブID
+            name: チェックポイント名（CHECKPOINTS のいずれか）
+            data: 再開時に使用するデータ（既存のデータに追加する）
+        """
+        if name not in CHECKPOINTS:
+            raise ValueError(f'不明なチェックポイントです: {name}')
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT checkpoint_data FROM post_jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is not None:
+                checkpoint_data = json.loads(row['checkpoint_data'])
+                checkpoint_data.update(data or {})
+                conn.execute(
+                    'UPDATE post_jobs SET checkpoint = ?, checkpoint_data = ?, lease_until = ?, updated_at = ? '
+                    'WHERE id = ?',
+                    (name, json.dumps(checkpoint_data, ensure_ascii=False), now + self.lease_seconds, now, job_id)
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, result: Dict):
+        """ジョブの結果を記録する
+
+        Args:
+            job_id: ジョブID
+            result: 投稿結果（success, message）
+        """
+        conn = self._connect()
+        try:
+            conn.execute(
+                'UPDATE post_jobs SET status = ?, message = ?, lease_until = NULL, updated_at = ? WHERE id = ?',
+                ('succeeded' if result.get('success') else 'failed', result.get('message'), time.time(), job_id)
+            )
+        finally:
+            conn.close()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """ジョブの記録を取得する"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT * FROM post_jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['checkpoint_data'] = json.loads(job['checkpoint_data'])
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        """状態ごとのジョブ数を返す"""
+        conn = self._connect()
+        try:
+            rows: List[sqlite3.Row] = conn.execute(
+                'SELECT status, COUNT(*) AS count FROM post_jobs GROUP BY status'
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row['status']: row['count'] for row in rows}
+
+def claim_result(claim: Dict) -> Dict:
+    """実行しない投稿ジョブ（skip, busy, uncertain）の投稿結果を返す"""
+    return {
+        'success': claim['action'] == 'skip',
+        'message': CLAIM_MESSAGES[claim['action']],
+        'duplicate': True
+    }
+
+def get_post_queue(app) -> Optional[PostQueue]:
+    """アプリケーションの投稿キューを取得する（無効な場合はNone）
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        Optional[PostQueue]: 投稿キュー
+    """
+    if not app.config.get('SB_POST_QUEUE_ENABLED', False):
+        return None
+
+    queue = app.extensions.get('sb_post_queue')
+    if queue is None:
+        db_path = app.config.get('SB_POST_QUEUE_PATH') or os.path.join(app.instance_path, 'sb_post_queue.sqlite3')
+        queue = PostQueue(
+            db_path,
+            lease_seconds=app.config.get('SB_BROWSER_POOL_TIMEOUT', 300) * 2,
+            retention_seconds=app.config.get('SB_POST_QUEUE_RETENTION', 7 * 24 * 60 * 60)
+        )
+        app.extensions['sb_post_queue'] = queue
+    return queue
@@ -0,0 +1,123 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .sb_diagnostics import RunDiagnostics
+
+class _AccountStats:
+    """アカウントごとの投稿状況"""
+
+    def __init__(self):
+        self.lock: Optional[asyncio.Lock] = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.posts = 0
+        self.busy_seconds = 0.0
+        self.last_finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict:
+        minutes = self.busy_seconds / 60
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'posts': self.posts,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'posts_per_minute': round(self.posts / minutes, 2) if minutes > 0 else 0.0,
+            'last_finished_at': self.last_finished_at
+        }
+
+class PostScheduler:
+    """サロンボードへの投稿ジョブを並行実行するスケジューラ
+
+    自動操作エンジンのイベントループ上で動作する。異なるアカウントへの投稿は
+    別々のブラウザコンテキストで並行に実行し、同じアカウントへの投稿は
+    セッションの競合を避けるため1件ずつ順に実行する。同時に実行する
+    ジョブ（コンテキスト）数は max_parallel で制限する。
+    """
+
+    def __init__(self, max_parallel: int = 2):
+        """初期化
+
+        Args:
+            max_parallel: 同時に実行するジョブの最大数
+        """
+        self.max_parallel = max(1, max_parallel)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._accounts: Dict[str, _AccountStats] = {}
+        self._queued = 0
+        self._running = 0
+
+    async def run(self, account: str, job: Callable[[], Awaitable[Any]]) -> Any:
+        """ジョブを実行する（同じアカウントのジョブと同時実行枠の空きを待つ）
+
+        Args:
+            account: アカウントの識別子（サロンボードID）
+            job: 投稿処理のコルーチンを返す関数。戻り値の success と results を集計に使用する
+
+        Returns:
+            Any: ジョブの戻り値
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_parallel)
+        stats = self._accounts.setdefault(account, _AccountStats())
+        if stats.lock is None:
+            stats.lock = asyncio.Lock()
+
+        self._queued += 1
+        stats.queued += 1
+        dequeued = False
+        try:
+            # アカウントのロックを先に取得し、順番待ちのジョブが同時実行枠を占有しないようにする
+            async with stats.lock:
+                async with self._semaphore:
+                    self._queued -= 1
+                    stats.queued -= 1
+                    dequeued = True
+                    self._running += 1
+                    stats.running += 1
+                    started = time.monotonic()
+                    result = None
+                    try:
+                        result = await job()
+                        return result
+                    finally:
+                        self._running -= 1
+                        stats.running -= 1
+                        self._record(stats, result, time.monotonic() - started)
+        finally:
+            if not dequeued:
+                # キャンセルなどで実行前に待機を終えた場合
+                self._queued -= 1
+                stats.queued -= 1
+
+    @staticmethod
+    def _record(stats: _AccountStats, result: Any, elapsed: float):
+        """ジョブの結果を集計する"""
+        stats.busy_seconds += elapsed
+        stats.last_finished_at = time.time()
+        if isinstance(result, dict) and result.get('success'):
+            stats.completed += 1
+        else:
+            stats.failed += 1
+        if isinstance(result, dict) and 'results' in result:
+            stats.posts += sum(1 for post_result in result['results'] if post_result.get('success'))
+        elif isinstance(result, dict) and result.get('success'):
+            stats.posts += 1
+
+    def stats(self) -> Dict:
+        """スケジューラの状況（待機数、実行数、アカウントごとのスループット）を返す
+
+        アカウントはサロンボードIDそのものではなく、診断情報と同じハッシュ化した識別子で示す。
+        """
+        return {
+            'max_parallel': self.max_parallel,
+            'queued': self._queued,
+            'running': self._running,
+            'accounts': {
+                RunDiagnostics.account_key(account): stats.as_dict()
+                for account, stats in self._accounts.items()
+            }
+        }
@@ -2,15 +2,56 @@ import os
 import asyncio
 from flask import (
     render_template, request, session, redirect,
-    url_for, flash, current_app, jsonify
+    url_for, flash, current_app, jsonify, abort, send_file
 )
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from . import bp
 from ...utils.decorators import login_required
-from ...utils.helpers import save_uploaded_image, clean_session_images, is_valid_image
-from .services import generate_blog_with_gemini
-from .scraping import scrape_hpb_data
-from .sb_automation import post_to_sb
+from ...utils.admission import admission_required
+from ...utils.upload_guard import FileTooLarge
+from ...utils.deadline import Deadline
+from ...utils.timing import record_spans, span
+from ...utils.metrics import record_cache
+from ...utils.helpers import (
+    save_uploaded_image, clean_session_images, is_valid_image, touch_session_images
+)
+from .batch_store import BatchStore, get_batch_store
+from ...utils.images import (
+    THUMBNAIL_DIRNAME, THUMBNAIL_SIZES, file_content_hash, get_thumbnail, verify_images
+)
+
+# services（google.generativeai）、scraping（requests, bs4）、sb_automation（playwright）は
+# 読み込みが重いため、アプリケーション起動時ではなく初回利用時に読み込む
+def generate_blog_with_gemini(*args, **kwargs):
+    """services.generate_blog_with_gemini の遅延読み込みラッパー"""
+    from .services import generate_blog_with_gemini as _generate_blog_with_gemini
+    return _generate_blog_with_gemini(*args, **kwargs)
+
+def scrape_hpb_data(*args, **kwargs):
+    """scraping.scrape_hpb_data の遅延読み込みラッパー"""
+    from .scraping import scrape_hpb_data as _scrape_hpb_data
+    return _scrape_hpb_data(*args, **kwargs)
+
+def post_to_sb(*args, **kwargs):
+    """sb_automation.post_to_sb_sync の遅延読み込みラッパー"""
+    from .sb_automation import post_to_sb_sync as _post_to_sb_sync
+    return _post_to_sb_sync(*args, **kwargs)
+
+def post_batch_to_sb(*args, **kwargs):
+    """sb_automation.post_batch_to_sb_sync の遅延読み込みラッパー"""
+    from .sb_automation import post_batch_to_sb_sync as _post_batch_to_sb_sync
+    return _post_batch_to_sb_sync(*args, **kwargs)
+
+@bp.context_processor
+def inject_upload_settings():
+    """アップロードフォーム用の設定をテンプレートに渡す"""
+    return {
+        'upload_settings': {
+            'resize_max_edge': current_app.config.get('CLIENT_RESIZE_MAX_EDGE', 2048),
+            'resize_quality': current_app.config.get('CLIENT_RESIZE_QUALITY', 0.85)
+        }
+    }
 
 @bp.route('/')
 @login_required
@@ -43,11 +84,18 @@ def create():
             # 前回のセッション画像を削除
             clean_session_images(session.get('uploaded_images', []))
             
+            # 先頭バイトの検査を通過した画像のみデコード検証を行う
+            candidates = [
+                (i, file) for i, file in enumerate(files)
+                if file and file.filename != '' and is_valid_image(file)
+            ]
+            verified = verify_images([file for _, file in candidates])
+            
             # 画像を保存して情報をセッションに格納
             uploaded_images = []
             
-            for i, file in enumerate(files):
-                if file and file.filename != '' and is_valid_image(file):
+            for (i, file), is_verified in zip(candidates, verified):
+                if is_verified:
                     img_info = save_uploaded_image(file)
                     # プレースホルダーを設定（[IMAGE_1], [IMAGE_2], ...）
                     img_info['placeholder'] = f"[IMAGE_{i+1}]"
@@ -70,8 +118,32 @@ def create():
     
     return render_template('blog/create.html')
 
+def _upload_error(e, message: str):
+    """アップロードフォームでのエラーをメッセージとともに元の画面に戻す（他の画面では既定のエラー応答）"""
+    if request.endpoint != 'blog.create':
+        return e
+    flash(message)
+    return redirect(url_for('blog.create'))
+
+@bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    """アップロードサイズ超過時の処理（1枚あたりの上限とリクエスト全体の上限を区別する）"""
+    if isinstance(e, FileTooLarge):
+        max_mb = current_app.config.get('UPLOAD_MAX_FILE_BYTES', 0) // (1024 * 1024)
+        message = f'画像のサイズが大きすぎます。1枚あたり{max_mb}MB以下の画像を選択してください。'
+    else:
+        max_mb = (current_app.config.get('MAX_CONTENT_LENGTH') or 0) // (1024 * 1024)
+        message = f'画像のサイズが大きすぎます。合計{max_mb}MB以下になるように画像を選択してください。'
+    return _upload_error(e, message)
+
+@bp.errorhandler(UnsupportedMediaType)
+def upload_unsupported(e):
+    """画像以外のファイルがアップロードされた場合の処理"""
+    return _upload_error(e, '有効な画像がありません。JPEG, PNG, GIF, WEBPのみ対応しています。')
+
 @bp.route('/generate')
 @login_required
+@admission_required('generate')
 def generate():
     """ブログ生成処理（Gemini API連携とスクレイピング）"""
     # セッションから必要な情報を取得
@@ -84,18 +156,30 @@ def generate():
         flash('必要な情報が不足しています。最初からやり直してください。')
         return redirect(url_for('blog.create'))
     
+    # 参照中の一時ファイルをスイーパーの削除対象から外す
+    touch_session_images(uploaded_images)
+    
+    # リクエスト全体の制限時間（スクレイピングには一部だけを割り当て、残りをGeminiに使う）
+    deadline = Deadline(current_app.config.get('GENERATE_DEADLINE_SECONDS', 90))
+    
     try:
         # HPBスクレイピング処理を実行
-        scraped_data = scrape_hpb_data(store_url)
+        with span('scrape_total'):
+            scraped_data = scrape_hpb_data(
+                store_url, deadline.child(current_app.config.get('GENERATE_SCRAPE_SECONDS', 30))
+            )
+        if scraped_data.pop('partial', False):
+            flash('店舗情報の取得が制限時間内に完了しなかったため、一部のスタイリスト・クーポンが表示されていない可能性があります。')
         session['scraped_data'] = scraped_data
         
         # Gemini APIによるブログ生成処理を実行
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        generated_data = loop.run_until_complete(
-            generate_blog_with_gemini(uploaded_images, style, store_url)
-        )
-        loop.close()
+        with span('gemini_total'):
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            generated_data = loop.run_until_complete(
+                generate_blog_with_gemini(uploaded_images, style, store_url, deadline)
+            )
+            loop.close()
         
         # テンプレートテキストがある場合は本文に追加
         if template_text:
@@ -125,6 +209,9 @@ def edit():
         flash('必要な情報が不足しています。最初からやり直してください。')
         return redirect(url_for('blog.create'))
     
+    # 参照中の一時ファイルをスイーパーの削除対象から外す
+    touch_session_images(uploaded_images)
+    
     # 仮のデータ（実際にはGemini APIとスクレイピングの結果を使用）
     # この部分は後で実装します
     if not generated_data:
@@ -147,8 +234,45 @@ def edit():
                           generated_data=generated_data,
                           scraped_data=scraped_data)
 
+@bp.route('/image/<filename>')
+@login_required
+def image_preview(filename):
+    """アップロード画像のプレビュー（サムネイル）を返す"""
+    size = request.args.get('size', 'medium')
+    if size not in THUMBNAIL_SIZES:
+        abort(404)
+    
+    # セッションが参照している画像のみ配信する
+    uploaded_images = session.get('uploaded_images', [])
+    img_info = next((img for img in uploaded_images if img.get('filename') == filename), None)
+    if img_info is None or not os.path.exists(img_info.get('path', '')):
+        abort(404)
+    
+    content_hash = img_info.get('content_hash') or file_content_hash(img_info['path'])
+    etag = f"{content_hash}-{size}"
+    
+    if request.if_none_match.contains(etag):
+        # ブラウザのキャッシュが有効な場合はサムネイルを読み込まずに304を返す
+        response = current_app.response_class(status=304)
+    else:
+        cache_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], THUMBNAIL_DIRNAME)
+        try:
+            thumb_path, hit = get_thumbnail(img_info['path'], content_hash, size, cache_dir)
+            record_cache('thumbnail', hit)
+        except Exception as e:
+            current_app.logger.error(f"サムネイル生成エラー: {str(e)}")
+            abort(404)
+        response = send_file(thumb_path, mimetype='image/jpeg', conditional=False, etag=False)
+    
+    # ログインが必要な画像のため共有キャッシュには保存させない
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('THUMBNAIL_CACHE_MAX_AGE', 3600)
+    return response
+
 @bp.route('/post_to_sb', methods=['POST'])
 @login_required
+@admission_required('sb_post')
 def post_to_sb_route():
     """サロンボードへの投稿処理"""
     # フォームデータの取得
@@ -175,14 +299,14 @@ def post_to_sb_route():
         error = '画像情報が見つかりません。最初からやり直してください。'
     
     if error is None:
+        # 投稿中に一時ファイルが削除されないよう最終利用時刻を更新
+        touch_session_images(uploaded_images)
+        
         try:
-            # サロンボード自動投稿処理を実行
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                post_to_sb(sb_id, sb_password, title, body, stylist, uploaded_images, coupon)
-            )
-            loop.close()
+            # サロンボード自動投稿処理を実行（自動操作エンジンのイベントループで実行される）
+            with span('sb_total'):
+                result = post_to_sb(sb_id, sb_password, title, body, stylist, uploaded_images, coupon)
+            record_spans('sb', result.get('spans', []))
             
             if result['success']:
                 flash(result['message'])
@@ -206,3 +330,143 @@ def post_to_sb_route():
         flash(error)
     
     return redirect(url_for('blog.edit'))
+
+def _batch_id() -> str:
+    """セッションのバッチIDを取得する（未作成の場合は生成する）"""
+    batch_id = session.get('batch_id')
+    if not batch_id:
+        batch_id = BatchStore.new_batch_id()
+        session['batch_id'] = batch_id
+    return batch_id
+
+def _batch_images(posts):
+    """バッチ内のすべての投稿の画像情報を返す"""
+    return [img for post in posts for img in post.get('images', [])]
+
+@bp.route('/batch/add', methods=['POST'])
+@login_required
+def batch_add():
+    """編集中のブログをバッチ（投稿待ちリスト）に追加する"""
+    title = request.form.get('title')
+    body = request.form.get('body')
+    stylist = request.form.get('stylist')
+    coupon = request.form.get('coupon')
+    uploaded_images = session.get('uploaded_images', [])
+    
+    store = get_batch_store(current_app._get_current_object())
+    batch_id = _batch_id()
+    posts = store.load(batch_id)
+    
+    # バリデーション
+    error = None
+    
+    if not title or not body:
+        error = 'タイトルと本文は必須です。'
+    elif not stylist:
+        error = 'スタイリストを選択してください。'
+    elif not uploaded_images:
+        error = '画像情報が見つかりません。最初からやり直してください。'
+    elif len(posts) >= current_app.config.get('SB_BATCH_MAX_POSTS', 20):
+        error = 'バッチに追加できる件数の上限に達しています。'
+    
+    if error is not None:
+        flash(error)
+        return redirect(url_for('blog.edit'))
+    
+    posts.append({
+        'title': title,
+        'body': body,
+        'stylist': stylist,
+        'coupon': coupon or None,
+        'images': uploaded_images
+    })
+    store.save(batch_id, posts)
+    
+    # 画像はバッチが引き継ぐため削除せず、編集中のデータのみクリア
+    session.pop('uploaded_images', None)
+    session.pop('generated_data', None)
+    
+    flash(f'バッチに追加しました（{len(posts)}件）。')
+    return redirect(url_for('blog.batch'))
+
+@bp.route('/batch')
+@login_required
+def batch():
+    """バッチ（投稿待ちリスト）の確認画面"""
+    store = get_batch_store(current_app._get_current_object())
+    posts = store.load(_batch_id())
+    
+    # 投稿待ちの画像をスイーパーの削除対象から外す
+    touch_session_images(_batch_images(posts))
+    
+    return render_template('blog/batch.html', posts=posts, results=None)
+
+@bp.route('/batch/remove/<int:index>', methods=['POST'])
+@login_required
+def batch_remove(index):
+    """バッチから投稿を削除する"""
+    store = get_batch_store(current_app._get_current_object())
+    batch_id = _batch_id()
+    posts = store.load(batch_id)
+    
+    if 0 <= index < len(posts):
+        removed = posts.pop(index)
+        clean_session_images(removed.get('images', []))
+        store.save(batch_id, posts)
+        flash(f'「{removed["title"]}」をバッチから削除しました。')
+    
+    return redirect(url_for('blog.batch'))
+
+@bp.route('/batch/post', methods=['POST'])
+@login_required
+@admission_required('sb_post')
+def batch_post():
+    """バッチのブログを1回のログインでまとめてサロンボードに投稿する"""
+    sb_id = request.form.get('sb_id')
+    sb_password = request.form.get('sb_password')
+    
+    store = get_batch_store(current_app._get_current_object())
+    batch_id = _batch_id()
+    posts = store.load(batch_id)
+    
+    if not sb_id or not sb_password:
+        flash('サロンボードのIDとパスワードを入力してください。')
+        return redirect(url_for('blog.batch'))
+    if not posts:
+        flash('バッチに投稿がありません。')
+        return redirect(url_for('blog.batch'))
+    
+    # 投稿中に一時ファイルが削除されないよう最終利用時刻を更新
+    touch_session_images(_batch_images(posts))
+    
+    try:
+        with span('sb_total'):
+            result = post_batch_to_sb(sb_id, sb_password, posts)
+        record_spans('sb', result.get('spans', []))
+    except Exception as e:
+        current_app.logger.error(f"サロンボードバッチ投稿エラー: {str(e)}")
+        flash(f'投稿処理中にエラーが発生しました: {str(e)}')
+        return redirect(url_for('blog.batch'))
+    
+    flash(result['message'])
+    
+    # 投稿に成功したブログはバッチから外し、画像を削除する
+    results = list(zip(posts, result.get('results', [])))
+    remaining = [post for post, post_result in results if not post_result['success']]
+    remaining += posts[len(results):]
+    for post, post_result in results:
+        if post_result['success']:
+            clean_session_images(post.get('images', []))
+    store.save(batch_id, remaining)
+    
+    return render_template('blog/batch.html', posts=remaining, results=results)
+
+@bp.route('/automation/status')
+@login_required
+def automation_status():
+    """自動投稿の実行状況（待機数、実行数、アカウントごとのスループット）を返す"""
+    # 状況の確認のためにエンジンを起動しない
+    engine = current_app.extensions.get('sb_automation_engine')
+    if engine is None:
+        return jsonify({'running': False})
+    return jsonify(dict(engine.stats(), running=True))
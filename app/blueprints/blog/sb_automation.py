@@ -1,108 +1,458 @@
 import os
+import json
 import time
+import asyncio
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional
 from flask import current_app
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 import re
+from urllib.parse import urlsplit
+from .sb_session_cache import get_session_cache
+from .sb_diagnostics import get_run_diagnostics
+from .sb_http import FormChangedError, LoginRequiredError, SalonBoardHttpPoster, get_http_adapter
+from ...utils.images import SB_UPLOAD_DIRNAME, prepare_upload_image
+from ...utils.metrics import record_cache
+from ...utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from ...utils.deadline import DeadlineExceeded
+
+# Chromiumの起動引数
+# macOSでの安定性向上のためのオプションを追加
+BROWSER_ARGS = [
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-gpu',
+    '--disable-web-security'
+]
+
+# ブラウザプロファイル（SB_AUTOMATION_PROFILE で選択、ブラウザプールと共通）
+# fast: 本番用。ヘッドレスで操作遅延なし、不要なリソースと解析系ドメインへの通信を遮断する
+# debug: 動作確認用。画面を表示し、操作間に遅延を入れる。通信は遮断しない
+BROWSER_PROFILES = {
+    'fast': {
+        'launch_options': {
+            'headless': True,
+            'args': BROWSER_ARGS,
+            'timeout': 30000  # 30秒のタイムアウト
+        },
+        'block_requests': True
+    },
+    'debug': {
+        'launch_options': {
+            'headless': False,
+            'slow_mo': 50,  # 操作間の遅延を追加して安定性を向上
+            'args': BROWSER_ARGS,
+            'timeout': 30000  # 30秒のタイムアウト
+        },
+        'block_requests': False
+    }
+}
+DEFAULT_BROWSER_PROFILE = 'fast'
+
+def get_browser_profile(app) -> Dict:
+    """設定に応じたブラウザプロファイルを取得する
+    
+    Args:
+        app: Flaskアプリケーション
+        
+    Returns:
+        Dict: プロファイル（name, launch_options, blocked_resource_types, blocked_domains）
+    """
+    name = (app.config.get('SB_AUTOMATION_PROFILE') or DEFAULT_BROWSER_PROFILE).lower()
+    if name not in BROWSER_PROFILES:
+        app.logger.warning(f"不明な自動操作プロファイルのため {DEFAULT_BROWSER_PROFILE} を使用します: {name}")
+        name = DEFAULT_BROWSER_PROFILE
+    
+    profile = BROWSER_PROFILES[name]
+    blocked_resource_types = []
+    blocked_domains = []
+    if profile['block_requests']:
+        blocked_resource_types = app.config.get('SB_BLOCKED_RESOURCE_TYPES', [])
+        blocked_domains = app.config.get('SB_BLOCKED_DOMAINS', [])
+    return {
+        'name': name,
+        'launch_options': profile['launch_options'],
+        'blocked_resource_types': blocked_resource_types,
+        'blocked_domains': blocked_domains
+    }
+
+def is_blocked_host(host: Optional[str], domains) -> bool:
+    """ホストが遮断対象のドメイン（またはそのサブドメイン）かどうかを判定する"""
+    if not host:
+        return False
+    host = host.lower()
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+def build_request_filter(resource_types, domains):
+    """不要なリクエストを中断するルートハンドラを作成する
+    
+    Args:
+        resource_types: 遮断するリソース種別（image, media, font など）
+        domains: 遮断するドメイン
+        
+    Returns:
+        Callable: BrowserContext.route() に渡すハンドラ
+    """
+    resource_types = frozenset(resource_types)
+    domains = tuple(domain.lower() for domain in domains)
+    
+    async def handle(route):
+        request = route.request
+        if request.resource_type in resource_types or is_blocked_host(urlsplit(request.url).hostname, domains):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    return handle
+
+# セレクタの既定値（selectors.json の sb セクションに未設定の場合に使用）
+DEFAULT_SELECTORS = {
+    'login': {
+        'id_input': '#idPasswordInputForm > div > dl:nth-child(1) > dd > input',
+        'password_input': '#jsiPwInput',
+        'login_button': '#idPasswordInputForm > div > div > a'
+    },
+    'navigation': {
+        'publish_management': '#globalNavi > ul.common-CLPcommon__globalNavi > li:nth-child(2) > a',
+        'blog_button': '#cmsForm > div > div > ul > li:nth-child(9) > a',
+        'new_post_button': '#newPosts'
+    },
+    'blog_form': {
+        'stylist_select': '#stylistId',
+        'title_input': '#blogTitle',
+        'upload_button': '#upload',
+        'coupon_select_button': '.jsc_SB_modal_trigger',
+        'confirm_button': '#confirm',
+        'nicEdit_area': '.nicEdit-main',
+        'file_select': '#sendFile',
+        'image_upload_submit': '.jscImageUploaderModalSubmitButton',
+        'coupon_setting_button': '.jsc_SB_modal_setting_btn'
+    }
+}
+
+# 各ステップの完了を判定する待機条件（selectors.json の sb.ready が未設定の場合に使用）
+# selector: 要素の状態（state、既定はvisible）、element: セレクタ設定のキー（"セクション.キー"）を参照、
+# url: URLの正規表現、response: レスポンスURLの正規表現（method で絞り込み可）、load_state: 読み込み状態
+# timeout（ミリ秒）を省略した場合はコンテキストの既定値を使用する
+DEFAULT_READY_SIGNALS = {
+    'login_button': {'selector': '#globalNavi, .error-message'},
+    'publish_management': {'element': 'navigation.blog_button'},
+    'blog_button': {'element': 'navigation.new_post_button'},
+    'new_post_button': {'element': 'blog_form.title_input'},
+    'upload_button': {'element': 'blog_form.file_select', 'state': 'attached'},
+    'file_select': {'response': '(?i)upload', 'method': 'POST', 'timeout': 60000},
+    'image_upload_submit': {'element': 'blog_form.image_upload_submit', 'state': 'hidden'},
+    'coupon_select_button': {'element': 'blog_form.coupon_setting_button'},
+    'coupon_setting_button': {'element': 'blog_form.coupon_setting_button', 'state': 'hidden'},
+    'confirm_button': {'element': 'blog_form.title_input', 'state': 'detached'},
+    'register_button': {'load_state': 'domcontentloaded'}
+}
 
 class SalonBoardAutomation:
-    """サロンボード自動投稿を行うクラス"""
+    """サロンボード自動投稿を行うクラス（Playwright非同期API）
     
-    def __init__(self, sb_id: str, sb_password: str):
+    async with で使用する。ブラウザプールから借りたブラウザを渡した場合は
+    独立したコンテキストのみを作成し、終了時にブラウザは閉じない。
+    ログインや画像アップロードなどの各操作の所要時間はスパンとして spans に記録し、
+    finish() で実行結果とともに返す。
+    """
+    
+    def __init__(self, sb_id: str, sb_password: str, browser=None):
         """初期化
         
         Args:
             sb_id: サロンボードID
             sb_password: サロンボードパスワード
+            browser: ブラウザプールから貸し出されたブラウザ（省略時は自前で起動）
         """
         self.sb_id = sb_id
         self.sb_password = sb_password
         selectors = current_app.config.get('SELECTORS', {})
         self.selectors = selectors.get('sb', {})
-        self.login_url = "https://salonboard.com/login/"
+        base_url = current_app.config.get('SB_BASE_URL', 'https://salonboard.com').rstrip('/')
+        self.login_url = f"{base_url}/login/"
+        self.top_url = f"{base_url}/KLP/top/"
+        app = current_app._get_current_object()
+        self.profile = get_browser_profile(app)
+        self.session_cache = get_session_cache(app)
+        self.ready_signals = dict(DEFAULT_READY_SIGNALS, **self.selectors.get('ready', {}))
+        self.diagnostics = get_run_diagnostics(app)
+        self.step_timings: List[Dict] = []
+        self.spans: List[Dict] = []
+        self.current_post: Optional[int] = None
+        # 投稿キューにチェックポイント（images_uploaded, submitted）を記録する関数
+        self.checkpoint_handler = None
+        self.run_started = time.perf_counter()
+        self.tracing = False
+        self._failure_screenshots: List[tuple] = []
+        self.restored_session = False
+        # 直前のログインで発生したエラー（IDとパスワードの誤りではない失敗）
+        self.login_error: Optional[Exception] = None
+        self.leased_browser = browser
         self.browser = None
+        self.context = None
         self.page = None
         self.playwright = None
     
-    def __enter__(self):
-        """コンテキストマネージャの開始"""
-        self.setup()
+    async def __aenter__(self):
+        """非同期コンテキストマネージャの開始"""
+        await self.setup()
         return self
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """コンテキストマネージャの終了"""
-        self.teardown()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """非同期コンテキストマネージャの終了"""
+        await self.teardown()
+    
+    def _selector(self, section: str, key: str) -> Optional[str]:
+        """selectors.json の sb セクションからセレクタを取得する（未設定の場合は既定値）"""
+        selector = self.selectors.get(section, {}).get(key)
+        if selector is None:
+            selector = DEFAULT_SELECTORS.get(section, {}).get(key)
+        return selector
+    
+    async def _click(self, section: str, key: str):
+        """要素をクリックし、同名ステップの待機条件が満たされるまで待つ"""
+        selector = self._selector(section, key)
+        await self._run_step(key, lambda: self.page.click(selector))
+    
+    @asynccontextmanager
+    async def _span(self, name: str):
+        """操作の所要時間をスパンとして記録する
+        
+        例外で終了した場合は ok を False にする。呼び出し側で ok を上書きしてもよい。
+        
+        Args:
+            name: スパン名（login, upload_image[2] など）
+        """
+        started = time.perf_counter()
+        span = {'name': name, 'start_ms': round((started - self.run_started) * 1000, 1), 'ok': True}
+        if self.current_post is not None:
+            span['post'] = self.current_post
+        try:
+            yield span
+        except BaseException:
+            span['ok'] = False
+            raise
+        finally:
+            span['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            self.spans.append(span)
+    
+    def _checkpoint(self, name: str, data: Optional[Dict] = None):
+        """投稿処理のチェックポイントを記録する（記録できない場合は例外で処理を中断する）"""
+        if self.checkpoint_handler is not None:
+            self.checkpoint_handler(name, data)
+    
+    async def _run_step(self, step: str, action, count: int = 1):
+        """操作を実行し、ステップの待機条件が満たされるまで待つ
+        
+        待機時間は step_timings に記録する。
+        
+        Args:
+            step: ステップ名（sb.ready のキー）
+            action: 操作を行うコルーチン関数
+            count: レスポンスを待つ場合に待つレスポンスの数（複数ファイルのアップロードなど）
+        """
+        signal = self.ready_signals.get(step)
+        if not signal:
+            await action()
+            return
+        
+        timeout = signal.get('timeout')
+        if 'response' in signal:
+            # レスポンスは操作より前に待ち受けを開始する必要がある
+            pattern = re.compile(signal['response'])
+            method = signal.get('method')
+            
+            def matches(response) -> bool:
+                if method and response.request.method != method:
+                    return False
+                return pattern.search(response.url) is not None
+            
+            if count > 1:
+                started = await self._expect_responses(matches, count, timeout, action)
+            else:
+                async with self.page.expect_response(matches, timeout=timeout) as response_info:
+                    await action()
+                    started = time.perf_counter()
+                await response_info.value
+        else:
+            await action()
+            started = time.perf_counter()
+            if 'load_state' in signal:
+                await self.page.wait_for_load_state(signal['load_state'], timeout=timeout)
+            elif 'url' in signal:
+                await self.page.wait_for_url(re.compile(signal['url']), timeout=timeout)
+            else:
+                selector = signal.get('selector')
+                if selector is None:
+                    section, key = signal['element'].split('.', 1)
+                    selector = self._selector(section, key)
+                await self.page.wait_for_selector(selector, state=signal.get('state', 'visible'), timeout=timeout)
+        
+        waited_ms = (time.perf_counter() - started) * 1000
+        self.step_timings.append({'step': step, 'waited_ms': waited_ms})
+        current_app.logger.debug(f"サロンボード操作 {step}: 待機 {waited_ms:.0f} ms")
+    
+    async def _expect_responses(self, matches, count: int, timeout: Optional[float], action) -> float:
+        """操作を実行し、条件に一致するレスポンスを count 件受信するまで待つ
+        
+        Args:
+            matches: レスポンスが条件に一致するかを判定する関数
+            count: 待つレスポンスの数
+            timeout: 1件あたりのタイムアウト（ミリ秒、省略時は30秒）
+            action: 操作を行うコルーチン関数
+            
+        Returns:
+            float: 操作が完了した時刻（time.perf_counter）
+        """
+        received = asyncio.get_running_loop().create_future()
+        seen = 0
+        
+        def on_response(response):
+            nonlocal seen
+            if matches(response):
+                seen += 1
+                if seen >= count and not received.done():
+                    received.set_result(None)
+        
+        self.page.on('response', on_response)
+        try:
+            await action()
+            started = time.perf_counter()
+            await asyncio.wait_for(received, (timeout or 30000) * count / 1000)
+            return started
+        finally:
+            self.page.remove_listener('response', on_response)
     
-    def setup(self):
+    async def setup(self):
         """ブラウザとページのセットアップ"""
         try:
-            self.playwright = sync_playwright().start()
-            # macOSでの安定性向上のためのオプションを追加
-            self.browser = self.playwright.chromium.launch(
-                headless=False,
-                slow_mo=50,  # 操作間の遅延を追加して安定性を向上
-                args=[
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-gpu',
-                    '--disable-web-security'
-                ],
-                timeout=30000  # 30秒のタイムアウト
-            )
-            # コンテキストを作成
-            context = self.browser.new_context(viewport={"width": 1280, "height": 800})
-            self.page = context.new_page()
+            if self.leased_browser is not None:
+                # プールの起動済みブラウザを使用（ジョブごとに独立したコンテキストを作成）
+                self.browser = self.leased_browser
+            else:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(**self.profile['launch_options'])
+            # コンテキストを作成（キャッシュしたログイン状態があれば復元）
+            context_options = {'viewport': {"width": 1280, "height": 800}}
+            if self.session_cache is not None:
+                storage_state = self.session_cache.load(self.sb_id, self.sb_password)
+                record_cache('sb_session', bool(storage_state))
+                if storage_state:
+                    context_options['storage_state'] = storage_state
+                    self.restored_session = True
+            self.context = await self.browser.new_context(**context_options)
+            self.context.set_default_timeout(30000)
+            # 前回失敗・遅延したアカウントではトレースを記録する
+            if self.diagnostics is not None and self.diagnostics.should_trace(self.sb_id):
+                await self.context.tracing.start(screenshots=True, snapshots=True)
+                self.tracing = True
+            # 画像・フォントや解析系スクリプトなど投稿に不要な通信を遮断
+            if self.profile['blocked_resource_types'] or self.profile['blocked_domains']:
+                await self.context.route('**/*', build_request_filter(
+                    self.profile['blocked_resource_types'], self.profile['blocked_domains']))
+            self.page = await self.context.new_page()
         except Exception as e:
             current_app.logger.error(f"ブラウザセットアップエラー: {str(e)}")
-            self.teardown()
+            await self.teardown()
             raise
     
-    def teardown(self):
+    async def teardown(self):
         """ブラウザとページのクリーンアップ"""
         try:
-            if self.browser:
-                self.browser.close()
-                self.browser = None
+            if self.context:
+                if self.tracing:
+                    # finish() を経由せずに終了した場合、トレースは保存しない
+                    await self.context.tracing.stop()
+                    self.tracing = False
+                await self.context.close()
+                self.context = None
+            # プールから借りたブラウザは終了せずに返却する
+            if self.browser and self.leased_browser is None:
+                await self.browser.close()
+            self.browser = None
             if self.playwright:
-                self.playwright.stop()
+                await self.playwright.stop()
                 self.playwright = None
         except Exception as e:
             current_app.logger.error(f"ブラウザ終了エラー: {str(e)}")
     
-    def login(self) -> bool:
+    async def login(self) -> bool:
         """サロンボードにログインする
         
+        ログイン処理のエラー（画面の読み込みのタイムアウトなど）はサロンボードの障害として
+        サーキットブレーカーに記録する（IDとパスワードの誤りは記録しない）。
+        呼び出し元のタイムアウトによるキャンセルと制限時間の超過は記録しない。
+        
         Returns:
             bool: ログイン成功したかどうか
+        
+        Raises:
+            CircuitOpenError: サロンボードの障害が続いていて、ログインを停止している場合
         """
+        breaker = get_circuit_breaker(current_app._get_current_object(), 'sb_login')
+        if breaker is not None:
+            breaker.allow()
+        self.login_error = None
+        try:
+            async with self._span('login') as span:
+                span['ok'] = await self._login()
+        except DeadlineExceeded:
+            if breaker is not None:
+                breaker.record_neutral()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            # キャンセル（asyncio.CancelledError）など。half_open の試行枠だけを戻す
+            if breaker is not None:
+                breaker.record_neutral()
+            raise
+        if breaker is not None:
+            if self.login_error is not None:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return span['ok']
+    
+    async def _login(self) -> bool:
+        """ログイン処理の本体"""
         try:
+            # キャッシュしたログイン状態が有効であればログイン画面を経由しない
+            if self.restored_session:
+                await self.page.goto(self.top_url)
+                if self._is_logged_in_url(self.page.url):
+                    return True
+                current_app.logger.info("キャッシュしたログイン状態が無効なため再ログインします")
+                self.session_cache.invalidate(self.sb_id, self.sb_password)
+                await self.context.clear_cookies()
+                self.restored_session = False
+            
             # ログインページに移動
-            self.page.goto(self.login_url, timeout=30000)
+            await self.page.goto(self.login_url)
             
             # ID入力
-            id_selector = self.selectors.get('login', {}).get('id_selector', '#idPasswordInputForm > div > dl:nth-child(1) > dd > input')
-            self.page.fill(id_selector, self.sb_id)
+            id_selector = self._selector('login', 'id_input')
+            await self.page.fill(id_selector, self.sb_id)
             
             # パスワード入力
-            password_selector = self.selectors.get('login', {}).get('password_selector', '#jsiPwInput')
-            self.page.fill(password_selector, self.sb_password)
+            password_selector = self._selector('login', 'password_input')
+            await self.page.fill(password_selector, self.sb_password)
             
-            # ログインボタンクリック
-            login_button_selector = self.selectors.get('login', {}).get('login_button_selector', '#idPasswordInputForm > div > div > a')
-            self.page.click(login_button_selector)
-            
-            # ログイン成功の確認（ダッシュボードに遷移したか）
-            self.page.wait_for_load_state('networkidle', timeout=30000)
+            # ログインボタンクリック（ナビゲーションまたはエラーメッセージの表示を待つ）
+            await self._click('login', 'login_button')
             
             # URLがダッシュボードに変わったか、またはログイン成功要素があるか確認
-            current_url = self.page.url
-            if "dashboard" in current_url or "top" in current_url:
+            if self._is_logged_in_url(self.page.url):
+                await self._save_session()
                 return True
             
             # ログイン失敗の場合
             try:
-                error_message = self.page.inner_text('.error-message')
+                error_message = await self.page.inner_text('.error-message')
                 if error_message:
                     current_app.logger.error(f"ログインエラー: {error_message}")
             except Exception:
@@ -112,29 +462,46 @@ class SalonBoardAutomation:
         
         except Exception as e:
             current_app.logger.error(f"ログイン処理エラー: {str(e)}")
+            self.login_error = e
             return False
     
+    @staticmethod
+    def _is_logged_in_url(url: str) -> bool:
+        """ログイン後の画面のURLかどうかを判定する"""
+        if "/login" in url:
+            return False
+        return "dashboard" in url or "top" in url
+    
+    async def _save_session(self):
+        """ログイン状態をキャッシュに保存する"""
+        if self.session_cache is None:
+            return
+        try:
+            self.session_cache.save(self.sb_id, self.sb_password, await self.context.storage_state())
+        except Exception as e:
+            current_app.logger.error(f"ログイン状態の保存エラー: {str(e)}")
+    
     async def navigate_to_blog_post(self) -> bool:
         """ブログ投稿ページに移動する
         
         Returns:
             bool: 移動成功したかどうか
         """
+        async with self._span('navigate') as span:
+            span['ok'] = await self._navigate_to_blog_post()
+            return span['ok']
+    
+    async def _navigate_to_blog_post(self) -> bool:
+        """ブログ投稿ページへの移動処理の本体"""
         try:
             # 掲載管理ボタンをクリック
-            publication_button_selector = self.selectors.get('navigation', {}).get('publication_button_selector')
-            await self.page.click(publication_button_selector)
-            await self.page.wait_for_load_state('networkidle')
+            await self._click('navigation', 'publish_management')
             
-            # ブログ投稿ボタンをクリック
-            blog_post_button_selector = self.selectors.get('navigation', {}).get('blog_post_button_selector')
-            await self.page.click(blog_post_button_selector)
-            await self.page.wait_for_load_state('networkidle')
+            # ブログボタンをクリック
+            await self._click('navigation', 'blog_button')
             
-            # 新規投稿ボタンをクリック
-            new_post_button_selector = self.selectors.get('blog', {}).get('new_post_button_selector')
-            await self.page.click(new_post_button_selector)
-            await self.page.wait_for_load_state('networkidle')
+            # 新規投稿ボタンをクリック（投稿フォームの表示を待つ）
+            await self._click('navigation', 'new_post_button')
             
             return True
         
@@ -142,9 +509,97 @@ class SalonBoardAutomation:
             current_app.logger.error(f"ブログ投稿ページへの移動エラー: {str(e)}")
             return False
     
-    def post_blog(self, title: str, body: str, stylist: str, images: List[Dict], coupon: Optional[str] = None) -> bool:
+    async def recover(self) -> bool:
+        """投稿失敗後にページを復旧する
+        
+        同じコンテキスト（ログイン状態を保持）で新しいページを開き直してトップ画面に戻る。
+        セッションが切れていた場合は再ログインする。
+        
+        Returns:
+            bool: 復旧できたかどうか
+        """
+        async with self._span('recover') as span:
+            span['ok'] = await self._recover()
+            return span['ok']
+    
+    async def _recover(self) -> bool:
+        """ページ復旧処理の本体"""
+        try:
+            old_page, self.page = self.page, await self.context.new_page()
+            try:
+                await old_page.close()
+            except Exception:
+                pass
+            
+            await self.page.goto(self.top_url)
+            if self._is_logged_in_url(self.page.url):
+                return True
+            
+            current_app.logger.info("ページ復旧時にログイン状態が失われていたため再ログインします")
+            return await self.login()
+        
+        except Exception as e:
+            current_app.logger.error(f"ページ復旧エラー: {str(e)}")
+            return False
+    
+    async def _supports_multiple_upload(self) -> bool:
+        """画像のファイル選択が複数ファイルの選択に対応しているかどうか"""
+        try:
+            return bool(await self.page.eval_on_selector(
+                self._selector('blog_form', 'file_select'), 'element => element.multiple'))
+        except Exception:
+            return False
+    
+    async def _upload_images(self, paths: List[str], side_work):
+        """画像をアップロードして本文に挿入する
+        
+        ファイル選択が複数ファイルに対応している場合は全画像を1回で選択し、
+        対応していない場合は1枚ずつアップロードする。side_work（画像のモーダルに
+        依存しないフォーム入力）は最初のアップロードのレスポンス待ちと並行して実行する。
+        
+        Args:
+            paths: アップロードする画像のパス
+            side_work: 並行して実行するコルーチン
+        """
+        if not paths:
+            await side_work
+            return
+        
+        file_selector = self._selector('blog_form', 'file_select')
+        multiple = None
+        index = 0
+        try:
+            while index < len(paths):
+                async with self._span(f'upload_image[{index + 1}]') as span:
+                    # 画像アップロードモーダルを開く
+                    await self._click('blog_form', 'upload_button')
+                    if multiple is None:
+                        multiple = len(paths) > 1 and await self._supports_multiple_upload()
+                    group = paths[index:] if multiple else [paths[index]]
+                    if len(group) > 1:
+                        span['name'] = f'upload_images[{index + 1}-{index + len(group)}]'
+                    
+                    # ファイルを選択し、アップロード完了を待つ
+                    upload = self._run_step(
+                        'file_select', lambda: self.page.set_input_files(file_selector, group), count=len(group))
+                    if index == 0:
+                        await _gather(upload, side_work)
+                    else:
+                        await upload
+                    
+                    # 画像を本文に挿入
+                    await self._click('blog_form', 'image_upload_submit')
+                index += len(group)
+        finally:
+            # アップロードが先に失敗した場合、実行していないコルーチンを破棄する
+            side_work.close()
+    
+    async def post_blog(self, title: str, body: str, stylist: str, images: List[Dict], coupon: Optional[str] = None) -> bool:
         """ブログを投稿する
         
+        画像の縮小は本文の入力と並行してスレッドで行い、タイトルとスタイリストの入力は
+        画像アップロードのレスポンス待ちと並行して行う。
+        
         Args:
             title: ブログタイトル
             body: ブログ本文
@@ -156,71 +611,52 @@ class SalonBoardAutomation:
             bool: 投稿成功したかどうか
         """
         try:
-            # タイトル入力
-            title_selector = self.selectors.get('blog', {}).get('title_selector')
-            self.page.fill(title_selector, title)
-            
-            # スタイリスト選択
-            stylist_selector = self.selectors.get('blog', {}).get('stylist_selector')
-            self.page.select_option(stylist_selector, label=stylist)
-            
-            # 本文の処理（画像プレースホルダーを実際の画像に置き換え）
-            processed_body = body
-            
-            # 本文入力
-            body_selector = self.selectors.get('blog', {}).get('body_selector')
-            
-            # フレームがある場合はフレームに切り替え
-            frame_selector = self.selectors.get('blog', {}).get('body_frame_selector')
-            if frame_selector:
-                frame = self.page.frame_locator(frame_selector).first
-                frame.fill('body', processed_body)
-            else:
-                self.page.fill(body_selector, processed_body)
+            # 画像の縮小を開始
+            prepare = asyncio.ensure_future(prepare_images(images))
+            try:
+                # 本文入力（nicEditの編集領域、画像は本文に挿入されるため先に入力する）
+                async with self._span('fill_body'):
+                    await self.page.fill(self._selector('blog_form', 'nicEdit_area'), body)
+                paths = await prepare
+            finally:
+                if not prepare.done():
+                    prepare.cancel()
             
-            # 画像アップロード
-            for img_info in images:
-                # 画像アップロードボタンをクリック
-                image_upload_button_selector = self.selectors.get('blog', {}).get('image_upload_button_selector')
-                self.page.click(image_upload_button_selector)
+            async def fill_header():
+                # タイトル入力
+                async with self._span('fill_title'):
+                    await self.page.fill(self._selector('blog_form', 'title_input'), title)
                 
-                # ファイル選択ダイアログが表示されるのを待つ
-                file_input_selector = self.selectors.get('blog', {}).get('file_input_selector')
-                self.page.set_input_files(file_input_selector, img_info['path'])
-                
-                # アップロード完了を待つ
-                self.page.wait_for_load_state('networkidle')
-                
-                # 必要に応じて「挿入」ボタンをクリック
-                insert_button_selector = self.selectors.get('blog', {}).get('insert_image_button_selector')
-                if insert_button_selector:
-                    self.page.click(insert_button_selector)
+                # スタイリスト選択
+                async with self._span('select_stylist'):
+                    await self.page.select_option(self._selector('blog_form', 'stylist_select'), label=stylist)
+            
+            # 画像アップロード（タイトル・スタイリストの入力と並行）
+            await self._upload_images(paths, fill_header())
+            if paths:
+                self._checkpoint('images_uploaded')
             
             # クーポン選択（指定がある場合）
             if coupon:
-                coupon_selector = self.selectors.get('blog', {}).get('coupon_selector')
-                self.page.select_option(coupon_selector, label=coupon)
-            
-            # 公開設定
-            publish_option_selector = self.selectors.get('blog', {}).get('publish_option_selector')
-            self.page.click(publish_option_selector)
-            
-            # 投稿ボタンクリック
-            post_button_selector = self.selectors.get('blog', {}).get('post_button_selector')
-            self.page.click(post_button_selector)
+                async with self._span('select_coupon'):
+                    await self._click('blog_form', 'coupon_select_button')
+                    await self.page.click(f"text={json.dumps(coupon, ensure_ascii=False)}")
+                    await self._click('blog_form', 'coupon_setting_button')
             
-            # 確認ダイアログがある場合は「OK」をクリック
-            confirm_button_selector = self.selectors.get('blog', {}).get('confirm_button_selector')
-            if confirm_button_selector:
-                self.page.click(confirm_button_selector)
+            # 確認画面へ進む（ここから先は投稿済みの可能性がある）
+            self._checkpoint('submitted')
+            async with self._span('confirm'):
+                await self._click('blog_form', 'confirm_button')
             
-            # 投稿完了を待つ
-            self.page.wait_for_load_state('networkidle')
+            # 確認画面で登録ボタンがある場合はクリック
+            if self._selector('blog_form', 'register_button'):
+                async with self._span('register'):
+                    await self._click('blog_form', 'register_button')
             
             # 投稿成功の確認
-            success_message_selector = self.selectors.get('blog', {}).get('success_message_selector')
+            success_message_selector = self._selector('blog_form', 'success_message')
             if success_message_selector:
-                success_message = self.page.inner_text(success_message_selector)
+                success_message = await self.page.inner_text(success_message_selector)
                 if "完了" in success_message or "成功" in success_message:
                     return True
             
@@ -234,9 +670,247 @@ class SalonBoardAutomation:
         except Exception as e:
             current_app.logger.error(f"ブログ投稿処理エラー: {str(e)}")
             return False
+    
+    async def capture_failure(self, label: str):
+        """失敗した時点の画面のスクリーンショットを保持する（finish() で保存する）
+        
+        Args:
+            label: ファイル名に使用するラベル（post2 など）
+        """
+        if self.diagnostics is None or self.page is None:
+            return
+        try:
+            self._failure_screenshots.append((label, await self.page.screenshot(full_page=True)))
+        except Exception as e:
+            current_app.logger.error(f"スクリーンショットの取得エラー: {str(e)}")
+    
+    async def finish(self, success: bool, posts: int = 1) -> Dict:
+        """実行を終了し、スパンを集計する
+        
+        失敗した場合と所要時間が閾値を超えた場合は、スパン・スクリーンショット・
+        トレース（記録中の場合）を診断情報として保存する。
+        
+        Args:
+            success: 実行全体が成功したかどうか
+            posts: 実行した投稿数（遅延の判定に使用）
+            
+        Returns:
+            Dict: 実行レポート（duration_ms, spans, diagnostics_dir: 保存先またはNone）
+        """
+        duration_ms = round((time.perf_counter() - self.run_started) * 1000, 1)
+        report = {'duration_ms': duration_ms, 'spans': self.spans, 'diagnostics_dir': None}
+        
+        slowest = max(self.spans, key=lambda span: span['duration_ms'], default=None)
+        if slowest is not None:
+            current_app.logger.info(
+                f"サロンボード操作 所要 {duration_ms:.0f} ms（最長: {slowest['name']} {slowest['duration_ms']:.0f} ms）"
+            )
+        
+        if self.diagnostics is None:
+            return report
+        
+        needs_capture = not success or self.diagnostics.is_slow(duration_ms, posts)
+        self.diagnostics.record_outcome(self.sb_id, needs_capture)
+        if not needs_capture:
+            if self.tracing:
+                await self.context.tracing.stop()
+                self.tracing = False
+            return report
+        
+        try:
+            run_dir = self.diagnostics.new_run_dir(self.sb_id)
+            if not success:
+                await self.capture_failure('final')
+            for label, image in self._failure_screenshots:
+                with open(os.path.join(run_dir, f'{label}.png'), 'wb') as f:
+                    f.write(image)
+            if self.tracing:
+                await self.context.tracing.stop(path=os.path.join(run_dir, 'trace.zip'))
+                self.tracing = False
+            self.diagnostics.save_report(run_dir, {
+                'success': success,
+                'posts': posts,
+                'duration_ms': duration_ms,
+                'spans': self.spans,
+                'step_timings': self.step_timings
+            })
+            report['diagnostics_dir'] = run_dir
+            current_app.logger.warning(f"サロンボード操作の診断情報を保存しました: {run_dir}")
+        except Exception as e:
+            current_app.logger.error(f"診断情報の保存エラー: {str(e)}")
+        return report
 
-def post_to_sb(sb_id: str, sb_password: str, title: str, body: str, stylist: str, 
-                    images: List[Dict], coupon: Optional[str] = None) -> Dict:
+async def prepare_images(images: List[Dict]) -> List[str]:
+    """アップロードする画像を上限サイズ内に縮小する（スレッドで並列に実行する）
+    
+    Args:
+        images: 画像情報のリスト
+        
+    Returns:
+        List[str]: アップロードする画像のパス（縮小に失敗した画像は元のパス）
+    """
+    paths = [img_info['path'] for img_info in images]
+    # 長辺の上限が0の場合は縮小しない
+    max_edge = current_app.config.get('SB_UPLOAD_MAX_EDGE', 0)
+    upload_folder = current_app.config.get('UPLOAD_FOLDER')
+    if max_edge <= 0 or not upload_folder:
+        return paths
+    max_bytes = current_app.config.get('SB_UPLOAD_MAX_BYTES', 2 * 1024 * 1024)
+    quality = current_app.config.get('SB_UPLOAD_JPEG_QUALITY', 85)
+    cache_dir = os.path.join(upload_folder, SB_UPLOAD_DIRNAME)
+    
+    async def prepare(path: str) -> str:
+        try:
+            return await asyncio.to_thread(prepare_upload_image, path, max_edge, max_bytes, quality, cache_dir)
+        except Exception as e:
+            current_app.logger.warning(f"画像の縮小に失敗したため元の画像をアップロードします: {path}: {str(e)}")
+            return path
+    
+    return list(await asyncio.gather(*(prepare(path) for path in paths)))
+
+async def _gather(*aws):
+    """コルーチンを並行に実行する（いずれかが失敗した場合は残りをキャンセルする）"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def _use_http_engine() -> bool:
+    """投稿フォームの送信をHTTPで直接行うかどうか（SB_POST_ENGINE=http）"""
+    return current_app.config.get('SB_POST_ENGINE', 'browser') == 'http'
+
+def _http_poster(cookies: List[Dict], user_agent: Optional[str] = None) -> SalonBoardHttpPoster:
+    """アプリケーションの設定で SalonBoardHttpPoster を作成する"""
+    app = current_app._get_current_object()
+    return SalonBoardHttpPoster(
+        app.config.get('SB_BASE_URL', 'https://salonboard.com'),
+        cookies,
+        app.config.get('SELECTORS', {}).get('sb', {}),
+        adapter=get_http_adapter(app),
+        user_agent=user_agent,
+        timeout=app.config.get('SB_HTTP_TIMEOUT', 30)
+    )
+
+async def _send_http(poster: SalonBoardHttpPoster, post: Dict, checkpoint_handler=None) -> Dict:
+    """HTTPで直接投稿する（フォームの構造が想定と異なる場合は FormChangedError）
+    
+    前回の試行でアップロード済みの画像（post['resume'] の image_urls）は再アップロードしない。
+    """
+    paths = await prepare_images(post['images'])
+    success = await asyncio.to_thread(
+        poster.post, post['title'], post['body'], post['stylist'], paths, post.get('coupon'),
+        uploaded_urls=post.get('resume', {}).get('image_urls'), on_checkpoint=checkpoint_handler
+    )
+    if not success:
+        return {
+            'success': False,
+            'message': 'ブログの投稿に失敗しました。'
+        }
+    return {
+        'success': True,
+        'message': 'ブログが正常に投稿されました。'
+    }
+
+async def _post_one_http(automation: SalonBoardAutomation, post: Dict) -> Optional[Dict]:
+    """ブラウザでログインしたセッションのCookieを使い、1件のブログをHTTPで直接投稿する
+    
+    Returns:
+        Optional[Dict]: 投稿結果（フォームの構造が想定と異なる場合はNone）
+    """
+    async with automation._span('http_post') as span:
+        try:
+            cookies = await automation.context.cookies()
+            user_agent = await automation.page.evaluate('navigator.userAgent')
+            result = await _send_http(_http_poster(cookies, user_agent), post, automation.checkpoint_handler)
+        except FormChangedError as e:
+            span['ok'] = False
+            current_app.logger.warning(f"HTTPで投稿できないためブラウザで投稿します: {str(e)}")
+            return None
+        span['ok'] = result['success']
+        return result
+
+async def _post_with_cached_session(sb_id: str, sb_password: str, post: Dict, checkpoint=None) -> Optional[Dict]:
+    """キャッシュしたログイン状態のCookieで、ブラウザを起動せずにHTTPで直接投稿する
+    
+    Returns:
+        Optional[Dict]: 投稿結果（ログイン状態のキャッシュがない・無効な場合や、
+            フォームの構造が想定と異なる場合はNone）
+    """
+    session_cache = get_session_cache(current_app._get_current_object())
+    if session_cache is None:
+        return None
+    storage_state = session_cache.load(sb_id, sb_password)
+    record_cache('sb_session', bool(storage_state))
+    if not storage_state:
+        return None
+    
+    started = time.perf_counter()
+    try:
+        result = await _send_http(_http_poster(storage_state.get('cookies', [])), post, checkpoint)
+    except LoginRequiredError:
+        current_app.logger.info("キャッシュしたログイン状態が無効なためブラウザでログインします")
+        session_cache.invalidate(sb_id, sb_password)
+        return None
+    except FormChangedError as e:
+        current_app.logger.warning(f"HTTPで投稿できないためブラウザで投稿します: {str(e)}")
+        return None
+    
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    result.update({
+        'duration_ms': duration_ms,
+        'spans': [{'name': 'http_post', 'start_ms': 0.0, 'ok': result['success'], 'duration_ms': duration_ms}],
+        'diagnostics_dir': None
+    })
+    return result
+
+async def _post_one(automation: SalonBoardAutomation, post: Dict) -> Dict:
+    """ログイン済みの状態で1件のブログを投稿する
+    
+    SB_POST_ENGINE=http の場合はHTTPでの直接送信を試み、フォームの構造が
+    想定と異なる場合はブラウザでの投稿に切り替える。
+    
+    Args:
+        automation: ログイン済みの SalonBoardAutomation
+        post: 投稿内容（title, body, stylist, images, coupon）
+        
+    Returns:
+        Dict: 投稿結果
+    """
+    if _use_http_engine():
+        result = await _post_one_http(automation, post)
+        if result is not None:
+            return result
+    
+    # ブログ投稿ページに移動
+    navigation_success = await automation.navigate_to_blog_post()
+    if not navigation_success:
+        return {
+            'success': False,
+            'message': 'ブログ投稿ページへの移動に失敗しました。'
+        }
+    
+    # ブログ投稿
+    post_success = await automation.post_blog(
+        post['title'], post['body'], post['stylist'], post['images'], post.get('coupon')
+    )
+    if not post_success:
+        return {
+            'success': False,
+            'message': 'ブログの投稿に失敗しました。'
+        }
+    
+    return {
+        'success': True,
+        'message': 'ブログが正常に投稿されました。'
+    }
+
+async def post_to_sb(sb_id: str, sb_password: str, title: str, body: str, stylist: str, 
+                     images: List[Dict], coupon: Optional[str] = None, browser=None,
+                     checkpoint=None, resume: Optional[Dict] = None) -> Dict:
     """サロンボードにブログを投稿する
     
     Args:
@@ -247,44 +921,315 @@ def post_to_sb(sb_id: str, sb_password: str, title: str, body: str, stylist: str
         stylist: 投稿スタイリスト
         images: 画像情報のリスト
         coupon: クーポン（任意）
+        browser: ブラウザプールから貸し出されたブラウザ（省略時は自前で起動）
+        checkpoint: チェックポイント名とデータを受け取る関数（投稿キューへの記録用）
+        resume: 前回の試行のチェックポイントのデータ（アップロード済みの画像など）
         
     Returns:
-        Dict: 投稿結果
+        Dict: 投稿結果（duration_ms, spans: 操作ごとの所要時間, diagnostics_dir: 診断情報の保存先を含む）
     """
+    post = {'title': title, 'body': body, 'stylist': stylist, 'images': images, 'coupon': coupon,
+            'resume': resume or {}}
+    if _use_http_engine():
+        # キャッシュしたログイン状態があればブラウザを起動せずに投稿する
+        try:
+            result = await _post_with_cached_session(sb_id, sb_password, post, checkpoint)
+        except Exception as e:
+            current_app.logger.error(f"サロンボード投稿エラー: {str(e)}")
+            return {
+                'success': False,
+                'message': f'エラーが発生しました: {str(e)}'
+            }
+        if result is not None:
+            return result
+    
     try:
-        with SalonBoardAutomation(sb_id, sb_password) as automation:
+        async with SalonBoardAutomation(sb_id, sb_password, browser=browser) as automation:
             # ログイン
-            login_success = automation.login()
+            login_success = await automation.login()
             if not login_success:
-                return {
+                result = {
                     'success': False,
                     'message': 'ログインに失敗しました。IDとパスワードを確認してください。'
                 }
-            
-            # ブログ投稿ページに移動
-            navigation_success = automation.navigate_to_blog_post()
-            if not navigation_success:
-                return {
+            else:
+                if checkpoint is not None:
+                    checkpoint('logged_in', None)
+                    automation.checkpoint_handler = checkpoint
+                result = await _post_one(automation, post)
+                if result['success']:
+                    result['step_timings'] = automation.step_timings
+            result.update(await automation.finish(result['success']))
+            return result
+    
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"サロンボードへの投稿を停止中です: {str(e)}")
+        return {
+            'success': False,
+            'message': str(e)
+        }
+    
+    except Exception as e:
+        current_app.logger.error(f"サロンボード投稿エラー: {str(e)}")
+        return {
+            'success': False,
+            'message': f'エラーが発生しました: {str(e)}'
+        }
+
+async def post_batch_to_sb(sb_id: str, sb_password: str, posts: List[Dict], browser=None, checkpoint=None) -> Dict:
+    """1回のログインで複数のブログをサロンボードに投稿する
+    
+    投稿に失敗した場合はページを復旧して次の投稿に進む。
+    復旧できない場合、残りの投稿は行わない。
+    
+    Args:
+        sb_id: サロンボードID
+        sb_password: サロンボードパスワード
+        posts: 投稿内容（title, body, stylist, images, coupon, 再開時は resume）のリスト
+        browser: ブラウザプールから貸し出されたブラウザ（省略時は自前で起動）
+        checkpoint: 投稿の番号（0から）、チェックポイント名、データを受け取る関数（投稿キューへの記録用）
+        
+    Returns:
+        Dict: 投稿結果（success, message, results: 投稿ごとの結果のリスト、duration_ms, spans, diagnostics_dir）
+    """
+    results = []
+    report = {}
+    skipped_message = '前の投稿の失敗から復旧できなかったため、投稿を行いませんでした。'
+    try:
+        async with SalonBoardAutomation(sb_id, sb_password, browser=browser) as automation:
+            # ログイン（バッチ全体で1回）
+            login_success = await automation.login()
+            if not login_success:
+                result = {
                     'success': False,
-                    'message': 'ブログ投稿ページへの移動に失敗しました。'
+                    'message': 'ログインに失敗しました。IDとパスワードを確認してください。',
+                    'results': []
                 }
+                result.update(await automation.finish(False))
+                return result
             
-            # ブログ投稿
-            post_success = automation.post_blog(title, body, stylist, images, coupon)
-            if not post_success:
-                return {
-                    'success': False,
-                    'message': 'ブログの投稿に失敗しました。'
-                }
+            for index, post in enumerate(posts):
+                automation.current_post = index + 1
+                if checkpoint is not None:
+                    checkpoint(index, 'logged_in', None)
+                    automation.checkpoint_handler = lambda name, data, index=index: checkpoint(index, name, data)
+                try:
+                    result = await _post_one(automation, post)
+                except Exception as e:
+                    current_app.logger.error(f"バッチ投稿エラー（{index + 1}件目）: {str(e)}")
+                    result = {'success': False, 'message': f'エラーが発生しました: {str(e)}'}
+                results.append(result)
+                
+                # 失敗した場合は次の投稿に備えてページを復旧する
+                if not result['success']:
+                    await automation.capture_failure(f'post{index + 1}')
+                    if index < len(posts) - 1 and not await automation.recover():
+                        break
+            automation.current_post = None
             
-            return {
-                'success': True,
-                'message': 'ブログが正常に投稿されました。'
-            }
+            report = await automation.finish(
+                len(results) == len(posts) and all(result['success'] for result in results),
+                posts=len(results)
+            )
+    
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"サロンボードへの投稿を停止中です: {str(e)}")
+        skipped_message = str(e)
+    
+    except Exception as e:
+        current_app.logger.error(f"サロンボードバッチ投稿エラー: {str(e)}")
+    
+    # 復旧失敗などで投稿しなかった分
+    for _ in range(len(posts) - len(results)):
+        results.append({
+            'success': False,
+            'message': skipped_message
+        })
+    
+    succeeded = sum(1 for result in results if result['success'])
+    batch_result = {
+        'success': succeeded == len(posts),
+        'message': f'{len(posts)}件中{succeeded}件のブログを投稿しました。',
+        'results': results
+    }
+    batch_result.update(report)
+    return batch_result
+
+def _submit_to_engine(account: str, make_job):
+    """自動操作エンジンに投稿ジョブを投入する（結果を待たない）
+    
+    ジョブはスケジューラを経由して実行されるため、同じアカウントのジョブは順に、
+    異なるアカウントのジョブは同時実行数の上限まで並行に実行される。
+    
+    Args:
+        account: アカウントの識別子（サロンボードID）
+        make_job: ブラウザ（またはNone）を受け取り、投稿処理のコルーチンを返す関数
+        
+    Returns:
+        concurrent.futures.Future: 投稿結果
+    """
+    from .automation_engine import get_automation_engine
+    
+    app = current_app._get_current_object()
+    engine = get_automation_engine(app)
+    
+    async def job():
+        # エンジンのループ上ではアプリケーションコンテキストを改めて設定する
+        with app.app_context():
+            return await engine.run_post_job(account, make_job)
+    
+    return engine.submit(job())
+
+def _wait_for_result(future, timeout: float) -> Dict:
+    """投入したジョブの結果を待つ（タイムアウトした場合はジョブをキャンセルする）"""
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+def submit_post_to_sb(sb_id: str, sb_password: str, title: str, body: str, stylist: str,
+                      images: List[Dict], coupon: Optional[str] = None, checkpoint=None,
+                      resume: Optional[Dict] = None):
+    """post_to_sb を自動操作エンジンに投入し、結果のFutureを返す
+    
+    複数アカウントへの投稿をまとめて投入すると、アカウントごとに並行して実行される。
+    
+    Returns:
+        concurrent.futures.Future: 投稿結果
+    """
+    return _submit_to_engine(
+        sb_id,
+        lambda browser: post_to_sb(sb_id, sb_password, title, body, stylist, images, coupon, browser=browser,
+                                   checkpoint=checkpoint, resume=resume)
+    )
+
+def submit_post_batch_to_sb(sb_id: str, sb_password: str, posts: List[Dict], checkpoint=None):
+    """post_batch_to_sb を自動操作エンジンに投入し、結果のFutureを返す
+    
+    Returns:
+        concurrent.futures.Future: 投稿結果
+    """
+    return _submit_to_engine(
+        sb_id,
+        lambda browser: post_batch_to_sb(sb_id, sb_password, posts, browser=browser, checkpoint=checkpoint)
+    )
+
+def post_to_sb_sync(sb_id: str, sb_password: str, title: str, body: str, stylist: str,
+                    images: List[Dict], coupon: Optional[str] = None) -> Dict:
+    """post_to_sb の同期呼び出し用ファサード
+    
+    自動操作エンジンのイベントループで投稿処理を実行し、結果を待つ。
+    ブラウザプールが有効な場合は、プールの起動済みブラウザを使用する。
+    投稿キューが有効な場合は、投稿済みの内容を再投稿せず、中断した投稿はチェックポイントから再開する。
     
+    Args:
+        sb_id: サロンボードID
+        sb_password: サロンボードパスワード
+        title: ブログタイトル
+        body: ブログ本文
+        stylist: 投稿スタイリスト
+        images: 画像情報のリスト
+        coupon: クーポン（任意）
+        
+    Returns:
+        Dict: 投稿結果
+    """
+    from .post_queue import claim_result, get_post_queue
+
+    timeout = current_app.config.get('SB_BROWSER_POOL_TIMEOUT', 300)
+    queue = get_post_queue(current_app)
+    claim = None
+    try:
+        checkpoint = resume = None
+        if queue is not None:
+            post = {'title': title, 'body': body, 'stylist': stylist, 'images': images, 'coupon': coupon}
+            claim = queue.claim(sb_id, post, lease_seconds=timeout)
+            if claim['action'] != 'run':
+                return claim_result(claim)
+            checkpoint = lambda name, data, job_id=claim['id']: queue.checkpoint(job_id, name, data)
+            resume = claim['checkpoint_data']
+
+        future = submit_post_to_sb(sb_id, sb_password, title, body, stylist, images, coupon,
+                                   checkpoint=checkpoint, resume=resume)
+        result = _wait_for_result(future, timeout)
     except Exception as e:
         current_app.logger.error(f"サロンボード投稿エラー: {str(e)}")
+        result = {
+            'success': False,
+            'message': f'エラーが発生しました: {str(e) or type(e).__name__}'
+        }
+    if claim is not None:
+        queue.complete(claim['id'], result)
+    return result
+
+def post_batch_to_sb_sync(sb_id: str, sb_password: str, posts: List[Dict]) -> Dict:
+    """post_batch_to_sb の同期呼び出し用ファサード
+    
+    投稿キューが有効な場合は、投稿済み・処理中の内容を除いて投稿し、結果を元の順序に戻す。
+    
+    Args:
+        sb_id: サロンボードID
+        sb_password: サロンボードパスワード
+        posts: 投稿内容（title, body, stylist, images, coupon）のリスト
+        
+    Returns:
+        Dict: 投稿結果（success, message, results）
+    """
+    from .post_queue import claim_result, get_post_queue
+
+    timeout = current_app.config.get('SB_BROWSER_POOL_TIMEOUT', 300) * max(len(posts), 1)
+    queue = get_post_queue(current_app)
+    results: List[Optional[Dict]] = [None] * len(posts)
+    claims = []
+    try:
+        pending = list(range(len(posts)))
+        checkpoint = None
+        if queue is not None:
+            pending = []
+            for index, post in enumerate(posts):
+                claim = queue.claim(sb_id, post, lease_seconds=timeout)
+                if claim['action'] == 'run':
+                    pending.append(index)
+                    claims.append(claim)
+                else:
+                    results[index] = claim_result(claim)
+            checkpoint = lambda index, name, data: queue.checkpoint(claims[index]['id'], name, data)
+
+        report = {}
+        if pending:
+            batch = [
+                dict(posts[index], resume=claims[n]['checkpoint_data']) if queue is not None else posts[index]
+                for n, index in enumerate(pending)
+            ]
+            future = submit_post_batch_to_sb(sb_id, sb_password, batch, checkpoint=checkpoint)
+            report = _wait_for_result(future, timeout)
+            for index, result in zip(pending, report.get('results', [])):
+                results[index] = result
+    except Exception as e:
+        current_app.logger.error(f"サロンボードバッチ投稿エラー: {str(e)}")
+        message = f'エラーが発生しました: {str(e) or type(e).__name__}'
+        for claim in claims:
+            queue.complete(claim['id'], {'success': False, 'message': message})
         return {
             'success': False,
-            'message': f'エラーが発生しました: {str(e)}'
+            'message': message,
+            'results': []
         }
+
+    for n, claim in enumerate(claims):
+        queue.complete(claim['id'], results[pending[n]] or {'success': False, 'message': None})
+    if queue is None:
+        return report
+
+    results = [
+        result or {'success': False, 'message': '投稿処理が完了しませんでした。'} for result in results
+    ]
+    succeeded = sum(1 for result in results if result['success'])
+    batch_result = dict(report)
+    batch_result.update({
+        'success': succeeded == len(posts),
+        'message': f'{len(posts)}件中{succeeded}件のブログを投稿しました。',
+        'results': results
+    })
+    return batch_result
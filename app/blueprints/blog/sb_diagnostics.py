@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Dict, Optional
+
+DIAGNOSTICS_MODES = ('off', 'auto', 'always')
+
+class RunDiagnostics:
+    """サロンボード自動投稿の診断情報（スパン、スクリーンショット、トレース）の保存先
+
+    失敗した実行と所要時間が閾値を超えた実行についてのみ、実行ごとのディレクトリに
+    スパン（spans.json）、スクリーンショット、Playwrightのトレースを保存する。
+    トレースは記録自体に負荷がかかるため、auto モードでは失敗・遅延が発生した
+    アカウントの次回の実行でのみ記録する（always モードでは毎回記録する）。
+    """
+
+    def __init__(self, directory: str, slow_seconds: float, mode: str = 'auto', keep: int = 50):
+        """初期化
+
+        Args:
+            directory: 診断情報の保存先ディレクトリ
+            slow_seconds: 1投稿あたりの所要時間の閾値（秒、これを超えると保存する）
+            mode: auto（失敗・遅延の次回にトレースを記録）または always（毎回トレースを記録）
+            keep: 保持する実行の数（古いものから削除する）
+        """
+        self.directory = directory
+        self.slow_seconds = slow_seconds
+        self.mode = mode
+        self.keep = keep
+        self._armed = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def account_key(sb_id: str) -> str:
+        """ファイル名に使用するアカウントの識別子（IDそのものは保存しない）"""
+        return hashlib.sha256(sb_id.encode('utf-8')).hexdigest()[:12]
+
+    def should_trace(self, sb_id: str) -> bool:
+        """この実行でトレースを記録するかどうか"""
+        if self.mode == 'always':
+            return True
+        with self._lock:
+            return self.account_key(sb_id) in self._armed
+
+    def is_slow(self, duration_ms: float, posts: int = 1) -> bool:
+        """所要時間が閾値（投稿数あたり）を超えているかどうか"""
+        return self.slow_seconds > 0 and duration_ms > self.slow_seconds * 1000 * max(posts, 1)
+
+    def record_outcome(self, sb_id: str, needs_capture: bool):
+        """実行結果に応じて次回のトレース記録を切り替える"""
+        key = self.account_key(sb_id)
+        with self._lock:
+            if needs_capture:
+                self._armed.add(key)
+            else:
+                self._armed.discard(key)
+
+    def new_run_dir(self, sb_id: str) -> str:
+        """実行ごとの保存先ディレクトリを作成する"""
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        name = f"{stamp}{int(now * 1000) % 1000:03d}-{self.account_key(sb_id)}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        return path
+
+    def save_report(self, run_dir: str, report: Dict):
+        """実行のスパンと結果を spans.json に保存し、古い実行を削除する"""
+        with open(os.path.join(run_dir, 'spans.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.prune()
+
+    def prune(self):
+        """保持数を超えた古い実行のディレクトリを削除する"""
+        try:
+            runs = sorted(
+                entry.path for entry in os.scandir(self.directory) if entry.is_dir()
+            )
+        except FileNotFoundError:
+            return
+        for path in runs[:max(len(runs) - self.keep, 0)]:
+            shutil.rmtree(path, ignore_errors=True)
+
+def get_run_diagnostics(app) -> Optional[RunDiagnostics]:
+    """アプリケーションの診断情報の保存先を取得する（無効な場合はNone）
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        Optional[RunDiagnostics]: 診断情報の保存先
+    """
+    mode = app.config.get('SB_DIAGNOSTICS_MODE', 'off')
+    if mode not in DIAGNOSTICS_MODES or mode == 'off':
+        return None
+
+    diagnostics = app.extensions.get('sb_run_diagnostics')
+    if diagnostics is None:
+        directory = app.config.get('SB_DIAGNOSTICS_DIR') or os.path.join(app.instance_path, 'sb_diagnostics')
+        diagnostics = RunDiagnostics(
+            directory,
+            app.config.get('SB_SLOW_RUN_SECONDS', 60),
+            mode=mode,
+            keep=app.config.get('SB_DIAGNOSTICS_KEEP', 50)
+        )
+        app.extensions['sb_run_diagnostics'] = diagnostics
+    return diagnostics
@@ -0,0 +1,277 @@
+import os
+import re
+import html
+import mimetypes
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+# 本文中の画像の挿入位置（[IMAGE_1] が1枚目の画像）
+IMAGE_PLACEHOLDER_PATTERN = re.compile(r'\[IMAGE_(\d+)\]')
+
+# 直接送信で使用する投稿フォームの設定（selectors.json の sb.http で上書きする）
+# 項目名・パスは実際のサロンボードで確認できていない想定値のため、SB_POST_ENGINE=http は明示的に有効にした場合のみ使用する
+# edit_path: 投稿フォームのパス、form: フォームのセレクタ
+# body_field / coupon_field: 本文・クーポンを送信する項目名（ブラウザではスクリプトが設定する項目）
+# upload_path / upload_field / upload_url_key: 画像アップロードのパス、ファイルの項目名、応答JSONの画像URLのキー
+# csrf_field: 画像アップロードにも付与するフォームのトークンの項目名
+# register_form: 確認画面の登録フォームのセレクタ、success_url: 投稿完了後のURLに含まれる文字列
+# success_selector: 投稿完了のメッセージのセレクタ（省略時は sb.blog_form.success_message、ブラウザと同じ判定）
+DEFAULT_HTTP_SETTINGS = {
+    'edit_path': '/CNB/blog/edit/',
+    'form': '#blogForm',
+    'body_field': 'blogContents',
+    'coupon_field': 'couponName',
+    'upload_path': '/CNB/blog/imgUpload/',
+    'upload_field': 'file',
+    'upload_url_key': 'url',
+    'csrf_field': None,
+    'register_form': None,
+    'success_url': 'blog/list',
+    'success_selector': None
+}
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+class FormChangedError(Exception):
+    """投稿フォームの構造が想定と異なる（ブラウザでの投稿に切り替える）"""
+
+class LoginRequiredError(FormChangedError):
+    """ログイン状態が無効で、投稿フォームを取得できない"""
+
+class SalonBoardHttpPoster:
+    """ブラウザでログインしたセッションのCookieを使い、ブログ投稿をHTTPリクエストで直接送信する
+
+    投稿フォームをHTMLとして取得し、hidden項目（CSRFトークンを含む）をそのまま引き継いで
+    画像アップロードとフォーム送信を行う。フォームの取得から画像アップロードまでの間に
+    想定と異なる構造を検出した場合や通信エラー（タイムアウト・接続エラー）の場合は
+    FormChangedError を送出する（まだ投稿していないため、呼び出し側はブラウザでの投稿に
+    切り替えられる）。フォーム送信後の失敗は二重投稿を避けるため False を返す。
+    """
+
+    def __init__(self, base_url: str, cookies: List[Dict], selectors: Dict,
+                 adapter: Optional[HTTPAdapter] = None, user_agent: Optional[str] = None, timeout: float = 30):
+        """初期化
+
+        Args:
+            base_url: サロンボードのURL
+            cookies: Playwrightの形式のCookie（context.cookies() または storage state の cookies）
+            selectors: selectors.json の sb セクション
+            adapter: 接続を共有するHTTPアダプタ（省略時はセッションごとに作成）
+            user_agent: User-Agent（ログインしたブラウザと揃える）
+            timeout: リクエストのタイムアウト（秒）
+        """
+        self.base_url = base_url.rstrip('/')
+        self.selectors = selectors
+        self.settings = dict(DEFAULT_HTTP_SETTINGS, **selectors.get('http', {}))
+        self.timeout = timeout
+        self.session = requests.Session()
+        if adapter is not None:
+            # セッションは閉じない（close() すると共有のアダプタの接続も閉じられるため）
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = user_agent or DEFAULT_USER_AGENT
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                secure=cookie.get('secure', False)
+            )
+
+    def _url(self, path: str) -> str:
+        return urljoin(self.base_url + '/', path.lstrip('/'))
+
+    def _field_name(self, form, section: str, key: str) -> str:
+        """selectors.json のセレクタに一致するフォーム項目の name 属性を取得する"""
+        selector = self.selectors.get(section, {}).get(key)
+        element = form.select_one(selector) if selector else None
+        if element is None or not element.get('name'):
+            raise FormChangedError(f'投稿フォームに {section}.{key} の項目がありません')
+        return element['name']
+
+    @staticmethod
+    def _form_fields(form) -> Dict[str, str]:
+        """フォームの初期値（hidden項目を含む）を取得する"""
+        fields = {}
+        for element in form.select('input[name], select[name], textarea[name]'):
+            name = element['name']
+            if element.name == 'select':
+                option = element.select_one('option[selected]') or element.select_one('option')
+                fields[name] = option.get('value', option.get_text(strip=True)) if option else ''
+            elif element.name == 'textarea':
+                fields[name] = element.get_text()
+            elif element.get('type') in ('checkbox', 'radio'):
+                if element.has_attr('checked'):
+                    fields[name] = element.get('value', 'on')
+            elif element.get('type') not in ('file', 'submit', 'button', 'image'):
+                fields[name] = element.get('value', '')
+        return fields
+
+    def _load_form(self):
+        """投稿フォームを取得する
+
+        Returns:
+            tuple: (フォームの送信先URL, フォームの要素)
+        """
+        try:
+            response = self.session.get(self._url(self.settings['edit_path']), timeout=self.timeout)
+        except requests.RequestException as e:
+            # まだ投稿していないため、ブラウザでの投稿に切り替えられる
+            raise FormChangedError(f'投稿フォームを取得できません: {e}') from e
+        if '/login' in response.url:
+            raise LoginRequiredError('ログイン状態が無効です')
+        if response.status_code != 200:
+            raise FormChangedError(f'投稿フォームを取得できません（HTTP {response.status_code}）')
+        form = BeautifulSoup(response.text, 'html.parser').select_one(self.settings['form'])
+        if form is None:
+            raise FormChangedError('投稿フォームが見つかりません')
+        return urljoin(response.url, form.get('action') or response.url), form
+
+    def _upload(self, path: str, csrf: Optional[Dict[str, str]]) -> str:
+        """画像をアップロードし、本文に挿入する画像のURLを返す"""
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        with open(path, 'rb') as f:
+            try:
+                response = self.session.post(
+                    self._url(self.settings['upload_path']),
+                    data=csrf or {},
+                    files={self.settings['upload_field']: (os.path.basename(path), f, content_type)},
+                    timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                raise FormChangedError(f'画像をアップロードできません: {e}') from e
+        try:
+            url = response.json()[self.settings['upload_url_key']]
+        except (ValueError, KeyError, TypeError):
+            raise FormChangedError(f'画像アップロードの応答が想定と異なります（HTTP {response.status_code}）')
+        return urljoin(response.url, url)
+
+    @staticmethod
+    def _body_html(body: str, image_urls: List[str]) -> str:
+        """本文と画像をエディタと同じHTMLにする
+
+        [IMAGE_N] のプレースホルダーをN枚目の画像に置き換え、プレースホルダーのない画像は
+        本文の末尾に追加する（画像のないプレースホルダーは削除する）。
+        """
+        content = html.escape(body).replace('\n', '<br>')
+        tags = [f'<img src="{html.escape(url)}">' for url in image_urls]
+        placed = set()
+
+        def replace(match):
+            index = int(match.group(1)) - 1
+            if 0 <= index < len(tags) and index not in placed:
+                placed.add(index)
+                return tags[index]
+            return ''
+
+        content = IMAGE_PLACEHOLDER_PATTERN.sub(replace, content)
+        return content + ''.join(tag for index, tag in enumerate(tags) if index not in placed)
+
+    def _is_success(self, response) -> bool:
+        """投稿完了後のURL（リダイレクト先）または完了のメッセージの要素で投稿の成功を判定する"""
+        if self.settings['success_url'] in response.url:
+            return True
+        selector = self.settings['success_selector'] or self.selectors.get('blog_form', {}).get('success_message')
+        if not selector:
+            return False
+        element = BeautifulSoup(response.text, 'html.parser').select_one(selector)
+        if element is None:
+            return False
+        message = element.get_text()
+        return '完了' in message or '成功' in message
+
+    def post(self, title: str, body: str, stylist: str, image_paths: List[str], coupon: Optional[str] = None,
+             uploaded_urls: Optional[List[str]] = None, on_checkpoint=None) -> bool:
+        """ブログを投稿する
+
+        Args:
+            title: ブログタイトル
+            body: ブログ本文
+            stylist: 投稿スタイリスト
+            image_paths: アップロードする画像のパス
+            coupon: クーポン（任意）
+            uploaded_urls: 前回の試行でアップロード済みの画像のURL（指定時はアップロードしない）
+            on_checkpoint: チェックポイント（logged_in, images_uploaded, submitted）ごとに呼び出す関数
+                （logged_in は投稿フォームを取得でき、Cookieのログイン状態が有効と確認できた時点）
+
+        Returns:
+            bool: 投稿成功したかどうか
+
+        Raises:
+            FormChangedError: フォーム送信前に想定と異なる構造を検出した場合、通信エラーが発生した場合
+        """
+        action, form = self._load_form()
+        if on_checkpoint is not None:
+            # キャッシュしたログイン状態で投稿する場合は、ここで初めてログイン済みと確認できる
+            on_checkpoint('logged_in', None)
+        fields = self._form_fields(form)
+
+        # selectors.json のセレクタから項目名を特定する
+        title_field = self._field_name(form, 'blog_form', 'title_input')
+        stylist_field = self._field_name(form, 'blog_form', 'stylist_select')
+        stylist_select = form.select_one(self.selectors['blog_form']['stylist_select'])
+        stylist_values = {
+            option.get_text(strip=True): option.get('value', '') for option in stylist_select.select('option')
+        }
+        if stylist not in stylist_values:
+            raise FormChangedError(f'スタイリストの選択肢がありません: {stylist}')
+        body_field = self.settings['body_field']
+        if body_field not in fields:
+            raise FormChangedError(f'投稿フォームに本文の項目（{body_field}）がありません')
+        coupon_field = self.settings['coupon_field']
+        if coupon and coupon_field not in fields:
+            raise FormChangedError(f'投稿フォームにクーポンの項目（{coupon_field}）がありません')
+
+        csrf_field = self.settings['csrf_field']
+        csrf = {csrf_field: fields[csrf_field]} if csrf_field and csrf_field in fields else None
+        if csrf_field and csrf is None:
+            raise FormChangedError(f'投稿フォームにトークン（{csrf_field}）がありません')
+        if uploaded_urls is not None and len(uploaded_urls) == len(image_paths):
+            image_urls = list(uploaded_urls)
+        else:
+            image_urls = [self._upload(path, csrf) for path in image_paths]
+            if on_checkpoint is not None and image_urls:
+                on_checkpoint('images_uploaded', {'image_urls': image_urls})
+
+        fields[title_field] = title
+        fields[stylist_field] = stylist_values[stylist]
+        fields[body_field] = self._body_html(body, image_urls)
+        if coupon:
+            fields[coupon_field] = coupon
+
+        # ここから先は投稿済みの可能性があるため、失敗してもブラウザでの再投稿は行わない
+        if on_checkpoint is not None:
+            on_checkpoint('submitted', None)
+        response = self.session.post(action, data=fields, timeout=self.timeout)
+        if self._is_success(response):
+            return True
+
+        register_selector = self.settings['register_form']
+        register_form = BeautifulSoup(response.text, 'html.parser').select_one(register_selector) \
+            if register_selector else None
+        if register_form is None:
+            return False
+        register_action = urljoin(response.url, register_form.get('action') or response.url)
+        response = self.session.post(register_action, data=self._form_fields(register_form), timeout=self.timeout)
+        return self._is_success(response)
+
+def get_http_adapter(app) -> HTTPAdapter:
+    """直接送信で共有するHTTPアダプタ（接続プール）を取得する
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        HTTPAdapter: HTTPアダプタ
+    """
+    adapter = app.extensions.get('sb_http_adapter')
+    if adapter is None:
+        pool_size = max(app.config.get('SB_MAX_PARALLEL_POSTS', 2), 1) * 2
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        app.extensions['sb_http_adapter'] = adapter
+    return adapter
@@ -0,0 +1,131 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import tempfile
+from typing import Dict, Optional
+from cryptography.fernet import Fernet, InvalidToken
+
+class StorageStateCache:
+    """サロンボードのログイン状態（storage state）を暗号化して保存するキャッシュ
+
+    Playwrightの storage_state（Cookie と localStorage）をアカウントごとに
+    Fernetで暗号化してディスクに保存し、有効期限内であれば再利用する。
+    キャッシュのキーにはIDとパスワードの両方を使用するため、
+    誤ったパスワードでは他人のログイン状態を再利用できない。
+    """
+
+    def __init__(self, cache_dir: str, secret: str, ttl_seconds: int):
+        """初期化
+
+        Args:
+            cache_dir: キャッシュファイルの保存先ディレクトリ
+            secret: 暗号化キーの導出に使用する秘密鍵
+            ttl_seconds: ログイン状態の有効期限（秒）
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self._secret = secret.encode('utf-8')
+        key = hashlib.sha256(b'sb-storage-state:' + self._secret).digest()
+        self._fernet = Fernet(base64.urlsafe_b64encode(key))
+
+    def _path(self, sb_id: str, sb_password: str) -> str:
+        """アカウントに対応するキャッシュファイルのパスを返す"""
+        account = f"{sb_id}\0{sb_password}".encode('utf-8')
+        name = hmac.new(self._secret, account, hashlib.sha256).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.state")
+
+    def load(self, sb_id: str, sb_password: str, now: Optional[float] = None) -> Optional[Dict]:
+        """キャッシュされたログイン状態を取得する
+
+        Args:
+            sb_id: サロンボードID
+            sb_password: サロンボードパスワード
+            now: 基準時刻（省略時は現在時刻）
+
+        Returns:
+            Optional[Dict]: storage state（存在しない・期限切れの場合はNone）
+        """
+        path = self._path(sb_id, sb_password)
+        try:
+            with open(path, 'rb') as f:
+                token = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            payload = json.loads(self._fernet.decrypt(token))
+        except (InvalidToken, ValueError):
+            # 鍵の変更や破損したファイルは破棄する
+            self._remove(path)
+            return None
+
+        if now is None:
+            now = time.time()
+        if payload.get('expires_at', 0) <= now:
+            self._remove(path)
+            return None
+
+        return payload.get('storage_state')
+
+    def save(self, sb_id: str, sb_password: str, storage_state: Dict, now: Optional[float] = None):
+        """ログイン状態を暗号化して保存する
+
+        Args:
+            sb_id: サロンボードID
+            sb_password: サロンボードパスワード
+            storage_state: Playwrightの storage state
+            now: 基準時刻（省略時は現在時刻）
+        """
+        if now is None:
+            now = time.time()
+        payload = {
+            'expires_at': now + self.ttl_seconds,
+            'storage_state': storage_state
+        }
+        token = self._fernet.encrypt(json.dumps(payload).encode('utf-8'))
+
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        # 書き込み途中のファイルを読まないよう一時ファイル経由で置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(token)
+            os.replace(tmp_path, self._path(sb_id, sb_password))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def invalidate(self, sb_id: str, sb_password: str):
+        """ログイン状態を破棄する（サーバー側でセッションが無効になった場合など）"""
+        self._remove(self._path(sb_id, sb_password))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def get_session_cache(app) -> Optional[StorageStateCache]:
+    """アプリケーションのログイン状態キャッシュを取得する（無効な場合はNone）
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        Optional[StorageStateCache]: ログイン状態キャッシュ
+    """
+    ttl_seconds = app.config.get('SB_SESSION_CACHE_TTL', 0)
+    if ttl_seconds <= 0:
+        return None
+
+    cache = app.extensions.get('sb_session_cache')
+    if cache is None:
+        cache_dir = app.config.get('SB_SESSION_CACHE_DIR') or os.path.join(app.instance_path, 'sb_sessions')
+        secret = app.config.get('SB_SESSION_CACHE_KEY') or app.config['SECRET_KEY']
+        cache = StorageStateCache(cache_dir, secret, ttl_seconds)
+        app.extensions['sb_session_cache'] = cache
+    return cache
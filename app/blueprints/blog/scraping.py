@@ -1,18 +1,83 @@
 import requests
 from bs4 import BeautifulSoup
 import time
+import logging
+import threading
 from typing import Dict, List, Optional
 from flask import current_app
 import re
+from urllib.parse import urlsplit
+from ...utils.timing import span
+from ...utils.deadline import Deadline, DeadlineExceeded
+from ...utils.circuit_breaker import CircuitOpenError, circuit_guard
+from ...utils.selectors import compiled_css
 
-def scrape_hpb_data(store_url: str) -> Dict:
+# HPBのトップページ（ウォームアップで接続を確立する）
+HPB_BASE_URL = 'https://beauty.hotpepper.jp/'
+
+SCRAPER_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/91.0.4472.124 Safari/537.36'
+)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_scraper_session() -> requests.Session:
+    """HPBへの接続（DNS解決・TLS）を再利用するセッションを取得する
+    
+    Returns:
+        requests.Session: プロセスで共有するセッション
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers['User-Agent'] = SCRAPER_USER_AGENT
+                _session = session
+    return _session
+
+def _fetch_page(url: str, deadline: Optional[Deadline] = None) -> requests.Response:
+    """共有セッションでページを取得する
+    
+    Args:
+        url: ページのURL
+        deadline: 制限時間（指定時は残り時間をタイムアウトの上限とする）
+        
+    Returns:
+        requests.Response: レスポンス
+        
+    Raises:
+        requests.HTTPError: ステータスコードがエラーの場合
+        DeadlineExceeded: 制限時間を超えている場合
+        CircuitOpenError: HPBの障害が続いていて、呼び出しを停止している場合
+    """
+    configured_timeout = current_app.config.get('SCRAPER_TIMEOUT', 10)
+    timeout = configured_timeout if deadline is None else deadline.timeout(configured_timeout)
+    with circuit_guard('hpb'), span('scrape', desc=urlsplit(url).path):
+        try:
+            response = get_scraper_session().get(url, timeout=timeout)
+        except requests.Timeout as e:
+            # 残り時間で短くしたタイムアウトはHPBの障害として記録しない（制限時間の超過として扱う）
+            if timeout < configured_timeout:
+                raise DeadlineExceeded('制限時間を超えました') from e
+            raise
+        # 5xxはHPBの障害として記録する（4xxはURLの誤りなどのため記録しない）
+        if response.status_code >= 500:
+            response.raise_for_status()
+    response.raise_for_status()
+    return response
+
+def scrape_hpb_data(store_url: str, deadline: Optional[Deadline] = None) -> Dict:
     """HPBサイトからスタイリストとクーポン情報をスクレイピングする
     
     Args:
         store_url: HPB店舗URL
+        deadline: 制限時間（超えた場合は取得できた分だけを返す）
         
     Returns:
-        Dict: スクレイピング結果（stylists, coupons）
+        Dict: スクレイピング結果（stylists, coupons、制限時間を超えた場合は partial も含む）
     """
     # URLの正規化（末尾のスラッシュを確保）
     if not store_url.endswith('/'):
@@ -22,22 +87,26 @@ def scrape_hpb_data(store_url: str) -> Dict:
     selectors = current_app.config.get('SELECTORS', {})
     
     # スタイリスト情報の取得
-    stylists = _scrape_stylists(store_url, selectors)
+    stylists = _scrape_stylists(store_url, selectors, deadline)
     
     # クーポン情報の取得
-    coupons = _scrape_coupons(store_url, selectors)
+    coupons = _scrape_coupons(store_url, selectors, deadline)
     
-    return {
+    result = {
         'stylists': stylists,
         'coupons': coupons
     }
+    if deadline is not None and deadline.expired:
+        result['partial'] = True
+    return result
 
-def _scrape_stylists(store_url: str, selectors: Dict) -> List[str]:
+def _scrape_stylists(store_url: str, selectors: Dict, deadline: Optional[Deadline] = None) -> List[str]:
     """スタイリスト情報をスクレイピングする
     
     Args:
         store_url: HPB店舗URL
         selectors: セレクタ設定
+        deadline: 制限時間
         
     Returns:
         List[str]: スタイリスト名のリスト
@@ -56,13 +125,10 @@ def _scrape_stylists(store_url: str, selectors: Dict) -> List[str]:
         stylist_url_suffix = selectors.get('hpb', {}).get('stylist', {}).get('page_url_suffix', 'stylist/')
         stylist_url = store_url + stylist_url_suffix
         
-        current_app.logger.info(f"スタイリストページURL: {stylist_url}")
+        current_app.logger.info("スタイリストページURL: %s", stylist_url)
         
         # ページの取得
-        response = requests.get(stylist_url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        response.raise_for_status()
+        response = _fetch_page(stylist_url, deadline)
         
         # HTMLの解析
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -85,7 +151,7 @@ def _scrape_stylists(store_url: str, selectors: Dict) -> List[str]:
         # スタイリスト名のリストを作成（整形せずそのまま取得）
         stylists = [element.text for element in stylist_elements if element.text]
         
-        current_app.logger.info(f"スクレイピングされたスタイリスト数: {len(stylists)}")
+        current_app.logger.info("スクレイピングされたスタイリスト数: %d", len(stylists))
         
         return stylists
     
@@ -93,12 +159,13 @@ def _scrape_stylists(store_url: str, selectors: Dict) -> List[str]:
         current_app.logger.error(f"スタイリスト情報のスクレイピングエラー: {str(e)}")
         return []
 
-def _scrape_coupons(store_url: str, selectors: Dict) -> List[str]:
+def _scrape_coupons(store_url: str, selectors: Dict, deadline: Optional[Deadline] = None) -> List[str]:
     """クーポン情報をスクレイピングする
     
     Args:
         store_url: HPB店舗URL
         selectors: セレクタ設定
+        deadline: 制限時間（2ページ目以降で超えた場合は取得済みのクーポンを返す）
         
     Returns:
         List[str]: クーポン名のリスト
@@ -117,36 +184,36 @@ def _scrape_coupons(store_url: str, selectors: Dict) -> List[str]:
         coupon_url_suffix = selectors.get('hpb', {}).get('coupon', {}).get('page_url_suffix', 'coupon/')
         coupon_url = store_url + coupon_url_suffix
         
-        current_app.logger.info(f"クーポンページURL: {coupon_url}")
+        # ページ・セレクタ・要素ごとのログは引数の文字列化をログ出力時まで遅らせる
+        logger = current_app.logger
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        logger.info("クーポンページURL: %s", coupon_url)
         
         # ページの取得
-        response = requests.get(coupon_url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        response.raise_for_status()
+        response = _fetch_page(coupon_url, deadline)
         
         # HTMLの解析
         soup = BeautifulSoup(response.text, 'html.parser')
         
         # クーポン名のセレクタを取得
         coupon_selector = selectors.get('hpb', {}).get('coupon', {}).get('coupon_name_selector')
-        current_app.logger.info(f"使用するクーポンセレクタ: {coupon_selector}")
+        logger.info("使用するクーポンセレクタ: %s", coupon_selector)
         
         # ページネーション情報の取得
         max_page = 1
         pagination_selector = selectors.get('hpb', {}).get('coupon', {}).get('pagination_selector', '.pa.bottom0.right0')
-        pagination_element = soup.select_one(pagination_selector)
+        pagination_element = compiled_css(pagination_selector).select_one(soup)
         
         if pagination_element:
             # ページネーション要素から最大ページ数を抽出
             pagination_text = pagination_element.text.strip()
-            current_app.logger.info(f"ページネーションテキスト: {pagination_text}")
+            logger.info("ページネーションテキスト: %s", pagination_text)
             
             # 「1/3ページ」のような形式から最大ページ数を抽出
             page_match = re.search(r'(\d+)/(\d+)', pagination_text)
             if page_match:
                 max_page = int(page_match.group(2))
-                current_app.logger.info(f"最大ページ数: {max_page}")
+                logger.info("最大ページ数: %d", max_page)
         
         # クーポン名のリスト
         coupons = []
@@ -159,13 +226,14 @@ def _scrape_coupons(store_url: str, selectors: Dict) -> List[str]:
                 # 2ページ目以降のURL生成
                 pagination_url_format = selectors.get('hpb', {}).get('coupon', {}).get('pagination_url_format', 'coupon/PN{n}.html')
                 current_page_url = store_url + pagination_url_format.replace('{n}', str(page))
-                current_app.logger.info(f"ページ{page}のURL: {current_page_url}")
+                logger.info("ページ%dのURL: %s", page, current_page_url)
                 
-                # ページの取得
-                response = requests.get(current_page_url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                })
-                response.raise_for_status()
+                # ページの取得（制限時間を超えた場合、HPBの呼び出しを停止している場合は取得済みのクーポンだけを返す）
+                try:
+                    response = _fetch_page(current_page_url, deadline)
+                except (DeadlineExceeded, CircuitOpenError) as e:
+                    current_app.logger.warning(f"クーポンの取得を{page - 1}ページで打ち切りました: {str(e) or '制限時間を超えました'}")
+                    break
                 
                 # HTMLの解析
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -177,9 +245,9 @@ def _scrape_coupons(store_url: str, selectors: Dict) -> List[str]:
                 # カンマ区切りの複数セレクタをサポート
                 selectors_list = [s.strip() for s in coupon_selector.split(',')]
                 for selector in selectors_list:
-                    elements = soup.select(selector)
+                    elements = compiled_css(selector).select(soup)
                     if elements:
-                        current_app.logger.info(f"セレクタ '{selector}' で{len(elements)}個のクーポン要素が見つかりました")
+                        logger.info("セレクタ '%s' で%d個のクーポン要素が見つかりました", selector, len(elements))
                         coupon_elements.extend(elements)
             
             # クーポン名をリストに追加
@@ -191,13 +259,15 @@ def _scrape_coupons(store_url: str, selectors: Dict) -> List[str]:
                 element_classes = element.get('class', [])
                 if 'fl' in element_classes:  # 通常メニューは 'fl' クラスを持つ
                     is_coupon = False
-                    current_app.logger.debug(f"通常メニューを除外: {element.text.strip()}")
+                    if debug_enabled:
+                        logger.debug("通常メニューを除外: %s", element.text.strip())
                 
                 # 親要素のクラスもチェック
                 parent = element.parent
                 if parent and 'cFix' in parent.get('class', []):  # 通常メニューの親は 'cFix' クラスを持つことが多い
                     is_coupon = False
-                    current_app.logger.debug(f"通常メニューの親要素を検出: {element.text.strip()}")
+                    if debug_enabled:
+                        logger.debug("通常メニューの親要素を検出: %s", element.text.strip())
                 
                 # クーポンテキストを取得
                 coupon_text = element.text.strip()
@@ -209,9 +279,9 @@ def _scrape_coupons(store_url: str, selectors: Dict) -> List[str]:
             
             # 過負荷を避けるための待機
             if page < max_page:
-                time.sleep(1)
+                time.sleep(1 if deadline is None else min(1, deadline.remaining()))
         
-        current_app.logger.info(f"スクレイピングされたクーポン数: {len(coupons)}")
+        logger.info("スクレイピングされたクーポン数: %d", len(coupons))
         return coupons
     
     except Exception as e:
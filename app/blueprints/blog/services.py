@@ -1,7 +1,14 @@
 import os
+import asyncio
 import google.generativeai as genai
 from flask import current_app
 from typing import List, Dict, Optional
+from ...utils.timing import span
+from ...utils.deadline import Deadline, DeadlineExceeded
+from ...utils.circuit_breaker import circuit_guard
+
+# ブログ生成に使用するモデル
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
 
 def setup_gemini_api():
     """Gemini APIの初期設定を行う"""
@@ -11,6 +18,22 @@ def setup_gemini_api():
     
     genai.configure(api_key=api_key)
 
+def get_gemini_model():
+    """設定済みのGeminiモデルを取得する（APIキーが変わらない限り、初期化は1回だけ行う）
+    
+    Returns:
+        genai.GenerativeModel: Geminiモデル
+    """
+    api_key = current_app.config.get('GEMINI_API_KEY')
+    cached = current_app.extensions.get('gemini_model')
+    if isinstance(cached, tuple) and cached[0] == api_key:
+        return cached[1]
+    
+    setup_gemini_api()
+    model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    current_app.extensions['gemini_model'] = (api_key, model)
+    return model
+
 def build_gemini_prompt(images: List[Dict], style: str, store_url: Optional[str] = None) -> str:
     """Gemini APIに送信するプロンプトを生成する
     
@@ -72,39 +95,61 @@ def build_gemini_prompt(images: List[Dict], style: str, store_url: Optional[str]
     
     return prompt
 
-async def generate_blog_with_gemini(images: List[Dict], style: str, store_url: Optional[str] = None) -> Dict:
+def _is_timeout(error: Exception) -> bool:
+    """待ち時間の制限またはSDKのタイムアウトによる例外かどうか"""
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(error, (TimeoutError, google_exceptions.DeadlineExceeded))
+
+async def generate_blog_with_gemini(images: List[Dict], style: str, store_url: Optional[str] = None,
+                                    deadline: Optional[Deadline] = None) -> Dict:
     """Gemini APIを使用してブログを生成する
     
     Args:
         images: 画像情報のリスト
         style: 文体スタイル
         store_url: HPB店舗URL（任意）
+        deadline: 制限時間（指定時は残り時間をAPI呼び出しのタイムアウトとする）
         
     Returns:
         Dict: 生成されたブログデータ（title, body）
     """
     try:
-        # APIの初期設定
-        setup_gemini_api()
-        
-        # プロンプトの生成
-        prompt = build_gemini_prompt(images, style, store_url)
-        
-        # モデルの選択
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        # 画像データの準備
-        image_parts = []
-        for img_info in images:
-            with open(img_info['path'], 'rb') as f:
-                image_data = f.read()
-                image_parts.append({
-                    'data': image_data,
-                    'mime_type': 'image/jpeg'  # 実際のMIMEタイプに応じて調整が必要
-                })
+        with span('gemini_prep'):
+            # モデルの取得（初回のみAPIの初期設定を行う）
+            model = get_gemini_model()
+            
+            # プロンプトの生成
+            prompt = build_gemini_prompt(images, style, store_url)
+            
+            # 画像データの準備
+            image_parts = []
+            for img_info in images:
+                with open(img_info['path'], 'rb') as f:
+                    image_data = f.read()
+                    image_parts.append({
+                        'data': image_data,
+                        'mime_type': 'image/jpeg'  # 実際のMIMEタイプに応じて調整が必要
+                    })
         
-        # APIリクエスト
-        response = await model.generate_content_async([prompt] + image_parts)
+        # APIリクエスト（画像の送信から応答の受信まで）
+        # 障害が続いている場合は呼び出さずに CircuitOpenError を送出する
+        with circuit_guard('gemini'), span('gemini_request'):
+            if deadline is None:
+                response = await model.generate_content_async([prompt] + image_parts)
+            else:
+                # SDKのタイムアウトに加え、応答が返らない場合に備えて待ち時間も制限する
+                configured_timeout = current_app.config.get('GEMINI_TIMEOUT', 60)
+                timeout = deadline.timeout(configured_timeout)
+                try:
+                    response = await asyncio.wait_for(
+                        model.generate_content_async([prompt] + image_parts, request_options={'timeout': timeout}),
+                        timeout
+                    )
+                except Exception as e:
+                    # 残り時間で短くしたタイムアウトはGeminiの障害として記録しない（制限時間の超過として扱う）
+                    if timeout < configured_timeout and _is_timeout(e):
+                        raise DeadlineExceeded('Gemini API呼び出しが制限時間を超えました') from e
+                    raise
         
         # レスポンスの解析
         response_text = response.text
@@ -155,6 +200,13 @@ async def generate_blog_with_gemini(images: List[Dict], style: str, store_url: O
                 'body': cleaned_text.strip()
             }
     
+    except TimeoutError:
+        current_app.logger.error("Gemini API呼び出しが制限時間を超えました")
+        return {
+            'title': 'エラーが発生しました',
+            'body': 'ブログの生成が制限時間内に完了しませんでした。時間をおいてもう一度お試しください。'
+        }
+    
     except Exception as e:
         current_app.logger.error(f"Gemini API呼び出しエラー: {str(e)}")
         return {
@@ -1,5 +1,4 @@
 import os
-import json
 from dotenv import load_dotenv
 
 # .envファイルの読み込み
@@ -21,17 +20,158 @@ class Config:
     # 一時ファイル保存ディレクトリ
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'temp_uploads')
     
-    # セレクタ設定
-    SELECTORS = {}
+    # アップロードサイズの上限（リクエスト全体、1ファイルあたり）
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(50 * 1024 * 1024)))
+    UPLOAD_MAX_FILE_BYTES = int(os.getenv('UPLOAD_MAX_FILE_BYTES', str(15 * 1024 * 1024)))
+    
+    # ブラウザ側での画像縮小設定（長辺の最大ピクセル数、JPEG品質）
+    CLIENT_RESIZE_MAX_EDGE = int(os.getenv('CLIENT_RESIZE_MAX_EDGE', '2048'))
+    CLIENT_RESIZE_QUALITY = float(os.getenv('CLIENT_RESIZE_QUALITY', '0.85'))
+    
+    # 一時ファイルスイーパー設定
+    # 最終利用からの保持期間（秒）、合計サイズ上限（バイト）、走査間隔（秒、0で無効）
+    UPLOAD_TTL_SECONDS = int(os.getenv('UPLOAD_TTL_SECONDS', str(6 * 60 * 60)))
+    UPLOAD_MAX_TOTAL_BYTES = int(os.getenv('UPLOAD_MAX_TOTAL_BYTES', str(1024 * 1024 * 1024)))
+    UPLOAD_SWEEP_INTERVAL = int(os.getenv('UPLOAD_SWEEP_INTERVAL', '300'))
+    UPLOAD_SWEEP_GRACE_SECONDS = int(os.getenv('UPLOAD_SWEEP_GRACE_SECONDS', '600'))
+    
+    # ワーカー起動時のウォームアップ（セレクタ設定の検証、Geminiモデルの生成、HPBへの接続、ブラウザプールの起動）
+    # 完了するまで /ready は503を返す。各ステップの待ち時間の上限（秒）
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'false').lower() == 'true'
+    WARMUP_TIMEOUT = int(os.getenv('WARMUP_TIMEOUT', '60'))
+    
+    # ブログ生成の制限時間（秒、リクエスト全体）と、そのうちスクレイピングに割り当てる時間（秒）
+    # HPBのページ取得1回あたり・Gemini API呼び出しのタイムアウト（秒）。制限時間を超えた場合は取得できた分だけで生成する
+    # （残り時間で短くしたタイムアウトによる打ち切りは、サーキットブレーカーの失敗に数えない）
+    GENERATE_DEADLINE_SECONDS = float(os.getenv('GENERATE_DEADLINE_SECONDS', '90'))
+    GENERATE_SCRAPE_SECONDS = float(os.getenv('GENERATE_SCRAPE_SECONDS', '30'))
+    SCRAPER_TIMEOUT = float(os.getenv('SCRAPER_TIMEOUT', '10'))
+    GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '60'))
+    
+    # ログの書き込みをキュー経由でバックグラウンドのスレッドで行う、キューに保持するログの最大数（超えた分は破棄する）
+    # スレッドは各プロセスの最初のログで起動する（gunicorn の --preload でもワーカーごとに起動する）
+    LOG_QUEUE_ENABLED = os.getenv('LOG_QUEUE_ENABLED', 'false').lower() == 'true'
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    
+    # リクエストの計測（処理ごとの所要時間を Server-Timing ヘッダーで返す）
+    # 遅いリクエストの閾値（ミリ秒、0で記録しない）と記録先（省略時はinstance/logs/slow_requests.log、ローテーションする）
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '10000'))
+    SLOW_REQUEST_LOG = os.getenv('SLOW_REQUEST_LOG')
+    SLOW_REQUEST_LOG_MAX_BYTES = int(os.getenv('SLOW_REQUEST_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+    SLOW_REQUEST_LOG_BACKUPS = int(os.getenv('SLOW_REQUEST_LOG_BACKUPS', '5'))
+    # プロファイルするリクエストの割合（0〜1、0で無効）、プロファイラ（cprofile / pyinstrument）、
+    # 保存先（省略時はinstance/profiles）、保持する数
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILER = os.getenv('PROFILER', 'cprofile')
+    PROFILE_DIR = os.getenv('PROFILE_DIR')
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '50'))
+    
+    # メトリクス（/metrics、Prometheus形式。ログイン済み、またはトークンをBearerで指定した場合のみ取得できる）
+    # 複数のワーカープロセスの値を合計するための書き出し先（省略時はinstance/metrics）と書き出し間隔（秒）
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    
+    # プレビュー画像のブラウザキャッシュ期間（秒）
+    THUMBNAIL_CACHE_MAX_AGE = int(os.getenv('THUMBNAIL_CACHE_MAX_AGE', '3600'))
+    
+    # サロンボードのURL
+    SB_BASE_URL = os.getenv('SB_BASE_URL', 'https://salonboard.com')
+    
+    # サロンボードのログイン状態キャッシュ設定
+    # 有効期限（秒、0で無効）、保存先（省略時はinstance/sb_sessions）、暗号化キー（省略時はSECRET_KEY）
+    SB_SESSION_CACHE_TTL = int(os.getenv('SB_SESSION_CACHE_TTL', '3600'))
+    SB_SESSION_CACHE_DIR = os.getenv('SB_SESSION_CACHE_DIR')
+    SB_SESSION_CACHE_KEY = os.getenv('SB_SESSION_CACHE_KEY')
     
-    # セレクタ設定の読み込み
-    @staticmethod
-    def get_selectors():
-        """selectors.jsonからセレクタ設定を読み込む"""
-        selector_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'selectors.json')
-        try:
-            with open(selector_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"セレクタ設定の読み込みに失敗しました: {e}")
-            return {}
+    # サロンボード投稿用ブラウザプール設定
+    # プールするブラウザ数（0で投稿ごとに起動）、再起動までのジョブ数、空き待ちの最大時間（秒）
+    SB_BROWSER_POOL_SIZE = int(os.getenv('SB_BROWSER_POOL_SIZE', '1'))
+    SB_BROWSER_MAX_JOBS = int(os.getenv('SB_BROWSER_MAX_JOBS', '50'))
+    SB_BROWSER_POOL_TIMEOUT = int(os.getenv('SB_BROWSER_POOL_TIMEOUT', '300'))
+    
+    # 投稿ジョブの同時実行数の上限（異なるアカウントへの投稿のみ並行実行、同じアカウントは順に実行）
+    SB_MAX_PARALLEL_POSTS = int(os.getenv('SB_MAX_PARALLEL_POSTS', '2'))
+    
+    # 重い処理の同時実行数の上限（ワーカープロセスあたり、0で制限なし）
+    # generate: ブログ生成（Gemini）、sb_post: サロンボードへの投稿（単体・バッチ）
+    # 上限を超えたリクエストは待ち行列（数、最大待ち時間（秒））で待ち、それも超える場合は503を返す
+    ADMISSION_LIMITS = {
+        'generate': int(os.getenv('ADMISSION_GENERATE_LIMIT', '4')),
+        'sb_post': int(os.getenv('ADMISSION_SB_POST_LIMIT', os.getenv('SB_MAX_PARALLEL_POSTS', '2')))
+    }
+    ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '4'))
+    ADMISSION_WAIT_SECONDS = float(os.getenv('ADMISSION_WAIT_SECONDS', '5'))
+    # 所要時間の実績がない場合の Retry-After（秒）
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '10'))
+    
+    # 依存先（hpb: スクレイピング、gemini: ブログ生成、sb_login: サロンボードのログイン）のサーキットブレーカー
+    # 直近の呼び出し（件数）の失敗の割合が閾値以上になると、一定時間（秒）呼び出さずにすぐ失敗させる
+    # 判定は最低呼び出し数以上の場合のみ行う。状態はワーカープロセスごとに持つ
+    CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+    CIRCUIT_FAILURE_RATES = {
+        'hpb': float(os.getenv('CIRCUIT_HPB_FAILURE_RATE', '0.5')),
+        'gemini': float(os.getenv('CIRCUIT_GEMINI_FAILURE_RATE', '0.5')),
+        'sb_login': float(os.getenv('CIRCUIT_SB_LOGIN_FAILURE_RATE', '0.5'))
+    }
+    CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '20'))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '5'))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+    
+    # サロンボードへのバッチ投稿設定
+    # 1バッチの最大投稿数、投稿待ちデータの保存先（省略時はinstance/sb_batches）
+    # 投稿待ちデータの保持期間（秒、最後に利用してから。期限切れのバッチは一時ファイルスイーパーが削除する）
+    SB_BATCH_MAX_POSTS = int(os.getenv('SB_BATCH_MAX_POSTS', '20'))
+    SB_BATCH_DIR = os.getenv('SB_BATCH_DIR')
+    SB_BATCH_TTL_SECONDS = int(os.getenv('SB_BATCH_TTL_SECONDS', str(3 * 24 * 60 * 60)))
+    
+    # サロンボードにアップロードする画像の上限（超える場合は縮小・再圧縮してから送信する）
+    # 長辺（ピクセル、0で縮小しない）、ファイルサイズ（バイト）、JPEG画質
+    SB_UPLOAD_MAX_EDGE = int(os.getenv('SB_UPLOAD_MAX_EDGE', '1280'))
+    SB_UPLOAD_MAX_BYTES = int(os.getenv('SB_UPLOAD_MAX_BYTES', str(2 * 1024 * 1024)))
+    SB_UPLOAD_JPEG_QUALITY = int(os.getenv('SB_UPLOAD_JPEG_QUALITY', '85'))
+    
+    # 投稿フォームの送信方法
+    # browser: ブラウザで入力・送信、http: ログインのみブラウザで行いフォームをHTTPで直接送信
+    # （フォームの構造が想定と異なる場合はブラウザでの送信に切り替える）、HTTPのタイムアウト（秒）
+    # http は selectors.json の sb.http の項目名を確認してから明示的に有効にする（既定は browser）
+    SB_POST_ENGINE = os.getenv('SB_POST_ENGINE', 'browser')
+    SB_HTTP_TIMEOUT = int(os.getenv('SB_HTTP_TIMEOUT', '30'))
+    
+    # サロンボードへの投稿キュー（投稿ジョブとチェックポイントを記録し、二重投稿を防いで中断した投稿を再開する）
+    # 保存先（省略時はinstance/sb_post_queue.sqlite3）、完了したジョブの保持期間（秒、過ぎると同じ内容を再投稿できる）
+    SB_POST_QUEUE_ENABLED = os.getenv('SB_POST_QUEUE_ENABLED', 'true').lower() == 'true'
+    SB_POST_QUEUE_PATH = os.getenv('SB_POST_QUEUE_PATH')
+    SB_POST_QUEUE_RETENTION = int(os.getenv('SB_POST_QUEUE_RETENTION', str(7 * 24 * 60 * 60)))
+    
+    # サロンボード自動操作のプロファイル
+    # fast: ヘッドレス・操作遅延なし・不要な通信を遮断（本番用）、debug: 画面表示・操作遅延あり
+    SB_AUTOMATION_PROFILE = os.getenv('SB_AUTOMATION_PROFILE', 'fast')
+    # fastプロファイルで遮断するリソース種別とドメイン（カンマ区切り）
+    SB_BLOCKED_RESOURCE_TYPES = [
+        t.strip() for t in os.getenv('SB_BLOCKED_RESOURCE_TYPES', 'image,media,font').split(',') if t.strip()
+    ]
+    SB_BLOCKED_DOMAINS = [
+        d.strip() for d in os.getenv(
+            'SB_BLOCKED_DOMAINS',
+            'google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,'
+            'googleadservices.com,facebook.net,ads-twitter.com,'
+            'clarity.ms,hotjar.com,criteo.com,criteo.net,omtrdc.net,demdex.net'
+        ).split(',') if d.strip()
+    ]
+    
+    # サロンボード自動操作の診断情報（スパン・スクリーンショット・トレース）
+    # off: 保存しない、auto: 失敗・遅延した実行を保存し、そのアカウントの次回はトレースも記録、always: 毎回トレースを記録
+    # 1投稿あたりの遅延の閾値（秒、0で遅延による保存なし）、保存先（省略時はinstance/sb_diagnostics）、保持する実行数
+    SB_DIAGNOSTICS_MODE = os.getenv('SB_DIAGNOSTICS_MODE', 'auto')
+    SB_SLOW_RUN_SECONDS = float(os.getenv('SB_SLOW_RUN_SECONDS', '60'))
+    SB_DIAGNOSTICS_DIR = os.getenv('SB_DIAGNOSTICS_DIR')
+    SB_DIAGNOSTICS_KEEP = int(os.getenv('SB_DIAGNOSTICS_KEEP', '50'))
+    
+    # セレクタ設定（起動時に SELECTORS_PATH から読み込み、更新時刻の変更を確認する間隔（秒、0で再読み込みしない））
+    # 変更されたファイルは検証してから置き換え、不正な場合は以前の設定を使い続ける
+    SELECTORS = {}
+    SELECTORS_PATH = os.getenv('SELECTORS_PATH') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'selectors.json')
+    SELECTORS_RELOAD_INTERVAL = float(os.getenv('SELECTORS_RELOAD_INTERVAL', '2'))
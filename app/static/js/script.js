@@ -59,6 +59,75 @@ function previewImages(input, previewContainer) {
     }
 }
 
+// 画像の縮小・再エンコード（アップロード前の通信量削減）
+async function resizeImageFile(file, maxEdge, quality) {
+    // GIFはアニメーションが失われるため対象外
+    if (!file.type.startsWith('image/') || file.type === 'image/gif') return file;
+    if (typeof createImageBitmap === 'undefined') return file;
+    
+    let bitmap;
+    try {
+        bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    } catch (e) {
+        // ブラウザが読み込めない形式は元のファイルのまま送信
+        return file;
+    }
+    
+    const scale = Math.min(1, maxEdge / Math.max(bitmap.width, bitmap.height));
+    const width = Math.round(bitmap.width * scale);
+    const height = Math.round(bitmap.height * scale);
+    
+    let blob = null;
+    try {
+        if (typeof OffscreenCanvas !== 'undefined') {
+            const canvas = new OffscreenCanvas(width, height);
+            drawResized(canvas.getContext('2d'), bitmap, width, height);
+            blob = await canvas.convertToBlob({ type: 'image/jpeg', quality: quality });
+        } else {
+            const canvas = document.createElement('canvas');
+            canvas.width = width;
+            canvas.height = height;
+            drawResized(canvas.getContext('2d'), bitmap, width, height);
+            blob = await new Promise(function(resolve) {
+                canvas.toBlob(resolve, 'image/jpeg', quality);
+            });
+        }
+    } catch (e) {
+        blob = null;
+    } finally {
+        bitmap.close();
+    }
+    
+    // 再エンコードしても小さくならない場合は元のファイルを使用
+    if (!blob || blob.size >= file.size) return file;
+    
+    const name = file.name.replace(/\.[^.]+$/, '') + '.jpg';
+    return new File([blob], name, { type: 'image/jpeg', lastModified: file.lastModified });
+}
+
+function drawResized(ctx, bitmap, width, height) {
+    // JPEGは透過に対応しないため白で塗りつぶしてから描画
+    ctx.fillStyle = '#fff';
+    ctx.fillRect(0, 0, width, height);
+    ctx.imageSmoothingQuality = 'high';
+    ctx.drawImage(bitmap, 0, 0, width, height);
+}
+
+// ファイル入力の画像をまとめて縮小し、選択ファイルを置き換える
+async function resizeFileInput(input, maxEdge, quality) {
+    if (!input || !input.files.length || typeof DataTransfer === 'undefined') return;
+    
+    const resized = await Promise.all(Array.from(input.files).map(function(file) {
+        return resizeImageFile(file, maxEdge, quality);
+    }));
+    
+    const dataTransfer = new DataTransfer();
+    resized.forEach(function(file) {
+        dataTransfer.items.add(file);
+    });
+    input.files = dataTransfer.files;
+}
+
 // ローディングインジケータの表示/非表示
 function showLoading() {
     const loading = document.querySelector('.loading');
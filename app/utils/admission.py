@@ -0,0 +1,193 @@
+import math
+import time
+import threading
+from functools import wraps
+from typing import Dict, Optional
+from flask import current_app, jsonify, render_template, request
+from .metrics import REGISTRY
+
+REGISTRY.describe('hpb_admission_in_flight', 'gauge', '重い処理の実行数（処理ごと）')
+REGISTRY.describe('hpb_admission_waiting', 'gauge', '重い処理の実行待ちの数（処理ごと）')
+REGISTRY.describe('hpb_admission_rejected_total', 'counter', '混雑のため受け付けなかったリクエスト数（処理ごと）')
+
+class AdmissionRejected(Exception):
+    """実行枠と待ち行列が埋まっていて、リクエストを受け付けられない"""
+
+    def __init__(self, operation: str, position: int, retry_after: int):
+        super().__init__(f'{operation} は混雑しています（{position}番目）')
+        self.operation = operation
+        self.position = position
+        self.retry_after = retry_after
+
+class AdmissionGate:
+    """重い処理（Gemini・ブラウザ自動操作）の同時実行数を制限するゲート
+
+    実行枠（limit）に空きがなければ、待ち行列（queue_size）に入って最大 wait_seconds
+    だけ空きを待つ。待ち行列も埋まっている場合や待ち時間を超えた場合は、すぐに
+    AdmissionRejected を送出する（ワーカーのスレッドを塞がず、軽いリクエストの応答を保つ）。
+    ゲートはプロセスごとに持つため、上限はワーカープロセスあたりの値になる。
+    """
+
+    def __init__(self, operation: str, limit: int, queue_size: int = 0, wait_seconds: float = 0,
+                 default_retry_after: int = 10):
+        """初期化
+
+        Args:
+            operation: 処理名
+            limit: 同時実行数の上限
+            queue_size: 実行待ちできる数
+            wait_seconds: 実行待ちの最大時間（秒）
+            default_retry_after: 所要時間の実績がない場合の再試行までの目安（秒）
+        """
+        self.operation = operation
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.wait_seconds = wait_seconds
+        self.default_retry_after = default_retry_after
+        self.running = 0
+        self._waiting = []
+        self._average_seconds: Optional[float] = None
+        self._condition = threading.Condition()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def retry_after(self, position: int) -> int:
+        """待ち順から再試行までの目安（秒）を見積もる（処理の平均所要時間から求める）"""
+        if self._average_seconds is None:
+            return self.default_retry_after
+        return max(1, math.ceil(self._average_seconds * position / self.limit))
+
+    def acquire(self):
+        """実行枠を確保する
+
+        Raises:
+            AdmissionRejected: 実行枠と待ち行列が埋まっている場合、待ち時間を超えた場合
+        """
+        with self._condition:
+            if self.running < self.limit and not self._waiting:
+                self.running += 1
+                return
+            if len(self._waiting) >= self.queue_size:
+                position = len(self._waiting) + 1
+                raise AdmissionRejected(self.operation, position, self.retry_after(position))
+
+            # 到着順に実行枠を割り当てる
+            ticket = object()
+            self._waiting.append(ticket)
+            deadline = time.monotonic() + self.wait_seconds
+            try:
+                while self.running >= self.limit or self._waiting[0] is not ticket:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        position = self._waiting.index(ticket) + 1
+                        raise AdmissionRejected(self.operation, position, self.retry_after(position))
+                    self._condition.wait(remaining)
+                self.running += 1
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+    def release(self, duration: Optional[float] = None):
+        """実行枠を返却する
+
+        Args:
+            duration: 処理の所要時間（秒、再試行までの目安の見積もりに使用する）
+        """
+        with self._condition:
+            self.running -= 1
+            if duration is not None:
+                if self._average_seconds is None:
+                    self._average_seconds = duration
+                else:
+                    self._average_seconds = self._average_seconds * 0.8 + duration * 0.2
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        """ゲートの状況を返す"""
+        return {'limit': self.limit, 'running': self.running, 'waiting': self.waiting,
+                'queue_size': self.queue_size}
+
+_gates_lock = threading.Lock()
+
+def get_admission_gate(app, operation: str) -> Optional[AdmissionGate]:
+    """処理のゲートを取得する（上限が0以下の場合は制限しないためNone）
+
+    Args:
+        app: Flaskアプリケーション
+        operation: 処理名（ADMISSION_LIMITS のキー）
+
+    Returns:
+        Optional[AdmissionGate]: ゲート
+    """
+    limit = app.config.get('ADMISSION_LIMITS', {}).get(operation, 0)
+    if limit <= 0:
+        return None
+
+    gates = app.extensions.setdefault('admission_gates', {})
+    gate = gates.get(operation)
+    if gate is None:
+        with _gates_lock:
+            gate = gates.get(operation)
+            if gate is None:
+                gate = AdmissionGate(
+                    operation,
+                    limit,
+                    queue_size=app.config.get('ADMISSION_QUEUE_SIZE', 0),
+                    wait_seconds=app.config.get('ADMISSION_WAIT_SECONDS', 0),
+                    default_retry_after=app.config.get('ADMISSION_RETRY_AFTER', 10)
+                )
+                gates[operation] = gate
+                REGISTRY.register_collector(f'admission.{operation}', lambda: [
+                    ('hpb_admission_in_flight', {'operation': operation}, gate.running),
+                    ('hpb_admission_waiting', {'operation': operation}, gate.waiting)
+                ])
+    return gate
+
+def _busy_response(rejected: AdmissionRejected):
+    """混雑時の応答（503、Retry-After 付き）"""
+    if request.accept_mimetypes.best == 'application/json':
+        response = jsonify({
+            'busy': True,
+            'operation': rejected.operation,
+            'position': rejected.position,
+            'retry_after': rejected.retry_after
+        })
+    else:
+        response = current_app.response_class(render_template(
+            'busy.html',
+            position=rejected.position,
+            retry_after=rejected.retry_after,
+            # GETは再読み込みしても副作用がないため自動で再試行する
+            auto_retry=request.method == 'GET'
+        ))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+def admission_required(operation: str):
+    """重い処理のビュー関数の同時実行数を制限するデコレータ
+
+    Args:
+        operation: 処理名（ADMISSION_LIMITS のキー）
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped_view(**kwargs):
+            gate = get_admission_gate(current_app._get_current_object(), operation)
+            if gate is None:
+                return view(**kwargs)
+            try:
+                gate.acquire()
+            except AdmissionRejected as rejected:
+                REGISTRY.inc('hpb_admission_rejected_total', operation=operation)
+                current_app.logger.warning(f"混雑のためリクエストを受け付けませんでした: {rejected}")
+                return _busy_response(rejected)
+            started = time.monotonic()
+            try:
+                return view(**kwargs)
+            finally:
+                gate.release(time.monotonic() - started)
+        return wrapped_view
+    return decorator
@@ -0,0 +1,202 @@
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+from flask import current_app
+from .metrics import REGISTRY
+from .deadline import DeadlineExceeded
+
+REGISTRY.describe('hpb_circuit_state', 'gauge', '依存先のサーキットブレーカーがその状態にあるワーカーの数（依存先、状態ごと）')
+REGISTRY.describe('hpb_circuit_rejected_total', 'counter', 'サーキットブレーカーが開いていたため呼び出さなかった数（依存先ごと）')
+REGISTRY.describe('hpb_circuit_transitions_total', 'counter', 'サーキットブレーカーの状態の遷移数（依存先、遷移後の状態ごと）')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 依存先の表示名（エラーメッセージ用）
+DEPENDENCY_LABELS = {
+    'hpb': 'ホットペッパービューティー',
+    'gemini': 'Gemini API',
+    'sb_login': 'サロンボード'
+}
+
+class CircuitOpenError(Exception):
+    """依存先のサーキットブレーカーが開いていて、呼び出しを行わない"""
+
+    def __init__(self, name: str, retry_after: int):
+        label = DEPENDENCY_LABELS.get(name, name)
+        super().__init__(f'{label}が不安定なため、一時的に呼び出しを停止しています（約{retry_after}秒後に再開）')
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """依存先（HPB・Gemini・サロンボード）ごとのサーキットブレーカー
+
+    直近 window 回の呼び出しのうち失敗の割合が failure_rate 以上になると開き
+    （min_calls 回以上呼び出した場合のみ判定する）、open_seconds の間は依存先を
+    呼び出さずにすぐ CircuitOpenError を送出する。その後は half_open になり、
+    試行の呼び出し（half_open_calls 回まで同時に許可）が成功すれば閉じ、失敗すれば再び開く。
+    リクエストの制限時間による打ち切り（DeadlineExceeded）とキャンセルは依存先の状態と
+    無関係なため、成功・失敗のどちらにも数えない。状態はプロセスごとに持つ。
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 5, window: int = 20,
+                 open_seconds: float = 30, half_open_calls: int = 1):
+        """初期化
+
+        Args:
+            name: 依存先の名前
+            failure_rate: 開く失敗の割合（0〜1）
+            min_calls: 判定に必要な呼び出し数
+            window: 失敗の割合を求める直近の呼び出し数
+            open_seconds: 開いている時間（秒）
+            half_open_calls: half_open で同時に許可する試行の数
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self.state = CLOSED
+        self._results = deque(maxlen=max(window, self.min_calls))
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        self._results.clear()
+        self._probes = 0
+        REGISTRY.inc('hpb_circuit_transitions_total', dependency=self.name, state=state)
+
+    def retry_after(self) -> int:
+        """再び呼び出せるようになるまでの目安（秒）"""
+        return max(1, math.ceil(self._opened_at + self.open_seconds - time.monotonic()))
+
+    def allow(self):
+        """依存先を呼び出す前に確認する（呼び出した場合は結果を必ず記録する）
+
+        Raises:
+            CircuitOpenError: 開いている場合、half_open で試行中の場合
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            if self.state == CLOSED:
+                return
+        REGISTRY.inc('hpb_circuit_rejected_total', dependency=self.name)
+        raise CircuitOpenError(self.name, self.retry_after() if self.state == OPEN else 1)
+
+    def record_success(self):
+        """呼び出しの成功を記録する"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+            elif self.state == CLOSED:
+                self._results.append(True)
+
+    def record_failure(self):
+        """呼び出しの失敗を記録する"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN)
+            elif self.state == CLOSED:
+                self._results.append(False)
+                failures = self._results.count(False)
+                if len(self._results) >= self.min_calls and failures / len(self._results) >= self.failure_rate:
+                    self._transition(OPEN)
+
+    def record_neutral(self):
+        """依存先の状態を判定できない呼び出しを記録する（half_open の試行枠を戻す）"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    @contextmanager
+    def guard(self):
+        """ブロック内の依存先の呼び出しを保護する
+
+        例外を送出した場合は失敗として記録する。ただし制限時間による打ち切り（DeadlineExceeded）と
+        キャンセル（CancelledError などの Exception 以外の例外）は判定せずに試行枠だけを戻す。
+
+        Raises:
+            CircuitOpenError: 開いている場合（ブロックは実行しない）
+        """
+        self.allow()
+        try:
+            yield
+        except DeadlineExceeded:
+            self.record_neutral()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.record_neutral()
+            raise
+        self.record_success()
+
+    def stats(self) -> Dict:
+        """ブレーカーの状況を返す"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'calls': len(self._results),
+                'failures': self._results.count(False)
+            }
+
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(app, name: str) -> Optional[CircuitBreaker]:
+    """依存先のサーキットブレーカーを取得する（無効な場合はNone）
+
+    Args:
+        app: Flaskアプリケーション
+        name: 依存先の名前（hpb, gemini, sb_login）
+
+    Returns:
+        Optional[CircuitBreaker]: サーキットブレーカー
+    """
+    if not app.config.get('CIRCUIT_BREAKER_ENABLED', False):
+        return None
+
+    breakers = app.extensions.setdefault('circuit_breakers', {})
+    breaker = breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name,
+                    failure_rate=app.config.get('CIRCUIT_FAILURE_RATES', {}).get(name, 0.5),
+                    min_calls=app.config.get('CIRCUIT_MIN_CALLS', 5),
+                    window=app.config.get('CIRCUIT_WINDOW', 20),
+                    open_seconds=app.config.get('CIRCUIT_OPEN_SECONDS', 30)
+                )
+                breakers[name] = breaker
+                # 状態ごとに0/1を出力する（複数のワーカーの値の合計がその状態のワーカー数になる）
+                REGISTRY.register_collector(f'circuit.{name}', lambda: [
+                    ('hpb_circuit_state', {'dependency': name, 'state': state}, int(breaker.state == state))
+                    for state in (CLOSED, OPEN, HALF_OPEN)
+                ])
+    return breaker
+
+def circuit_guard(name: str):
+    """現在のアプリケーションの依存先のサーキットブレーカーで呼び出しを保護する
+
+    Args:
+        name: 依存先の名前（hpb, gemini, sb_login）
+
+    Returns:
+        コンテキストマネージャ（サーキットブレーカーが無効な場合は何もしない）
+    """
+    breaker = get_circuit_breaker(current_app._get_current_object(), name)
+    return breaker.guard() if breaker is not None else nullcontext()
@@ -0,0 +1,64 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """リクエスト全体の制限時間を超えた"""
+
+
+class Deadline:
+    """リクエスト全体の制限時間を表すクラス
+
+    ルートで作成して各処理（スクレイピングのページ取得、Gemini API呼び出しなど）に渡し、
+    各処理は残り時間からタイムアウトを決める。1つの依存先が応答しなくても、
+    ワーカーが制限時間を超えて塞がれないようにする。
+    """
+
+    def __init__(self, seconds: float, parent: Optional['Deadline'] = None):
+        """初期化
+
+        Args:
+            seconds: 制限時間（秒）
+            parent: 親の制限時間（指定時は親の期限を超えない）
+        """
+        expires_at = time.monotonic() + max(seconds, 0)
+        if parent is not None:
+            expires_at = min(expires_at, parent.expires_at)
+        self.expires_at = expires_at
+
+    def remaining(self) -> float:
+        """残り時間（秒、期限切れの場合は0）"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """期限切れかどうか"""
+        return time.monotonic() >= self.expires_at
+
+    def child(self, seconds: float) -> 'Deadline':
+        """この期限を超えない、処理ごとの制限時間を作成する
+
+        Args:
+            seconds: 処理に割り当てる時間（秒）
+
+        Returns:
+            Deadline: 処理の制限時間
+        """
+        return Deadline(seconds, parent=self)
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """残り時間から処理のタイムアウト（秒）を求める
+
+        Args:
+            cap: タイムアウトの上限（1回のページ取得の上限など）
+
+        Returns:
+            float: タイムアウト（秒）
+
+        Raises:
+            DeadlineExceeded: 期限切れの場合
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded('制限時間を超えました')
+        return remaining if cap is None else min(remaining, cap)
@@ -2,6 +2,9 @@ import os
 import uuid
 from werkzeug.utils import secure_filename
 from flask import current_app
+from .images import file_content_hash
+from .metrics import REGISTRY
+from .upload_guard import SNIFF_BYTES, sniff_image_type
 
 def save_uploaded_image(file, upload_folder=None):
     """アップロードされた画像を一時ディレクトリに保存する
@@ -11,7 +14,7 @@ def save_uploaded_image(file, upload_folder=None):
         upload_folder: 保存先ディレクトリ（指定がなければconfigから取得）
 
     Returns:
-        dict: 保存された画像の情報（filename, original_filename, path, placeholder）
+        dict: 保存された画像の情報（filename, original_filename, path, content_hash, placeholder）
     """
     if upload_folder is None:
         upload_folder = current_app.config['UPLOAD_FOLDER']
@@ -31,6 +34,10 @@ def save_uploaded_image(file, upload_folder=None):
     
     # ファイルを保存
     file.save(file_path)
+    REGISTRY.inc('hpb_upload_bytes_total', os.path.getsize(file_path))
+    
+    # プレビューのキャッシュキーとして内容ハッシュを計算
+    content_hash = file_content_hash(file_path)
     
     # プレースホルダー名を生成（[IMAGE_N]形式）
     # 実際のインデックスは呼び出し元で設定する必要がある
@@ -40,6 +47,7 @@ def save_uploaded_image(file, upload_folder=None):
         'filename': unique_filename,
         'original_filename': original_filename,
         'path': file_path,
+        'content_hash': content_hash,
         'placeholder': placeholder
     }
 
@@ -60,15 +68,26 @@ def delete_temp_file(file_path):
 def is_valid_image(file):
     """有効な画像ファイルかどうかを検証する
 
+    クライアントが送信したMIMEタイプではなく、先頭バイトで形式を判定する。
+
     Args:
         file: FileStorage オブジェクト
 
     Returns:
         bool: 有効な画像の場合はTrue
     """
-    # MIMEタイプをチェック
-    allowed_types = {'image/jpeg', 'image/png', 'image/gif', 'image/webp'}
-    return file.content_type in allowed_types
+    # 受信時に判定済みの場合はその結果を使用
+    detected_type = getattr(file.stream, 'detected_type', None)
+    if detected_type:
+        return True
+    
+    try:
+        position = file.stream.tell()
+        head = file.stream.read(SNIFF_BYTES)
+        file.stream.seek(position)
+    except (AttributeError, OSError):
+        return False
+    return sniff_image_type(head) is not None
 
 def clean_session_images(session_images, upload_folder=None):
     """セッションに保存されている画像の一時ファイルを削除する
@@ -83,3 +102,23 @@ def clean_session_images(session_images, upload_folder=None):
     for img in session_images:
         if 'path' in img:
             delete_temp_file(img['path'])
+
+def touch_session_images(session_images):
+    """セッションが参照している一時ファイルの最終利用時刻を更新する
+
+    一時ファイルスイーパーは更新時刻をもとに、ライブセッションが
+    参照中のファイルを判定する。
+
+    Args:
+        session_images: セッションに保存されている画像情報のリスト
+    """
+    if not session_images:
+        return
+    
+    for img in session_images:
+        if 'path' in img:
+            try:
+                os.utime(img['path'], None)
+            except OSError:
+                # 既に削除されている場合は何もしない
+                pass
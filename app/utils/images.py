@@ -0,0 +1,188 @@
+import os
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# サムネイルキャッシュのディレクトリ名（UPLOAD_FOLDER配下）
+THUMBNAIL_DIRNAME = 'thumbnails'
+
+# サロンボードへのアップロード用に縮小した画像のディレクトリ名（UPLOAD_FOLDER配下）
+SB_UPLOAD_DIRNAME = 'sb_uploads'
+
+# プレビュー用サムネイルのサイズ（長辺のピクセル数）
+THUMBNAIL_SIZES = {
+    'small': 160,
+    'medium': 480,
+    'large': 1024
+}
+
+# 画像のデコード検証に使用するスレッドプール
+_verify_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='image-verify')
+
+def file_content_hash(path, chunk_size=64 * 1024):
+    """ファイル内容のSHA-256ハッシュを計算する
+
+    Args:
+        path: 対象ファイルのパス
+        chunk_size: 一度に読み込むバイト数
+
+    Returns:
+        str: 16進数表記のハッシュ値
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_thumbnail(src_path, content_hash, size_name, cache_dir):
+    """サムネイル画像のパスを取得する（キャッシュがなければ生成する）
+
+    サムネイルは元画像の内容ハッシュをキーにディスクへキャッシュする。
+
+    Args:
+        src_path: 元画像のパス
+        content_hash: 元画像の内容ハッシュ
+        size_name: サムネイルサイズ名（THUMBNAIL_SIZESのキー）
+        cache_dir: キャッシュディレクトリ
+
+    Returns:
+        tuple: (サムネイルのパス, キャッシュヒットしたかどうか)
+    """
+    from PIL import Image, ImageOps
+    
+    edge = THUMBNAIL_SIZES[size_name]
+    thumb_path = os.path.join(cache_dir, f"{content_hash}_{size_name}.jpg")
+
+    if os.path.exists(thumb_path):
+        # スイーパーのLRU判定用に最終利用時刻を更新
+        try:
+            os.utime(thumb_path, None)
+            return thumb_path, True
+        except FileNotFoundError:
+            # 走査中に削除された場合は再生成する
+            pass
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with Image.open(src_path) as img:
+        # EXIFの回転情報を反映してから縮小
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((edge, edge))
+
+        # 書き込み途中のファイルを配信しないよう一時ファイル経由で置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, format='JPEG', quality=80, optimize=True)
+            os.replace(tmp_path, thumb_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    return thumb_path, False
+
+def prepare_upload_image(src_path, max_edge, max_bytes, quality, cache_dir):
+    """サロンボードにアップロードする画像を上限サイズ内に縮小する
+
+    長辺とファイルサイズが上限内のJPEG・PNG・GIFはそのまま使用する。
+    上限を超える画像は縮小・再圧縮したJPEGを元画像の内容ハッシュをキーに
+    キャッシュし、同じ画像を再投稿する場合は再利用する。
+
+    Args:
+        src_path: 元画像のパス
+        max_edge: 長辺の上限（ピクセル）
+        max_bytes: ファイルサイズの上限（バイト）
+        quality: JPEGの画質（上限を超える場合は段階的に下げる）
+        cache_dir: 縮小した画像の保存先ディレクトリ
+
+    Returns:
+        str: アップロードする画像のパス
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as img:
+        if (img.format in ('JPEG', 'PNG', 'GIF') and max(img.size) <= max_edge
+                and os.path.getsize(src_path) <= max_bytes):
+            return src_path
+
+        out_path = os.path.join(cache_dir, f"{file_content_hash(src_path)}_{max_edge}.jpg")
+        if os.path.exists(out_path):
+            try:
+                os.utime(out_path, None)
+                return out_path
+            except FileNotFoundError:
+                pass
+
+        # EXIFの回転情報を反映してから縮小（透過部分は白で塗りつぶす）
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    f.seek(0)
+                    f.truncate()
+                    img.save(f, format='JPEG', quality=quality, optimize=True)
+                    if f.tell() <= max_bytes or quality <= 50:
+                        break
+                    quality -= 10
+            os.replace(tmp_path, out_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    return out_path
+
+def _verify_image_stream(stream):
+    """ストリームの画像を完全にデコードできるか検証する
+
+    Args:
+        stream: 画像データのストリーム
+
+    Returns:
+        bool: デコードできた場合はTrue
+    """
+    from PIL import Image
+    
+    try:
+        stream.seek(0)
+        with Image.open(stream) as img:
+            # verify()で構造を検査した後、load()で画素データまで復号する
+            img.verify()
+        stream.seek(0)
+        with Image.open(stream) as img:
+            img.load()
+        return True
+    except Exception:
+        return False
+    finally:
+        stream.seek(0)
+
+def verify_images(files):
+    """アップロードされた画像をスレッドプールで並列に検証する
+
+    サイズや先頭バイトの検査を通過したファイルに対してのみ呼び出す想定。
+
+    Args:
+        files: FileStorage オブジェクトのリスト
+
+    Returns:
+        List[bool]: 各ファイルの検証結果
+    """
+    if not files:
+        return []
+    return list(_verify_executor.map(_verify_image_stream, [file.stream for file in files]))
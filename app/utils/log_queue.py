@@ -0,0 +1,154 @@
+import os
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List
+from .metrics import REGISTRY
+
+REGISTRY.describe('hpb_log_dropped_total', 'counter', 'ログのキューが満杯のため破棄したログの数')
+
+class DrainingQueueListener(QueueListener):
+    """キューからハンドラに書き込むリスナー
+
+    スレッドは最初のログをキューに追加した時点で起動する（gunicorn の --preload のように
+    create_app() の後にforkした場合も、各ワーカーで起動するように）。停止時はキューが満杯でも
+    書き込み済みの分を待って停止する。
+    """
+
+    def __init__(self, log_queue, *handlers, respect_handler_level=False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.started = False
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        """このプロセスでスレッドを起動していなければ起動する"""
+        if self.started:
+            return
+        with self._start_lock:
+            if not self.started:
+                self.start()
+                self.started = True
+
+    def enqueue_sentinel(self):
+        # 既定の put_nowait はキューが満杯の場合に queue.Full を送出する
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        with self._start_lock:
+            if self.started:
+                super().stop()
+                self.started = False
+
+    def reset_after_fork(self):
+        """fork後の子プロセスで、親プロセスのスレッドとキューの状態を引き継がないようにする"""
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._thread = None
+        self.started = False
+        self._start_lock = threading.Lock()
+
+class DroppingQueueHandler(QueueHandler):
+    """キューが満杯の場合はログを破棄するキューハンドラ（リクエストのスレッドを待たせない）"""
+
+    def __init__(self, listener: DrainingQueueListener):
+        super().__init__(listener.queue)
+        self.listener = listener
+
+    def enqueue(self, record):
+        self.listener.ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            REGISTRY.inc('hpb_log_dropped_total')
+
+_listeners: Dict[str, DrainingQueueListener] = {}
+_queue_handlers: Dict[str, DroppingQueueHandler] = {}
+_listeners_lock = threading.Lock()
+
+def _reset_after_fork():
+    for name, listener in _listeners.items():
+        listener.reset_after_fork()
+        _queue_handlers[name].queue = listener.queue
+    global _listeners_lock
+    _listeners_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def queue_logger(logger: logging.Logger, handlers: List[logging.Handler], max_size: int = 10000) -> QueueListener:
+    """ロガーの出力をキュー経由にし、ハンドラの書き込みをバックグラウンドのスレッドで行う
+
+    ロガーにはキューに追加するハンドラのみを設定する。同じロガーに対して
+    再度呼び出した場合は、起動済みのリスナーに新しいハンドラを移す
+    （同じファイルに書き込むハンドラは重複して追加しない）。
+    stop_log_queues() で元のハンドラに戻す。
+
+    Args:
+        logger: 対象のロガー
+        handlers: 実際に書き込むハンドラ（ファイル・標準エラー出力など）
+        max_size: キューに保持するログの最大数（超えた分は破棄する）
+
+    Returns:
+        QueueListener: キューからハンドラに書き込むリスナー
+    """
+    with _listeners_lock:
+        listener = _listeners.get(logger.name)
+        if listener is not None:
+            files = {getattr(handler, 'baseFilename', None) for handler in listener.handlers} - {None}
+            for handler in handlers:
+                logger.removeHandler(handler)
+                if getattr(handler, 'baseFilename', None) in files:
+                    handler.close()
+                elif handler not in listener.handlers:
+                    listener.handlers += (handler,)
+            return listener
+
+        if not _listeners:
+            # 終了時にキューに残っているログを書き込む
+            atexit.register(stop_log_queues)
+        listener = DrainingQueueListener(queue.Queue(max_size), *handlers, respect_handler_level=True)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        queue_handler = DroppingQueueHandler(listener)
+        logger.addHandler(queue_handler)
+        _listeners[logger.name] = listener
+        _queue_handlers[logger.name] = queue_handler
+        return listener
+
+def stop_log_queues():
+    """キューに残っているログを書き込んでリスナーを停止し、ロガーのハンドラを元に戻す"""
+    with _listeners_lock:
+        for name, listener in _listeners.items():
+            logger = logging.getLogger(name)
+            logger.removeHandler(_queue_handlers[name])
+            for handler in listener.handlers:
+                logger.addHandler(handler)
+            listener.stop()
+        _listeners.clear()
+        _queue_handlers.clear()
+
+def init_log_queue(app):
+    """アプリケーションのログ出力をキュー経由にする（LOG_QUEUE_ENABLED）
+
+    アプリケーションのロガーと遅いリクエストのロガーの書き込み（標準エラー出力・ファイル）を
+    バックグラウンドのスレッドに移し、リクエストのスレッドがログのI/Oを待たないようにする。
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    if not app.config.get('LOG_QUEUE_ENABLED', False):
+        return
+
+    max_size = app.config.get('LOG_QUEUE_SIZE', 10000)
+    # app.logger の初回参照時に Flask の既定のハンドラ（標準エラー出力）が設定される
+    loggers = [app.logger, logging.getLogger(f'{app.import_name}.slow_requests')]
+    for logger in loggers:
+        for handler in list(logger.handlers):
+            if isinstance(handler, DroppingQueueHandler) and _queue_handlers.get(logger.name) is not handler:
+                # 停止済みのリスナーのキューハンドラ（読み出されないキューにログを追加しないように）
+                logger.removeHandler(handler)
+        handlers = [handler for handler in logger.handlers if not isinstance(handler, QueueHandler)]
+        if handlers:
+            queue_logger(logger, handlers, max_size)
+    app.extensions['log_queue'] = dict(_listeners)
@@ -0,0 +1,428 @@
+import os
+import json
+import time
+import hmac
+import bisect
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from flask import g, redirect, request, session, url_for
+
+# 所要時間のヒストグラムのバケット（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# ゲージの値: (メトリクス名, ラベル, 値)
+GaugeSample = Tuple[str, Dict[str, str], float]
+
+def _key(name: str, labels: Dict) -> Tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+def _encode_key(key: Tuple) -> str:
+    return json.dumps([key[0], [list(item) for item in key[1]]], ensure_ascii=False)
+
+def _decode_key(value: str) -> Tuple:
+    name, labels = json.loads(value)
+    return (name, tuple(tuple(item) for item in labels))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class MetricsRegistry:
+    """Prometheus形式のメトリクスを集計するレジストリ
+
+    カウンタとヒストグラムはスレッドごとの辞書に加算し（ホットパスでロックを取らない）、
+    収集時にすべてのスレッドの値を合計する。終了したスレッドの値は収集時に退避する。
+    複数のワーカープロセスで実行する場合は、各プロセスが定期的に自分の値を
+    directory に pid ごとのファイルとして書き出し、/metrics を処理したプロセスが
+    すべてのファイルを合計して出力する（ゲージは実行中のプロセスの値のみ合計する）。
+    """
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._meta: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._local = threading.local()
+        self._stores: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        self._collectors: Dict[str, Tuple[Callable[[], Iterable[GaugeSample]], bool]] = {}
+        self._pid: Optional[int] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """メトリクスを定義する
+
+        Args:
+            name: メトリクス名
+            kind: counter, histogram, gauge のいずれか
+            help_text: 説明
+            buckets: ヒストグラムのバケットの上限
+        """
+        self._meta[name] = (kind, help_text, tuple(buckets))
+
+    def register_collector(self, name: str, collector: Callable[[], Iterable[GaugeSample]], per_process: bool = True):
+        """収集時にゲージの値を返す関数を登録する（同じ名前の関数は置き換える）
+
+        Args:
+            name: 関数の識別名
+            collector: (メトリクス名, ラベル, 値) を返す関数
+            per_process: プロセスごとの値（プール・スケジューラの状況など）の場合はTrue、
+                全プロセスで共通の値（一時ディレクトリのサイズなど）の場合はFalse
+                （/metrics を処理したプロセスでのみ収集する）
+        """
+        self._collectors[name] = (collector, per_process)
+
+    def _store(self) -> Dict:
+        """現在のスレッドの集計用の辞書を取得する"""
+        if self._pid != os.getpid():
+            self._ensure_process()
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = {}
+            with self._lock:
+                self._stores.append((threading.current_thread(), store))
+            self._local.store = store
+        return store
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """カウンタを加算する"""
+        store = self._store()
+        key = _key(name, labels)
+        store[key] = store.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """ヒストグラムに値を記録する"""
+        buckets = self._meta[name][2]
+        store = self._store()
+        key = _key(name, labels)
+        histogram = store.get(key)
+        if histogram is None:
+            # バケットごとの件数（最後は +Inf）と合計
+            histogram = store[key] = [0] * (len(buckets) + 1) + [0.0]
+        histogram[bisect.bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    @staticmethod
+    def _merge(target: Dict, key: Tuple, value):
+        current = target.get(key)
+        if isinstance(value, list):
+            target[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = (current or 0) + value
+
+    def _ensure_process(self):
+        """プロセスで最初に使用する際に初期化する
+
+        フォーク後の子プロセスでは親プロセスの値を引き継がず、同じpidの以前のプロセスが
+        書き出した値を引き継ぐ（pidの再利用でカウンタが減らないように）。
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stores = []
+            self._retired = {}
+            self._local = threading.local()
+            self._flusher = None
+            self._stop_event = threading.Event()
+            snapshot = self._read_snapshot(self._snapshot_path(self._pid)) if self.directory else None
+            for key, value in (snapshot or {}).get('values', {}).items():
+                self._merge(self._retired, _decode_key(key), value)
+
+    def values(self) -> Dict[Tuple, object]:
+        """このプロセスのカウンタとヒストグラムの値を合計して返す"""
+        self._ensure_process()
+        with self._lock:
+            alive = []
+            for thread, store in self._stores:
+                if thread.is_alive():
+                    alive.append((thread, store))
+                else:
+                    for key, value in list(store.items()):
+                        self._merge(self._retired, key, value)
+            self._stores = alive
+            merged: Dict[Tuple, object] = {}
+            for key, value in self._retired.items():
+                self._merge(merged, key, value)
+            for _, store in alive:
+                for key, value in list(store.items()):
+                    self._merge(merged, key, value)
+        return merged
+
+    def _collect(self, per_process: bool) -> Dict[Tuple, float]:
+        """登録された関数からゲージの値を収集する"""
+        gauges: Dict[Tuple, float] = {}
+        for collector, collector_per_process in list(self._collectors.values()):
+            if collector_per_process != per_process:
+                continue
+            try:
+                for name, labels, value in collector():
+                    self._merge(gauges, _key(name, labels), value)
+            except Exception:
+                # 収集に失敗したゲージは出力しない
+                continue
+        return gauges
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def write_snapshot(self):
+        """このプロセスの値をファイルに書き出す"""
+        if not self.directory:
+            return
+        snapshot = {
+            'values': {_encode_key(key): value for key, value in self.values().items()},
+            'gauges': {_encode_key(key): value for key, value in self._collect(per_process=True).items()},
+            'updated_at': time.time()
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self._snapshot_path(os.getpid()))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _read_snapshot(path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _flush_loop(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.write_snapshot()
+            except Exception:
+                pass
+
+    def ensure_flusher(self, interval: float):
+        """値を定期的に書き出すスレッドを起動する（フォーク後の子プロセスでは改めて起動する）"""
+        self._ensure_process()
+        if self._flusher is not None or not self.directory or interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_loop, args=(interval,), name='metrics-flusher', daemon=True
+            )
+            self._flusher.start()
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def aggregate(self) -> Tuple[Dict[Tuple, object], Dict[Tuple, float]]:
+        """全プロセスの値を合計する
+
+        Returns:
+            tuple: (カウンタとヒストグラムの値, ゲージの値)
+        """
+        values = self.values()
+        gauges = self._collect(per_process=True)
+        if self.directory:
+            try:
+                entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+            except FileNotFoundError:
+                entries = []
+            for entry in entries:
+                pid = entry.name[:-len('.json')]
+                if not pid.isdigit() or int(pid) == os.getpid():
+                    continue
+                snapshot = self._read_snapshot(entry.path)
+                if snapshot is None:
+                    continue
+                # 終了したプロセスのカウンタは合計に残し、ゲージは除く
+                for key, value in snapshot.get('values', {}).items():
+                    self._merge(values, _decode_key(key), value)
+                if self._pid_alive(int(pid)):
+                    for key, value in snapshot.get('gauges', {}).items():
+                        self._merge(gauges, _decode_key(key), value)
+        for key, value in self._collect(per_process=False).items():
+            self._merge(gauges, key, value)
+        return values, gauges
+
+    def render(self) -> str:
+        """全プロセスの値をPrometheusのテキスト形式で出力する"""
+        values, gauges = self.aggregate()
+        series: Dict[str, List[Tuple[Tuple, object]]] = {}
+        for key, value in list(values.items()) + list(gauges.items()):
+            series.setdefault(key[0], []).append((key[1], value))
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text, buckets = self._meta.get(name, ('gauge', '', DEFAULT_BUCKETS))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(series[name]):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + [float('inf')], value[:-1]):
+                    cumulative += count
+                    bucket_labels = list(labels) + [('le', _format_value(bound))]
+                    lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+# アプリケーション全体で共有するレジストリ
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('hpb_request_duration_seconds', 'histogram', 'リクエストの所要時間（エンドポイントごと）')
+REGISTRY.describe('hpb_requests_total', 'counter', 'リクエスト数（エンドポイント・ステータスごと）')
+REGISTRY.describe('hpb_stage_duration_seconds', 'histogram', '処理段階（スクレイピング・Gemini・自動投稿）の所要時間')
+REGISTRY.describe('hpb_cache_requests_total', 'counter', 'キャッシュの参照数（hit / miss）')
+REGISTRY.describe('hpb_upload_bytes_total', 'counter', '受信した画像のバイト数')
+REGISTRY.describe('hpb_temp_dir_bytes', 'gauge', '一時アップロードディレクトリの合計サイズ')
+REGISTRY.describe('hpb_sb_jobs', 'gauge', '自動投稿ジョブ数（待機中・実行中）')
+REGISTRY.describe('hpb_sb_max_parallel', 'gauge', '自動投稿の同時実行数の上限')
+REGISTRY.describe('hpb_browser_pool_contexts', 'gauge', 'ブラウザプールのコンテキスト数（使用中・空き待ち・上限）')
+REGISTRY.describe('hpb_post_queue_jobs', 'gauge', '投稿キューのジョブ数（状態ごと）')
+
+def record_cache(cache: str, hit: bool):
+    """キャッシュの参照結果を記録する
+
+    Args:
+        cache: キャッシュ名
+        hit: キャッシュヒットしたかどうか
+    """
+    REGISTRY.inc('hpb_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+def _stage_name(name: str) -> str:
+    """スパン名から段階名を求める（upload_image[2] などの番号を除く）"""
+    return name.split('[', 1)[0]
+
+def _directory_bytes(directories: Iterable[str]) -> int:
+    total = 0
+    for directory in directories:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            continue
+    return total
+
+def _authorized(app) -> bool:
+    """/metrics へのアクセスを許可するかどうか（ログイン済み、またはトークンが一致）"""
+    token = app.config.get('METRICS_TOKEN')
+    if token:
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer ') and hmac.compare_digest(header[len('Bearer '):], token):
+            return True
+    return bool(session.get('logged_in'))
+
+def init_metrics(app, registry: MetricsRegistry = REGISTRY):
+    """メトリクスの収集と /metrics エンドポイントを設定する
+
+    Args:
+        app: Flaskアプリケーション
+        registry: メトリクスのレジストリ
+    """
+    if not app.config.get('METRICS_ENABLED', False):
+        return
+
+    from .images import SB_UPLOAD_DIRNAME, THUMBNAIL_DIRNAME
+
+    registry.directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+    flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+    app.extensions['metrics'] = registry
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        # テスト時は書き出しのスレッドを起動しない
+        registry.ensure_flusher(0 if app.testing else flush_interval)
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        started = g.get('metrics_started')
+        if started is None:
+            return
+        endpoint = request.endpoint or 'unknown'
+        registry.observe('hpb_request_duration_seconds', time.perf_counter() - started,
+                         endpoint=endpoint, method=request.method)
+        status = g.get('metrics_status', 500 if exc else 0)
+        registry.inc('hpb_requests_total', endpoint=endpoint, status=f'{status // 100}xx')
+        timer = g.get('request_timer')
+        if timer is not None:
+            for span in timer.spans:
+                registry.observe('hpb_stage_duration_seconds', span['duration_ms'] / 1000,
+                                 stage=_stage_name(span['name']))
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    def temp_dir_gauges():
+        upload_folder = app.config['UPLOAD_FOLDER']
+        directories = [
+            upload_folder,
+            os.path.join(upload_folder, THUMBNAIL_DIRNAME),
+            os.path.join(upload_folder, SB_UPLOAD_DIRNAME)
+        ]
+        yield 'hpb_temp_dir_bytes', {}, _directory_bytes(directories)
+
+    def automation_gauges():
+        engine = app.extensions.get('sb_automation_engine')
+        if engine is None:
+            return
+        stats = engine.stats(timeout=2)
+        scheduler = stats['scheduler']
+        yield 'hpb_sb_jobs', {'state': 'queued'}, scheduler['queued']
+        yield 'hpb_sb_jobs', {'state': 'running'}, scheduler['running']
+        yield 'hpb_sb_max_parallel', {}, scheduler['max_parallel']
+        pool = stats.get('pool')
+        if pool is not None:
+            yield 'hpb_browser_pool_contexts', {'state': 'busy'}, pool['busy']
+            yield 'hpb_browser_pool_contexts', {'state': 'waiting'}, pool['waiting']
+            yield 'hpb_browser_pool_contexts', {'state': 'capacity'}, pool['size'] * pool['contexts_per_browser']
+
+    def post_queue_gauges():
+        queue = app.extensions.get('sb_post_queue')
+        if queue is None:
+            return
+        for status, count in queue.stats().items():
+            yield 'hpb_post_queue_jobs', {'status': status}, count
+
+    registry.register_collector('temp_dir', temp_dir_gauges, per_process=False)
+    registry.register_collector('post_queue', post_queue_gauges, per_process=False)
+    registry.register_collector('automation', automation_gauges, per_process=True)
+
+    @app.route('/metrics')
+    def metrics():
+        if not _authorized(app):
+            if app.config.get('METRICS_TOKEN'):
+                return 'Unauthorized', 401
+            return redirect(url_for('auth.login'))
+        return app.response_class(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,290 @@
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, Optional
+from flask import current_app, has_app_context
+from .metrics import REGISTRY
+
+REGISTRY.describe('hpb_selectors_reloads_total', 'counter', 'selectors.json の再読み込み数（結果ごと）')
+
+# ブラウザ操作のセレクタのセクション（値はPlaywrightのセレクタ文字列）
+SB_SELECTOR_SECTIONS = ('login', 'navigation', 'blog_form')
+
+class SelectorValidationError(ValueError):
+    """セレクタ設定の内容が不正"""
+
+class SelectorSet:
+    """検証済みのセレクタ設定（読み込み後は変更しない）
+
+    HPBのスクレイピングで使用するCSSセレクタはコンパイルして css に保持する。
+    soupsieve（bs4）の読み込みは重いため、起動時の読み込みでは構造のみを検証し、
+    CSSセレクタは起動後にバックグラウンドで検証する（SelectorRegistry.validate()）。
+    再読み込み時は置き換える前にすべてコンパイルして検証する。
+    """
+
+    def __init__(self, data: Dict, version: Optional[int] = None, compile_css: bool = True):
+        """初期化
+
+        Args:
+            data: selectors.json の内容
+            version: 読み込んだファイルの更新時刻（ナノ秒、ファイル以外から作成した場合はNone）
+            compile_css: CSSセレクタをコンパイルして検証するかどうか
+
+        Raises:
+            SelectorValidationError: 内容が不正な場合
+        """
+        self.data = data
+        self.version = version
+        self.compile_css = compile_css
+        self.css: Dict = {}
+        self._validate()
+
+    def compiled(self, selector: str):
+        """CSSセレクタのコンパイル済みパターンを取得する
+
+        Args:
+            selector: CSSセレクタ
+
+        Returns:
+            soupsieve.SoupSieve: コンパイル済みのパターン
+        """
+        pattern = self.css.get(selector)
+        if pattern is None:
+            import soupsieve
+            pattern = self.css[selector] = soupsieve.compile(selector)
+        return pattern
+
+    def _check_css(self, path: str, selector) -> None:
+        if not isinstance(selector, str) or not selector.strip():
+            raise SelectorValidationError(f'{path} が空です')
+        if not self.compile_css:
+            return
+        import soupsieve
+        # スクレイピングではカンマ区切りのセレクタを個別に適用するため、それぞれをコンパイルする
+        for part in [selector] + [s.strip() for s in selector.split(',')]:
+            try:
+                self.compiled(part)
+            except soupsieve.SelectorSyntaxError as e:
+                raise SelectorValidationError(f'{path} のセレクタが不正です: {e}')
+
+    def _validate(self):
+        if not isinstance(self.data, dict):
+            raise SelectorValidationError('セレクタ設定はオブジェクトである必要があります')
+
+        hpb = self.data.get('hpb', {})
+        if not isinstance(hpb, dict):
+            raise SelectorValidationError('hpb はオブジェクトである必要があります')
+        for page, settings in hpb.items():
+            if not isinstance(settings, dict):
+                raise SelectorValidationError(f'hpb.{page} はオブジェクトである必要があります')
+            for key, value in settings.items():
+                if key.endswith('_selector'):
+                    self._check_css(f'hpb.{page}.{key}', value)
+                elif not isinstance(value, str):
+                    raise SelectorValidationError(f'hpb.{page}.{key} は文字列である必要があります')
+
+        sb = self.data.get('sb', {})
+        if not isinstance(sb, dict):
+            raise SelectorValidationError('sb はオブジェクトである必要があります')
+        for section in SB_SELECTOR_SECTIONS:
+            selectors = sb.get(section, {})
+            if not isinstance(selectors, dict):
+                raise SelectorValidationError(f'sb.{section} はオブジェクトである必要があります')
+            for key, value in selectors.items():
+                if not isinstance(value, str) or not value.strip():
+                    raise SelectorValidationError(f'sb.{section}.{key} が空です')
+        ready = sb.get('ready', {})
+        if not isinstance(ready, dict):
+            raise SelectorValidationError('sb.ready はオブジェクトである必要があります')
+        for step, signal in ready.items():
+            if not isinstance(signal, dict):
+                raise SelectorValidationError(f'sb.ready.{step} はオブジェクトである必要があります')
+            for key in ('response', 'url'):
+                if key in signal:
+                    try:
+                        re.compile(signal[key])
+                    except (re.error, TypeError) as e:
+                        raise SelectorValidationError(f'sb.ready.{step}.{key} の正規表現が不正です: {e}')
+            if 'element' in signal and (not isinstance(signal['element'], str) or '.' not in signal['element']):
+                raise SelectorValidationError(f'sb.ready.{step}.element は「セクション.キー」の形式である必要があります')
+        if not isinstance(sb.get('http', {}), dict):
+            raise SelectorValidationError('sb.http はオブジェクトである必要があります')
+
+class SelectorRegistry:
+    """selectors.json を監視し、変更されたら再読み込みするレジストリ
+
+    ファイルの更新時刻は check_interval 秒に1回だけ確認する（stat のみ）。変更されていれば
+    読み込んで検証し、問題がなければ現在の設定を新しい SelectorSet に置き換える
+    （参照の置き換えのみのため、実行中の処理は読み込み済みの設定をそのまま使える）。
+    検証に失敗した場合は以前の設定を使い続ける。ワーカーの再起動なしにセレクタを修正できる。
+    起動時に読み込んだ設定のCSSセレクタは validate() で検証する。
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0, logger=None):
+        """初期化（ファイルを読み込めない場合は空の設定で開始する）
+
+        Args:
+            path: selectors.json のパス
+            check_interval: 更新を確認する間隔（秒、0以下で確認しない）
+            logger: ログ出力先
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.logger = logger
+        self._current = SelectorSet({}, compile_css=False)
+        self._checked_at = 0.0
+        self._seen_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _log(self, level: str, message: str):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
+
+    @property
+    def current(self) -> SelectorSet:
+        """現在の設定（更新の確認は行わない）"""
+        return self._current
+
+    def reload(self) -> bool:
+        """ファイルが変更されていれば読み込む
+
+        Returns:
+            bool: 新しい設定に置き換えたかどうか
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                version = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                if self._seen_version != -1:
+                    self._log('error', f"セレクタ設定の読み込みに失敗しました: {e}")
+                    self._seen_version = -1
+                return False
+            if version == self._seen_version:
+                return False
+            initial = self._seen_version is None
+            # 不正なファイルを確認のたびに読み込まないよう、結果に関わらず確認済みとする
+            self._seen_version = version
+
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    # 起動時はCSSセレクタのコンパイルを初回の使用時まで遅らせる
+                    selector_set = SelectorSet(json.load(f), version, compile_css=not initial)
+            except (OSError, ValueError) as e:
+                REGISTRY.inc('hpb_selectors_reloads_total', result='invalid')
+                self._log('error', f"セレクタ設定の読み込みに失敗しました（以前の設定を使用します）: {e}")
+                return False
+
+            self._current = selector_set
+        if not initial:
+            REGISTRY.inc('hpb_selectors_reloads_total', result='ok')
+            self._log('info', f"セレクタ設定を再読み込みしました: {self.path}")
+        return True
+
+    def validate(self) -> SelectorSet:
+        """起動時に読み込んだ設定のCSSセレクタをすべてコンパイルして検証する
+
+        検証済みの設定（再読み込みした設定を含む）の場合は何もしない。
+
+        Returns:
+            SelectorSet: 検証済みの設定
+
+        Raises:
+            SelectorValidationError: CSSセレクタが不正な場合（以前の設定がないためそのまま使用する）
+        """
+        with self._lock:
+            current = self._current
+            if current.compile_css:
+                return current
+            try:
+                validated = SelectorSet(current.data, current.version)
+            except SelectorValidationError as e:
+                REGISTRY.inc('hpb_selectors_reloads_total', result='invalid')
+                self._log('error', f"起動時に読み込んだセレクタ設定が不正です（ファイルを修正すると再読み込みします）: {e}")
+                raise
+            self._current = validated
+            return validated
+
+    def get(self) -> SelectorSet:
+        """現在の設定を取得する（確認の間隔を過ぎていればファイルの更新を確認する）"""
+        if (self.check_interval > 0
+                and time.monotonic() - self._checked_at >= self.check_interval
+                and not self._lock.locked()):
+            self.reload()
+        return self._current
+
+def init_selectors(app) -> Optional[SelectorRegistry]:
+    """セレクタ設定のレジストリを作成し、設定の SELECTORS を最新に保つ
+
+    SELECTORS_PATH のファイルを読み込んで変更を監視する。リクエストの開始時に更新を確認し、
+    app.config['SELECTORS'] を置き換える（SELECTORS の参照箇所はそのまま最新の設定を使える）。
+    SELECTORS_PATH が設定されていない場合（テストなど）は設定の SELECTORS をそのまま使用する。
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        Optional[SelectorRegistry]: レジストリ（SELECTORS_PATH が設定されていない場合はNone）
+    """
+    if not app.config.get('SELECTORS_PATH'):
+        return None
+
+    registry = SelectorRegistry(
+        app.config['SELECTORS_PATH'],
+        check_interval=app.config.get('SELECTORS_RELOAD_INTERVAL', 2.0),
+        logger=app.logger
+    )
+    app.config['SELECTORS'] = registry.current.data
+    app.extensions['selector_registry'] = registry
+
+    @app.before_request
+    def refresh_selectors():
+        get_selectors(app)
+
+    # 起動時に読み込んだCSSセレクタを検証する（ウォームアップを行う場合はそのステップで検証する）
+    if not app.testing and not app.config.get('WARMUP_ENABLED', False):
+        threading.Thread(target=_validate_quietly, args=(registry,), name='selectors-validate', daemon=True).start()
+
+    return registry
+
+def _validate_quietly(registry: SelectorRegistry):
+    try:
+        registry.validate()
+    except SelectorValidationError:
+        # validate() でログに記録済み
+        pass
+
+def get_selectors(app) -> Dict:
+    """現在のセレクタ設定を取得する（ファイルが変更されていれば再読み込みする）
+
+    Args:
+        app: Flaskアプリケーション
+
+    Returns:
+        Dict: selectors.json の内容
+    """
+    registry = app.extensions.get('selector_registry')
+    if registry is None:
+        return app.config.get('SELECTORS', {})
+    data = registry.get().data
+    if app.config.get('SELECTORS') is not data:
+        app.config['SELECTORS'] = data
+    return data
+
+def compiled_css(selector: str):
+    """CSSセレクタのコンパイル済みパターンを取得する（現在のセレクタ設定ごとに保持する）
+
+    Args:
+        selector: CSSセレクタ
+
+    Returns:
+        soupsieve.SoupSieve: コンパイル済みのパターン
+    """
+    registry = current_app.extensions.get('selector_registry') if has_app_context() else None
+    if registry is None:
+        import soupsieve
+        return soupsieve.compile(selector)
+    return registry.current.compiled(selector)
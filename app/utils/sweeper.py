@@ -0,0 +1,218 @@
+import os
+import time
+import threading
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class TempUploadSweeper:
+    """一時アップロードディレクトリの孤立ファイルを定期的に削除するクラス
+
+    セッションが参照中のファイルは、ルート側で touch_session_images() により
+    更新時刻（mtime）が更新される。スイーパーは mtime を最終利用時刻とみなし、
+    以下のポリシーでファイルを削除する。
+
+    1. TTL: 最終利用から ttl_seconds 以上経過したファイルを削除
+    2. 容量上限: 合計サイズが max_bytes を超える場合、最終利用が古い順（LRU）に削除
+       ただし grace_seconds 以内に利用されたファイルは処理中とみなして削除しない
+
+    batch_store を指定した場合は、走査の前に保持期間を過ぎたバッチを削除し、
+    残っているバッチが参照している画像はTTL・容量上限に関わらず削除しない
+    （バッチの画面を開かないまま投稿を待っている画像を守るため）。
+    """
+
+    def __init__(self, directories: Iterable[str], ttl_seconds: int, max_bytes: int,
+                 grace_seconds: int = 600, interval: int = 300, batch_size: int = 256,
+                 batch_store=None, logger=None):
+        """初期化
+
+        Args:
+            directories: 走査対象のディレクトリのリスト
+            ttl_seconds: ファイルの保持期間（秒）
+            max_bytes: 合計サイズの上限（バイト、0以下で無制限）
+            grace_seconds: 容量超過時でも削除しない最近利用されたファイルの猶予（秒）
+            interval: バックグラウンド実行時の走査間隔（秒）
+            batch_size: os.scandir の結果を一度に処理するエントリ数
+            batch_store: 投稿待ちのバッチのストア（省略時はバッチを考慮しない）
+            logger: ログ出力先（省略時はログを出力しない）
+        """
+        self.directories = list(directories)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_store = batch_store
+        self.logger = logger
+        self.last_result: Optional[Dict] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_app(cls, app) -> 'TempUploadSweeper':
+        """Flaskアプリケーションの設定からスイーパーを生成する
+
+        Args:
+            app: Flaskアプリケーション
+
+        Returns:
+            TempUploadSweeper: 生成されたスイーパー
+        """
+        from .images import SB_UPLOAD_DIRNAME, THUMBNAIL_DIRNAME
+        from ..blueprints.blog.batch_store import get_batch_store
+        
+        config = app.config
+        upload_folder = config['UPLOAD_FOLDER']
+        return cls(
+            directories=[
+                upload_folder,
+                os.path.join(upload_folder, THUMBNAIL_DIRNAME),
+                os.path.join(upload_folder, SB_UPLOAD_DIRNAME)
+            ],
+            ttl_seconds=config.get('UPLOAD_TTL_SECONDS', 6 * 60 * 60),
+            max_bytes=config.get('UPLOAD_MAX_TOTAL_BYTES', 1024 * 1024 * 1024),
+            grace_seconds=config.get('UPLOAD_SWEEP_GRACE_SECONDS', 600),
+            interval=config.get('UPLOAD_SWEEP_INTERVAL', 300),
+            batch_store=get_batch_store(app),
+            logger=app.logger
+        )
+
+    def _iter_batches(self, directory: str) -> Iterator[List[Tuple[str, int, float]]]:
+        """ディレクトリ内のファイルをバッチ単位で列挙する
+
+        Args:
+            directory: 走査対象のディレクトリ
+
+        Yields:
+            List[Tuple[str, int, float]]: (パス, サイズ, 最終利用時刻) のリスト
+        """
+        try:
+            with os.scandir(directory) as it:
+                while True:
+                    entries = list(islice(it, self.batch_size))
+                    if not entries:
+                        return
+                    batch = []
+                    for entry in entries:
+                        try:
+                            # サブディレクトリやシンボリックリンクは対象外
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            # 走査中に他のワーカーが削除した場合など
+                            continue
+                        batch.append((entry.path, st.st_size, st.st_mtime))
+                    if batch:
+                        yield batch
+        except FileNotFoundError:
+            return
+
+    def _remove(self, path: str) -> bool:
+        """ファイルを削除する（既に削除されている場合はFalse）"""
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"一時ファイルの削除に失敗しました: {path}: {e}")
+            return False
+
+    def sweep(self, now: Optional[float] = None) -> Dict:
+        """1回分の走査と削除を行う
+
+        Args:
+            now: 基準時刻（省略時は現在時刻）
+
+        Returns:
+            Dict: 走査結果（scanned, removed, reclaimed_bytes, remaining_bytes, batches_removed）
+        """
+        if now is None:
+            now = time.time()
+
+        # 期限切れのバッチを先に削除し、その画像も削除対象にする
+        batches_removed = 0
+        protected = set()
+        if self.batch_store is not None:
+            batches_removed = self.batch_store.prune(now)
+            protected = self.batch_store.referenced_paths()
+
+        scanned = 0
+        removed = 0
+        reclaimed_bytes = 0
+        protected_bytes = 0
+        survivors = []
+
+        # TTLを超えたファイルを削除しつつ、残るファイルを収集
+        for directory in self.directories:
+            for batch in self._iter_batches(directory):
+                scanned += len(batch)
+                for path, size, last_used in batch:
+                    if protected and os.path.abspath(path) in protected:
+                        protected_bytes += size
+                    elif now - last_used > self.ttl_seconds:
+                        if self._remove(path):
+                            removed += 1
+                            reclaimed_bytes += size
+                    else:
+                        survivors.append((last_used, size, path))
+
+        remaining_bytes = protected_bytes + sum(size for _, size, _ in survivors)
+
+        # 容量上限を超えている場合は最終利用が古い順に削除
+        if self.max_bytes > 0 and remaining_bytes > self.max_bytes:
+            survivors.sort()
+            for last_used, size, path in survivors:
+                if remaining_bytes <= self.max_bytes:
+                    break
+                if now - last_used < self.grace_seconds:
+                    # 以降のファイルはすべて猶予期間内
+                    break
+                if self._remove(path):
+                    removed += 1
+                    reclaimed_bytes += size
+                    remaining_bytes -= size
+
+        result = {
+            'scanned': scanned,
+            'removed': removed,
+            'reclaimed_bytes': reclaimed_bytes,
+            'remaining_bytes': remaining_bytes,
+            'batches_removed': batches_removed
+        }
+        self.last_result = result
+
+        if self.logger and removed:
+            self.logger.info(
+                f"一時ファイルを{removed}件削除しました（{reclaimed_bytes}バイト解放、残り{remaining_bytes}バイト）"
+            )
+        if self.logger and batches_removed:
+            self.logger.info(f"保持期間を過ぎたバッチを{batches_removed}件削除しました")
+
+        return result
+
+    def _run(self):
+        """バックグラウンドスレッドのメインループ"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"一時ファイルの走査エラー: {str(e)}")
+
+    def start(self):
+        """バックグラウンドでの定期走査を開始する"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='temp-upload-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """バックグラウンドでの定期走査を停止する"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
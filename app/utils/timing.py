@@ -0,0 +1,280 @@
+import os
+import re
+import json
+import time
+import random
+import logging
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterable, List, Optional
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask.sessions import SecureCookieSessionInterface
+
+# Server-Timing のメトリクス名に使用できない文字
+_INVALID_NAME_CHARS = re.compile(r'[^A-Za-z0-9_.\-]')
+
+def _format_metric(span: Dict) -> str:
+    """スパンを Server-Timing のメトリクスの形式にする"""
+    metric = f"{_INVALID_NAME_CHARS.sub('_', span['name'])};dur={span['duration_ms']}"
+    if span.get('desc'):
+        metric += f";desc={json.dumps(span['desc'], ensure_ascii=True)}"
+    return metric
+
+class RequestTimer:
+    """1リクエスト内の処理ごとの所要時間（スパン）を記録するクラス"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+
+    def record(self, name: str, duration_ms: float, desc: Optional[str] = None):
+        """計測済みのスパンを追加する
+
+        Args:
+            name: スパン名
+            duration_ms: 所要時間（ミリ秒）
+            desc: 補足（URLのパスなど）
+        """
+        span = {'name': name, 'duration_ms': round(duration_ms, 1)}
+        if desc:
+            span['desc'] = desc
+        self.spans.append(span)
+
+    def elapsed_ms(self) -> float:
+        """リクエスト開始からの経過時間（ミリ秒）"""
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def header_value(self) -> str:
+        """Server-Timing ヘッダーの値を生成する（最後に total を付与する）"""
+        total = {'name': 'total', 'duration_ms': self.elapsed_ms()}
+        return ', '.join(_format_metric(span) for span in self.spans + [total])
+
+def get_request_timer() -> Optional[RequestTimer]:
+    """現在のリクエストの計測器を取得する（計測が無効な場合、リクエスト外の場合はNone）"""
+    if not has_app_context():
+        return None
+    timer = g.get('request_timer')
+    if timer is None and has_request_timing():
+        timer = g.request_timer = RequestTimer()
+    return timer
+
+def has_request_timing() -> bool:
+    """現在のリクエストを計測するかどうか"""
+    return has_request_context() and current_app.config.get('SERVER_TIMING_ENABLED', False)
+
+@contextmanager
+def span(name: str, desc: Optional[str] = None):
+    """ブロックの所要時間をスパンとして記録する（リクエスト外では何もしない）
+
+    Args:
+        name: スパン名
+        desc: 補足（URLのパスなど）
+    """
+    timer = get_request_timer()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.record(name, (time.perf_counter() - started) * 1000, desc)
+
+def record_spans(prefix: str, spans: Iterable[Dict]):
+    """他のスレッドで計測したスパン（自動操作のステップなど）を記録する
+
+    Args:
+        prefix: スパン名の接頭辞
+        spans: name, duration_ms（post を含む場合は補足とする）を持つスパンのリスト
+    """
+    timer = get_request_timer()
+    if timer is None:
+        return
+    for item in spans:
+        if item.get('duration_ms') is None:
+            continue
+        desc = f"post{item['post']}" if item.get('post') else None
+        timer.record(f"{prefix}.{item['name']}", item['duration_ms'], desc)
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """セッションの読み込み・保存の所要時間を記録するセッションインターフェース"""
+
+    def open_session(self, app, request):
+        with span('session_open'):
+            return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        # after_request の後に呼ばれるため、Server-Timing ヘッダーには直接追加する
+        started = time.perf_counter()
+        super().save_session(app, session, response)
+        timer = get_request_timer()
+        if timer is not None:
+            timer.record('session_save', (time.perf_counter() - started) * 1000)
+            if response.headers.get('Server-Timing'):
+                response.headers['Server-Timing'] += f', {_format_metric(timer.spans[-1])}'
+
+class RequestProfiler:
+    """一部のリクエストをプロファイルし、結果をファイルに保存するクラス
+
+    プロファイルの対象はリクエストを処理するスレッドのみ（自動操作エンジンのスレッドで
+    実行される投稿処理は含まない。投稿処理の内訳はスパンで確認する）。
+    """
+
+    def __init__(self, directory: str, sample_rate: float, profiler: str = 'cprofile', keep: int = 50,
+                 logger=None):
+        """初期化
+
+        Args:
+            directory: 結果の保存先ディレクトリ
+            sample_rate: プロファイルするリクエストの割合（0〜1）
+            profiler: cprofile または pyinstrument（インストールされていない場合は cprofile）
+            keep: 保持する結果の数（古いものから削除する）
+            logger: ログ出力先
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.profiler = profiler
+        self.keep = keep
+        self.logger = logger
+        if profiler == 'pyinstrument':
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                if logger:
+                    logger.warning('pyinstrument がインストールされていないため、cProfile でプロファイルします')
+                self.profiler = 'cprofile'
+
+    def start(self):
+        """サンプリングの対象であればプロファイルを開始する
+
+        Returns:
+            プロファイラ（対象外の場合はNone）
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if self.profiler == 'pyinstrument':
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def stop(self, profiler, label: str) -> str:
+        """プロファイルを終了して結果を保存する
+
+        Args:
+            profiler: start() の戻り値
+            label: ファイル名に含めるラベル（エンドポイント名など）
+
+        Returns:
+            str: 保存したファイルのパス
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        name = f"{stamp}{int(now * 1000) % 1000:03d}-{_INVALID_NAME_CHARS.sub('_', label)}"
+        if self.profiler == 'pyinstrument':
+            profiler.stop()
+            path = os.path.join(self.directory, f'{name}.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            path = os.path.join(self.directory, f'{name}.prof')
+            profiler.dump_stats(path)
+        self.prune()
+        return path
+
+    def prune(self):
+        """保持数を超えた古い結果を削除する"""
+        try:
+            paths = sorted(entry.path for entry in os.scandir(self.directory) if entry.is_file())
+        except FileNotFoundError:
+            return
+        for path in paths[:max(len(paths) - self.keep, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _slow_request_logger(app) -> logging.Logger:
+    """遅いリクエストを記録するロガー（ローテーションするファイルに出力）を作成する"""
+    path = app.config.get('SLOW_REQUEST_LOG') or os.path.join(app.instance_path, 'logs', 'slow_requests.log')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    logger = logging.getLogger(f'{app.import_name}.slow_requests')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not any(getattr(handler, 'baseFilename', None) == os.path.abspath(path) for handler in logger.handlers):
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=app.config.get('SLOW_REQUEST_LOG_MAX_BYTES', 5 * 1024 * 1024),
+            backupCount=app.config.get('SLOW_REQUEST_LOG_BACKUPS', 5),
+            encoding='utf-8',
+            delay=True
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    return logger
+
+def init_request_timing(app):
+    """リクエストの計測（Server-Timing ヘッダー、遅いリクエストの記録、プロファイル）を設定する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    if not app.config.get('SERVER_TIMING_ENABLED', False):
+        return
+
+    app.session_interface = TimedSessionInterface()
+    slow_ms = app.config.get('SLOW_REQUEST_MS', 10000)
+    slow_logger = _slow_request_logger(app) if slow_ms > 0 else None
+    profiler = None
+    if app.config.get('PROFILE_SAMPLE_RATE', 0) > 0:
+        profiler = RequestProfiler(
+            app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'),
+            app.config['PROFILE_SAMPLE_RATE'],
+            profiler=app.config.get('PROFILER', 'cprofile'),
+            keep=app.config.get('PROFILE_KEEP', 50),
+            logger=app.logger
+        )
+        app.extensions['request_profiler'] = profiler
+
+    @app.before_request
+    def start_request_timing():
+        get_request_timer()
+        if profiler is not None:
+            g.request_profile = profiler.start()
+
+    @app.after_request
+    def add_server_timing(response):
+        timer = get_request_timer()
+        if timer is not None:
+            response.headers['Server-Timing'] = timer.header_value()
+        return response
+
+    @app.teardown_request
+    def finish_request_timing(exc):
+        timer = g.get('request_timer')
+        if timer is None:
+            return
+        profile_path = None
+        if g.get('request_profile') is not None:
+            try:
+                profile_path = profiler.stop(g.request_profile, request.endpoint or 'unknown')
+            except Exception as e:
+                app.logger.error(f"プロファイルの保存エラー: {str(e)}")
+        total_ms = timer.elapsed_ms()
+        if slow_logger is not None and total_ms >= slow_ms:
+            slow_logger.info(json.dumps({
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'total_ms': total_ms,
+                'error': str(exc) if exc else None,
+                'spans': timer.spans,
+                'profile': profile_path
+            }, ensure_ascii=False))
@@ -0,0 +1,75 @@
+import tempfile
+from typing import Optional
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# 画像形式の判定に必要な先頭バイト数
+SNIFF_BYTES = 12
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """先頭バイト（マジックナンバー）から画像のMIMEタイプを判定する
+
+    Args:
+        head: ファイルの先頭バイト列
+
+    Returns:
+        Optional[str]: 対応形式の場合はMIMEタイプ、それ以外はNone
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+class FileTooLarge(RequestEntityTooLarge):
+    """1ファイルの上限（UPLOAD_MAX_FILE_BYTES）を超えた（リクエスト全体の上限の超過と区別する）"""
+
+class GuardedUploadFile(tempfile.SpooledTemporaryFile):
+    """受信中にサイズと形式を検査するアップロード用一時ファイル
+
+    Werkzeugのマルチパートパーサーはチャンクごとに write() を呼び出すため、
+    上限超過や画像以外のデータを検出した時点で例外を送出して受信を中断する。
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_memory_size: int = 512 * 1024):
+        """初期化
+
+        Args:
+            max_bytes: 1ファイルあたりの最大バイト数（Noneで無制限）
+            max_memory_size: メモリ上に保持する最大バイト数（超えるとディスクに書き出す）
+        """
+        super().__init__(max_size=max_memory_size, mode='w+b')
+        self.max_bytes = max_bytes
+        self.bytes_received = 0
+        self.detected_type: Optional[str] = None
+        self._head = b''
+
+    def write(self, data):
+        """チャンクを書き込む（上限超過・形式不正の場合は受信を中断する）"""
+        self.bytes_received += len(data)
+        if self.max_bytes is not None and self.bytes_received > self.max_bytes:
+            raise FileTooLarge('アップロードされたファイルが大きすぎます。')
+
+        if self.detected_type is None and len(self._head) < SNIFF_BYTES:
+            self._head += bytes(data[:SNIFF_BYTES - len(self._head)])
+            if len(self._head) >= SNIFF_BYTES:
+                self.detected_type = sniff_image_type(self._head)
+                if self.detected_type is None:
+                    raise UnsupportedMediaType('画像以外のファイルはアップロードできません。')
+
+        return super().write(data)
+
+class GuardedRequest(Request):
+    """アップロードファイルを GuardedUploadFile で受信するリクエストクラス
+
+    リクエスト全体の上限は MAX_CONTENT_LENGTH、1ファイルの上限は
+    UPLOAD_MAX_FILE_BYTES で設定する。
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_bytes = current_app.config.get('UPLOAD_MAX_FILE_BYTES')
+        return GuardedUploadFile(max_bytes=max_bytes)
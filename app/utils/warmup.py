@@ -0,0 +1,114 @@
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def warm_selectors(app):
+    """selectors.json のCSSセレクタをすべてコンパイルして検証する（soupsieve の読み込みも済ませる）"""
+    registry = app.extensions.get('selector_registry')
+    if registry is None:
+        return 'skipped'
+    registry.validate()
+
+def warm_gemini(app):
+    """Gemini SDKを読み込み、APIの初期設定とモデルの生成を済ませる"""
+    if not app.config.get('GEMINI_API_KEY'):
+        return 'skipped'
+    from ..blueprints.blog.services import get_gemini_model
+    get_gemini_model()
+
+def warm_scraper(app):
+    """スクレイピング用セッションでHPBに接続し、DNS解決とTLS接続を済ませる"""
+    from ..blueprints.blog.scraping import HPB_BASE_URL, get_scraper_session
+    get_scraper_session().head(HPB_BASE_URL, timeout=app.config.get('WARMUP_TIMEOUT', 60))
+
+def warm_browser_pool(app):
+    """自動操作エンジンを起動し、ブラウザプールのブラウザの起動を待つ"""
+    if app.config.get('SB_BROWSER_POOL_SIZE', 0) <= 0:
+        return 'skipped'
+    from ..blueprints.blog.automation_engine import get_automation_engine
+    engine = get_automation_engine(app)
+    engine.run(engine.pool.start(), app.config.get('WARMUP_TIMEOUT', 60))
+
+WARMUP_STEPS: List[Tuple[str, Callable]] = [
+    ('selectors', warm_selectors),
+    ('gemini', warm_gemini),
+    ('scraper', warm_scraper),
+    ('browser_pool', warm_browser_pool)
+]
+
+
+class WarmUp:
+    """ワーカー起動時に重いクライアントの初期化をバックグラウンドで行うクラス
+
+    デプロイやスケールアウト直後の最初のリクエストが、SDKの読み込みや接続の確立、
+    ブラウザの起動を負担しないように、起動直後に各ステップを順に実行する。
+    すべてのステップが終わるまで ready は False になる（失敗したステップは
+    ログに記録し、初回のリクエストで改めて初期化される）。
+    """
+
+    def __init__(self, app, steps: Optional[List[Tuple[str, Callable]]] = None):
+        """初期化
+
+        Args:
+            app: Flaskアプリケーション
+            steps: (名前, アプリケーションを受け取る関数) のリスト（省略時は WARMUP_STEPS）
+        """
+        self.app = app
+        self.steps = list(WARMUP_STEPS if steps is None else steps)
+        self.results: List[Dict] = []
+        self.duration_ms: Optional[float] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """ウォームアップが完了したかどうか"""
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """ウォームアップの完了を待つ
+
+        Args:
+            timeout: 待つ最大時間（秒）
+
+        Returns:
+            bool: 完了したかどうか
+        """
+        return self._ready.wait(timeout)
+
+    def run(self):
+        """各ステップを順に実行する"""
+        started = time.perf_counter()
+        with self.app.app_context():
+            for name, step in self.steps:
+                step_started = time.perf_counter()
+                result = {'name': name, 'status': 'ok'}
+                try:
+                    if step(self.app) == 'skipped':
+                        result['status'] = 'skipped'
+                except Exception as e:
+                    result['status'] = 'failed'
+                    result['error'] = str(e) or type(e).__name__
+                    self.app.logger.warning(f"ウォームアップの失敗（{name}）: {result['error']}")
+                result['duration_ms'] = round((time.perf_counter() - step_started) * 1000, 1)
+                self.results.append(result)
+        self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        summary = ', '.join(f"{r['name']}={r['duration_ms']}ms({r['status']})" for r in self.results)
+        self.app.logger.info(f"ウォームアップ完了: {self.duration_ms}ms [{summary}]")
+        self._ready.set()
+
+    def start(self):
+        """バックグラウンドでウォームアップを開始する"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+        self._thread.start()
+
+    def report(self) -> Dict:
+        """ウォームアップの状況（ready, duration_ms, steps）を返す"""
+        return {
+            'ready': self.ready,
+            'duration_ms': self.duration_ms,
+            'steps': list(self.results)
+        }
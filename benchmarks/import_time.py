@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""アプリケーション起動時のimport時間を計測するベンチマーク
+
+`python -X importtime` の出力を解析し、create_app() までに読み込まれる
+モジュールと累積時間を表示する。--check を指定すると、重いSDKが起動時に
+読み込まれている場合や予算を超えた場合に終了コード1を返す。
+
+使用例:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --check --budget-ms 400
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+import tempfile
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 起動時に読み込まれてはならない重い依存パッケージ
+HEAVY_MODULES = ('google.generativeai', 'playwright', 'bs4', 'requests', 'PIL')
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """-X importtime の出力を解析する
+
+    Args:
+        stderr: python -X importtime の標準エラー出力
+
+    Returns:
+        List[Tuple[str, int, int, int]]: (モジュール名, 自身の時間μs, 累積時間μs, ネストの深さ) のリスト
+    """
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+def measure_import_time(statement: str = None) -> Dict:
+    """新しいPythonプロセスで create_app() までのimport時間を計測する
+
+    Args:
+        statement: 計測対象のコード（省略時はcreate_app()の呼び出し）
+
+    Returns:
+        Dict: 計測結果（total_us, modules, heavy_modules）
+    """
+    with tempfile.TemporaryDirectory() as upload_folder:
+        if statement is None:
+            statement = (
+                "from app import create_app; "
+                f"create_app({{'TESTING': True, 'UPLOAD_FOLDER': {upload_folder!r}}})"
+            )
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+        )
+
+    records = parse_importtime(completed.stderr)
+    modules = {name: cumulative_us for name, _, cumulative_us, _ in records}
+    total_us = sum(cumulative_us for _, _, cumulative_us, depth in records if depth == 0)
+    heavy_modules = sorted(
+        name for name in modules
+        if any(name == heavy or name.startswith(heavy + '.') for heavy in HEAVY_MODULES)
+    )
+    return {
+        'total_us': total_us,
+        'modules': modules,
+        'heavy_modules': heavy_modules
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='create_app() までのimport時間を計測します')
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数（最小値を採用）')
+    parser.add_argument('--top', type=int, default=15, help='表示する上位モジュール数')
+    parser.add_argument('--check', action='store_true', help='回帰チェックを行う')
+    parser.add_argument('--budget-ms', type=float, default=500.0, help='--check時の合計時間の上限（ミリ秒）')
+    args = parser.parse_args()
+
+    results = [measure_import_time() for _ in range(args.repeat)]
+    best = min(results, key=lambda r: r['total_us'])
+
+    print(f"import合計時間（{args.repeat}回中の最小値）: {best['total_us'] / 1000:.1f} ms")
+    print(f"上位{args.top}モジュール（累積時間）:")
+    ranked = sorted(best['modules'].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative_us in ranked[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if best['heavy_modules']:
+        print(f"起動時に読み込まれた重いモジュール: {', '.join(best['heavy_modules'][:10])}")
+
+    if args.check:
+        if best['heavy_modules']:
+            print("NG: 重いSDKが起動時に読み込まれています")
+            return 1
+        if best['total_us'] / 1000 > args.budget_ms:
+            print(f"NG: import時間が予算（{args.budget_ms} ms）を超えています")
+            return 1
+        print("OK")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""サロンボード自動投稿のプロファイル別（fast / debug）の所要時間を比較するベンチマーク
+
+プロファイルごとに投稿処理（ログイン → ブログ投稿ページへの移動 → 投稿）を
+繰り返し実行し、1投稿あたりの実時間を表示する。--base-url を省略した場合は
+スタンドインサーバー（tests/sb_standin.py）を起動して計測する。
+--base-url を指定すると実際に投稿が行われるため、本番アカウントでは実行しないこと。
+ログイン状態キャッシュとブラウザプールは無効にして計測する。
+
+使用例:
+    python benchmarks/sb_profiles.py --latency page=0.2 --latency asset=0.05 --image sample.jpg
+    python benchmarks/sb_profiles.py --base-url https://staging.example.com \\
+        --sb-id test --sb-password test --stylist "山田 太郎"
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+PROFILES = ('fast', 'debug')
+
+def summarize(durations: List[float]) -> Dict:
+    """計測結果を集計する
+
+    Args:
+        durations: 1投稿あたりの所要時間（秒）のリスト
+
+    Returns:
+        Dict: 集計結果（count, min, median, mean, max）
+    """
+    return {
+        'count': len(durations),
+        'min': min(durations),
+        'median': statistics.median(durations),
+        'mean': statistics.mean(durations),
+        'max': max(durations)
+    }
+
+def run_profile(app, profile: str, iterations: int, post_args: Dict) -> List[float]:
+    """指定プロファイルで投稿処理を繰り返し、所要時間を計測する
+
+    Args:
+        app: Flaskアプリケーション
+        profile: プロファイル名
+        iterations: 繰り返し回数
+        post_args: post_to_sb に渡す引数
+
+    Returns:
+        List[float]: 1投稿あたりの所要時間（秒）のリスト
+    """
+    from app.blueprints.blog.sb_automation import post_to_sb
+
+    app.config['SB_AUTOMATION_PROFILE'] = profile
+    durations = []
+    with app.app_context():
+        for i in range(iterations):
+            started = time.perf_counter()
+            result = asyncio.run(post_to_sb(**post_args))
+            elapsed = time.perf_counter() - started
+            if not result['success']:
+                raise RuntimeError(f"{profile} の{i + 1}回目の投稿に失敗しました: {result['message']}")
+            durations.append(elapsed)
+    return durations
+
+def main():
+    parser = argparse.ArgumentParser(description='自動投稿のプロファイル別の所要時間を比較します')
+    parser.add_argument('--base-url', help='サロンボード（検証用サーバー）のURL（省略時はスタンドインサーバー）')
+    parser.add_argument('--sb-id', default='standin', help='サロンボードID')
+    parser.add_argument('--sb-password', default='standin', help='サロンボードパスワード')
+    parser.add_argument('--stylist', default='山田 太郎', help='投稿スタイリスト')
+    parser.add_argument('--latency', action='append', default=[],
+                        help='スタンドインサーバーの遅延（name=秒、例: page=0.2）')
+    parser.add_argument('--image', action='append', default=[], help='投稿する画像（複数指定可）')
+    parser.add_argument('--coupon', help='クーポン名')
+    parser.add_argument('--iterations', type=int, default=3, help='プロファイルごとの投稿回数')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='計測するプロファイル（カンマ区切り）')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    standin = None
+    base_url = args.base_url
+    if base_url is None:
+        from tests.sb_standin import StandinServer, create_standin_app, parse_latencies
+
+        standin = StandinServer(create_standin_app(latencies=parse_latencies(args.latency))).start()
+        base_url = standin.url
+
+    app = create_app()
+    app.config.update(
+        SB_BASE_URL=base_url,
+        SB_SESSION_CACHE_TTL=0,
+        SB_BROWSER_POOL_SIZE=0
+    )
+    post_args = {
+        'sb_id': args.sb_id,
+        'sb_password': args.sb_password,
+        'title': 'ベンチマーク投稿',
+        'body': 'プロファイル比較用の投稿です。',
+        'stylist': args.stylist,
+        'images': [{'path': os.path.abspath(path)} for path in args.image],
+        'coupon': args.coupon
+    }
+
+    results = {}
+    try:
+        for profile in [p.strip() for p in args.profiles.split(',') if p.strip()]:
+            results[profile] = summarize(run_profile(app, profile, args.iterations, post_args))
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    print(f"{'profile':<8} {'n':>3} {'min':>8} {'median':>8} {'mean':>8} {'max':>8}  (秒/投稿)")
+    for profile, summary in results.items():
+        print(f"{profile:<8} {summary['count']:>3} {summary['min']:8.2f} {summary['median']:8.2f} "
+              f"{summary['mean']:8.2f} {summary['max']:8.2f}")
+
+    if 'fast' in results and 'debug' in results:
+        speedup = results['debug']['median'] / results['fast']['median']
+        print(f"fast は debug の {speedup:.1f} 倍速（中央値）")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
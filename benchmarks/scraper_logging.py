@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""ログ出力の有無・方式によるスクレイピングのスループットを比較するベンチマーク
+
+HPBの店舗ページ（スタイリスト1ページ、クーポン複数ページ）を模したHTMLを生成し、
+ネットワークを使わずに scrape_hpb_data() を繰り返し実行する。次の方式ごとに
+1秒あたりの処理ページ数を表示する。
+
+    off:   ログを出力しない（WARNING以上のみ）
+    sync:  リクエストのスレッドでファイルに書き込む
+    queue: キュー経由でバックグラウンドのスレッドがファイルに書き込む（LOG_QUEUE_ENABLED）
+
+使用例:
+    python benchmarks/scraper_logging.py
+    python benchmarks/scraper_logging.py --pages 5 --coupons 60 --iterations 50 --level INFO
+    python benchmarks/scraper_logging.py --sink-delay-ms 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from types import SimpleNamespace
+from typing import Dict
+from unittest.mock import patch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+MODES = ('off', 'sync', 'queue')
+
+# 計測中はページ間の待機（time.sleep）を無効にするため、ハンドラの待機用に元の関数を保持する
+_sleep = time.sleep
+
+class SlowFileHandler(logging.FileHandler):
+    """書き込みごとに待機するハンドラ（ネットワーク越しのログ収集や詰まった標準エラー出力を模す）"""
+
+    def __init__(self, filename: str, delay_seconds: float):
+        super().__init__(filename, encoding='utf-8')
+        self.delay_seconds = delay_seconds
+
+    def emit(self, record):
+        super().emit(record)
+        if self.delay_seconds > 0:
+            _sleep(self.delay_seconds)
+
+def build_pages(pages: int, coupons: int) -> Dict[str, str]:
+    """店舗ページを模したHTMLを生成する
+
+    Args:
+        pages: クーポンのページ数
+        coupons: 1ページあたりのクーポン数（ほかに除外される通常メニューを同数含む）
+
+    Returns:
+        Dict[str, str]: URLの末尾（stylist/, coupon/, coupon/PN2.html など）とHTML
+    """
+    stylists = ''.join(
+        f'<p class="mT10 fs16 b"><a href="#">スタイリスト {n}</a></p>' for n in range(20)
+    )
+    result = {
+        'stylist/': f'<html><body><h2>スタイリスト</h2><div class="oh">{stylists}</div></body></html>'
+    }
+    for page in range(1, pages + 1):
+        items = ''.join(
+            f'<div><p class="couponMenuName">ページ{page} クーポン {n} カット+カラー</p></div>'
+            f'<div class="cFix"><p class="couponTitle">ページ{page} 通常メニュー {n} カット</p></div>'
+            for n in range(coupons)
+        )
+        html = f'<html><body><div class="pa bottom0 right0">{page}/{pages}ページ</div>{items}</body></html>'
+        result['coupon/' if page == 1 else f'coupon/PN{page}.html'] = html
+    return result
+
+def run(app, store_url: str, pages: Dict[str, str], iterations: int) -> float:
+    """スクレイピングを繰り返し、所要時間（秒）を返す"""
+    from app.blueprints.blog import scraping
+
+    def fetch_page(url, deadline=None):
+        return SimpleNamespace(text=pages[url[len(store_url):]])
+
+    with app.app_context(), patch.object(scraping, '_fetch_page', fetch_page), \
+            patch.object(scraping.time, 'sleep', lambda seconds: None):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            scraping.scrape_hpb_data(store_url)
+        return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='ログ出力の方式ごとのスクレイピングのスループットを比較します')
+    parser.add_argument('--pages', type=int, default=3, help='クーポンのページ数')
+    parser.add_argument('--coupons', type=int, default=40, help='1ページあたりのクーポン数')
+    parser.add_argument('--iterations', type=int, default=30, help='1方式あたりの繰り返し回数')
+    parser.add_argument('--level', default='DEBUG', help='sync / queue で出力するログレベル')
+    parser.add_argument('--sink-delay-ms', type=float, default=0.0, help='ログ1行の書き込みごとの待機時間（ミリ秒）')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='計測する方式')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.utils.log_queue import queue_logger, stop_log_queues
+
+    with open(os.path.join(PROJECT_ROOT, 'selectors.json'), 'r', encoding='utf-8') as f:
+        selectors = json.load(f)
+    store_url = 'https://beauty.hotpepper.jp/slnH000000000/'
+    pages = build_pages(args.pages, args.coupons)
+    pages_per_scrape = 1 + args.pages
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_app({'TESTING': True, 'UPLOAD_FOLDER': temp_dir, 'SELECTORS': selectors})
+        # 1回実行して読み込みとセレクタのコンパイルを済ませる
+        app.logger.setLevel(logging.WARNING)
+        run(app, store_url, pages, 1)
+
+        print(f"{args.iterations}回 × {pages_per_scrape}ページ、クーポン{args.coupons}件/ページ、"
+              f"ログレベル {args.level}、書き込みの待機 {args.sink_delay_ms} ms/行")
+        baseline = None
+        for mode in args.modes:
+            handler = SlowFileHandler(os.path.join(temp_dir, f'{mode}.log'), args.sink_delay_ms / 1000)
+            handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+            original_handlers = list(app.logger.handlers)
+            for original in original_handlers:
+                app.logger.removeHandler(original)
+            if mode == 'off':
+                app.logger.setLevel(logging.WARNING)
+                app.logger.addHandler(handler)
+            else:
+                app.logger.setLevel(args.level.upper())
+                if mode == 'queue':
+                    queue_logger(app.logger, [handler])
+                else:
+                    app.logger.addHandler(handler)
+
+            elapsed = run(app, store_url, pages, args.iterations)
+            drain = time.perf_counter()
+            stop_log_queues()
+            drain = time.perf_counter() - drain
+
+            for current in list(app.logger.handlers):
+                app.logger.removeHandler(current)
+            for original in original_handlers:
+                app.logger.addHandler(original)
+            handler.close()
+
+            throughput = args.iterations * pages_per_scrape / elapsed
+            baseline = baseline or throughput
+            log_lines = sum(1 for _ in open(handler.baseFilename, encoding='utf-8'))
+            line = (f"  {mode:5s}: {throughput:8.1f} ページ/秒  {elapsed / args.iterations * 1000:7.2f} ms/回  "
+                    f"({throughput / baseline * 100:5.1f}%)  ログ {log_lines}行")
+            if mode == 'queue':
+                line += f"  残りの書き込み {drain * 1000:.1f} ms"
+            print(line)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import os
 import sys
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 import tempfile
 import io
 from flask import session
@@ -34,6 +34,7 @@ class TestBlogRoutes(unittest.TestCase):
         # テスト用の一時ディレクトリを作成
         self.temp_dir = tempfile.TemporaryDirectory()
         self.app.config['UPLOAD_FOLDER'] = self.temp_dir.name
+        self.app.config['SB_BATCH_DIR'] = os.path.join(self.temp_dir.name, 'batches')
         
         # テスト用の画像データを作成（最小限のJPEG）
         self.test_image_data = (
@@ -84,6 +85,9 @@ class TestBlogRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('<h2>ブログ作成</h2>'.encode('utf-8'), response.data)
         self.assertIn(b'<form method="post" enctype="multipart/form-data"', response.data)
+        # ブラウザ側の画像縮小設定が埋め込まれていること
+        self.assertIn(f'data-resize-max-edge="{self.app.config["CLIENT_RESIZE_MAX_EDGE"]}"'.encode('utf-8'),
+                      response.data)
     
     @patch('app.blueprints.blog.routes.save_uploaded_image')
     def test_create_post_success(self, mock_save_uploaded_image):
@@ -162,6 +166,76 @@ class TestBlogRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('少なくとも1枚の画像をアップロードしてください'.encode('utf-8'), response.data)
     
+    def test_create_post_oversized_image(self):
+        """ブログ作成ページのPOSTリクエスト（サイズ超過）テスト"""
+        self.app.config['UPLOAD_MAX_FILE_BYTES'] = 64
+        
+        # POSTリクエストを送信
+        response = self.client.post(
+            '/blog/create',
+            data={
+                'store_url': 'https://beauty.hotpepper.jp/slnH000XXXXX/',
+                'images': (io.BytesIO(self.test_image_data), 'test.jpg')
+            },
+            content_type='multipart/form-data'
+        )
+        
+        # 検証（作成画面に戻り、1枚あたりの上限を表示する）
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.location.endswith('/blog/create'))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+        response = self.client.get(response.location)
+        self.assertIn('1枚あたり0MB以下'.encode('utf-8'), response.data)
+    
+    def test_create_post_request_too_large(self):
+        """ブログ作成ページのPOSTリクエスト（リクエスト全体のサイズ超過）テスト"""
+        self.app.config['MAX_CONTENT_LENGTH'] = 3 * 1024 * 1024
+        
+        # POSTリクエストを送信
+        response = self.client.post(
+            '/blog/create',
+            data={
+                'store_url': 'https://beauty.hotpepper.jp/slnH000XXXXX/',
+                'images': (io.BytesIO(self.test_image_data + b'\x00' * (4 * 1024 * 1024)), 'test.jpg')
+            },
+            content_type='multipart/form-data',
+            follow_redirects=True
+        )
+        
+        # 検証（1枚あたりではなく合計の上限を表示する）
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('合計3MB以下'.encode('utf-8'), response.data)
+        self.assertNotIn('1枚あたり'.encode('utf-8'), response.data)
+    
+    def test_request_too_large_outside_upload(self):
+        """アップロード以外の画面ではサイズ超過時に作成画面を表示しないテスト"""
+        self.app.config['MAX_CONTENT_LENGTH'] = 1024
+        
+        response = self.client.post('/blog/batch/add', data={'body': 'x' * 4096})
+        
+        # 検証
+        self.assertEqual(response.status_code, 413)
+        self.assertNotIn('画像のサイズが大きすぎます'.encode('utf-8'), response.data)
+    
+    def test_create_post_fake_image(self):
+        """ブログ作成ページのPOSTリクエスト（画像以外のファイル）テスト"""
+        # POSTリクエストを送信（MIMEタイプのみ画像を装う）
+        response = self.client.post(
+            '/blog/create',
+            data={
+                'store_url': 'https://beauty.hotpepper.jp/slnH000XXXXX/',
+                'images': (io.BytesIO(b'<?php echo "not an image"; ?>'), 'fake.jpg', 'image/jpeg')
+            },
+            content_type='multipart/form-data'
+        )
+        
+        # 検証
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.location.endswith('/blog/create'))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+        response = self.client.get(response.location)
+        self.assertIn('JPEG, PNG, GIF, WEBPのみ対応しています'.encode('utf-8'), response.data)
+    
     @patch('app.blueprints.blog.routes.scrape_hpb_data')
     @patch('app.blueprints.blog.routes.generate_blog_with_gemini')
     @patch('app.blueprints.blog.routes.asyncio')
@@ -236,19 +310,46 @@ class TestBlogRoutes(unittest.TestCase):
         self.assertIn('山田 太郎'.encode('utf-8'), response.data)
         self.assertIn('初回限定20%オフ'.encode('utf-8'), response.data)
     
+    def test_image_preview(self):
+        """プレビュー画像の配信とHTTPキャッシュのテスト"""
+        from PIL import Image
+        image_path = os.path.join(self.temp_dir.name, 'preview.png')
+        Image.new('RGB', (1200, 800), (0, 128, 255)).save(image_path)
+        
+        # セッションにデータを設定
+        with self.client.session_transaction() as sess:
+            sess['uploaded_images'] = [{
+                'filename': 'preview.png',
+                'path': image_path,
+                'placeholder': '[IMAGE_1]'
+            }]
+        
+        # 初回はサムネイルを返す
+        response = self.client.get('/blog/image/preview.png?size=small')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        self.assertIn('private', response.headers['Cache-Control'])
+        etag = response.headers['ETag']
+        self.assertTrue(etag)
+        
+        # 同じETagでの再リクエストは304
+        response = self.client.get('/blog/image/preview.png?size=small',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        
+        # セッションにない画像と未定義のサイズは404
+        self.assertEqual(self.client.get('/blog/image/other.png').status_code, 404)
+        self.assertEqual(self.client.get('/blog/image/preview.png?size=huge').status_code, 404)
+    
     @patch('app.blueprints.blog.routes.post_to_sb')
     @patch('app.blueprints.blog.routes.clean_session_images')
-    @patch('app.blueprints.blog.routes.asyncio')
-    def test_post_to_sb_success(self, mock_asyncio, mock_clean_session, mock_post_to_sb):
+    def test_post_to_sb_success(self, mock_clean_session, mock_post_to_sb):
         """サロンボード投稿処理の成功テスト"""
         # モックの設定
-        mock_post_to_sb_result = {
+        mock_post_to_sb.return_value = {
             'success': True,
             'message': 'ブログが正常に投稿されました。'
         }
-        mock_loop = MagicMock()
-        mock_loop.run_until_complete.return_value = mock_post_to_sb_result
-        mock_asyncio.new_event_loop.return_value = mock_loop
         
         # セッションにデータを設定
         with self.client.session_transaction() as sess:
@@ -276,19 +377,19 @@ class TestBlogRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue('/blog/create' in response.location)
         mock_clean_session.assert_called_once()
+        mock_post_to_sb.assert_called_once_with(
+            'test_id', 'test_password', 'テストタイトル', 'テスト本文 [IMAGE_1]', '山田 太郎',
+            ANY, '初回限定20%オフ'
+        )
     
     @patch('app.blueprints.blog.routes.post_to_sb')
-    @patch('app.blueprints.blog.routes.asyncio')
-    def test_post_to_sb_failure(self, mock_asyncio, mock_post_to_sb):
+    def test_post_to_sb_failure(self, mock_post_to_sb):
         """サロンボード投稿処理の失敗テスト"""
         # モックの設定
-        mock_post_to_sb_result = {
+        mock_post_to_sb.return_value = {
             'success': False,
             'message': 'ログインに失敗しました。'
         }
-        mock_loop = MagicMock()
-        mock_loop.run_until_complete.return_value = mock_post_to_sb_result
-        mock_asyncio.new_event_loop.return_value = mock_loop
         
         # セッションにデータを設定
         with self.client.session_transaction() as sess:
@@ -314,6 +415,88 @@ class TestBlogRoutes(unittest.TestCase):
         # 検証
         self.assertEqual(response.status_code, 200)
         self.assertIn('投稿に失敗しました'.encode('utf-8'), response.data)
+    
+    def _add_to_batch(self, title):
+        """編集中のブログをバッチに追加する"""
+        image_path = os.path.join(self.temp_dir.name, f'{title}.jpg')
+        with open(image_path, 'wb') as f:
+            f.write(self.test_image_data)
+        with self.client.session_transaction() as sess:
+            sess['uploaded_images'] = [{
+                'filename': f'{title}.jpg',
+                'path': image_path,
+                'placeholder': '[IMAGE_1]'
+            }]
+        return self.client.post('/blog/batch/add', data={
+            'title': title,
+            'body': 'テスト本文 [IMAGE_1]',
+            'stylist': '山田 太郎',
+            'coupon': ''
+        })
+    
+    def test_batch_add(self):
+        """編集中のブログをバッチに追加するテスト"""
+        response = self._add_to_batch('タイトル1')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue('/blog/batch' in response.location)
+        self._add_to_batch('タイトル2')
+        
+        # 検証（編集中のデータはクリアされ、バッチ画面に2件表示される）
+        with self.client.session_transaction() as sess:
+            self.assertNotIn('uploaded_images', sess)
+        response = self.client.get('/blog/batch')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('投稿待ち（2件）'.encode('utf-8'), response.data)
+        self.assertIn('タイトル1'.encode('utf-8'), response.data)
+        self.assertIn('タイトル2'.encode('utf-8'), response.data)
+    
+    def test_batch_remove(self):
+        """バッチから投稿を削除するテスト"""
+        self._add_to_batch('タイトル1')
+        image_path = os.path.join(self.temp_dir.name, 'タイトル1.jpg')
+        
+        response = self.client.post('/blog/batch/remove/0', follow_redirects=True)
+        
+        # 検証
+        self.assertIn('投稿待ち（0件）'.encode('utf-8'), response.data)
+        self.assertFalse(os.path.exists(image_path))
+    
+    @patch('app.blueprints.blog.routes.post_batch_to_sb')
+    def test_batch_post(self, mock_post_batch):
+        """バッチ投稿で成功した投稿のみバッチから外れるテスト"""
+        self._add_to_batch('タイトル1')
+        self._add_to_batch('タイトル2')
+        mock_post_batch.return_value = {
+            'success': False,
+            'message': '2件中1件のブログを投稿しました。',
+            'results': [
+                {'success': True, 'message': 'ブログが正常に投稿されました。'},
+                {'success': False, 'message': 'ブログの投稿に失敗しました。'}
+            ]
+        }
+        
+        response = self.client.post('/blog/batch/post', data={
+            'sb_id': 'test_id',
+            'sb_password': 'test_password'
+        })
+        
+        # 検証（1回の呼び出しで2件を渡し、失敗した1件が残る）
+        self.assertEqual(response.status_code, 200)
+        mock_post_batch.assert_called_once_with('test_id', 'test_password', ANY)
+        posts = mock_post_batch.call_args[0][2]
+        self.assertEqual([post['title'] for post in posts], ['タイトル1', 'タイトル2'])
+        self.assertIn('投稿待ち（1件）'.encode('utf-8'), response.data)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, 'タイトル1.jpg')))
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, 'タイトル2.jpg')))
+    
+    def test_automation_status(self):
+        """自動投稿の実行状況のテスト（エンジン未起動時は起動しない）"""
+        response = self.client.get('/blog/automation/status')
+        
+        # 検証
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'running': False})
+        self.assertNotIn('sb_automation_engine', self.app.extensions)
 
 if __name__ == '__main__':
     unittest.main()
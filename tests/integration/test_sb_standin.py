@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+from bs4 import BeautifulSoup
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.blueprints.blog.sb_http import SalonBoardHttpPoster, FormChangedError, LoginRequiredError
+from tests.sb_standin import create_standin_app, StandinServer
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+def load_sb_selectors():
+    """selectors.json の sb セクションを読み込む"""
+    with open(os.path.join(PROJECT_ROOT, 'selectors.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['sb']
+
+def chromium_available() -> bool:
+    """Playwright の Chromium が起動できるかどうか"""
+    async def launch():
+        from playwright.async_api import async_playwright
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            await browser.close()
+
+    try:
+        asyncio.run(launch())
+        return True
+    except Exception:
+        return False
+
+class TestStandinSelectors(unittest.TestCase):
+    """スタンドインサーバーの画面が selectors.json のセレクタに一致するかのテスト"""
+
+    def setUp(self):
+        """テストの前処理"""
+        self.selectors = load_sb_selectors()
+        self.client = create_standin_app().test_client()
+
+    def _assert_selectors(self, path, section, keys):
+        """画面に指定したセレクタの要素が存在することを確認する"""
+        soup = BeautifulSoup(self.client.get(path).data, 'html.parser')
+        for key in keys:
+            selector = self.selectors[section][key]
+            self.assertIsNotNone(soup.select_one(selector), f"{path} に {section}.{key}（{selector}）がありません")
+
+    def test_login_page(self):
+        """ログイン画面のセレクタのテスト"""
+        self._assert_selectors('/login/', 'login', ['id_input', 'password_input', 'login_button'])
+
+    def test_login(self):
+        """ログイン成功・失敗のテスト"""
+        response = self.client.post('/login/', data={'userId': 'standin', 'password': 'wrong'})
+        self.assertIn('error-message', response.get_data(as_text=True))
+
+        response = self.client.post('/login/', data={'userId': 'standin', 'password': 'standin'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/KLP/top/', response.location)
+
+    def test_post_flow_pages(self):
+        """ナビゲーションと投稿フォームのセレクタのテスト"""
+        self.client.post('/login/', data={'userId': 'standin', 'password': 'standin'})
+
+        self._assert_selectors('/KLP/top/', 'navigation', ['publish_management'])
+        self._assert_selectors('/CNB/draft/', 'navigation', ['blog_button'])
+        self._assert_selectors('/CNB/blog/list/', 'navigation', ['new_post_button'])
+        self._assert_selectors('/CNB/blog/edit/', 'blog_form', list(self.selectors['blog_form']))
+
+class TestHttpPoster(unittest.TestCase):
+    """スタンドインサーバーに対するHTTPでの直接投稿のテスト"""
+
+    def setUp(self):
+        """テストの前処理"""
+        self.standin = create_standin_app()
+        self.server = StandinServer(self.standin).start()
+        self.addCleanup(self.server.stop)
+        self.selectors = load_sb_selectors()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.image_path = os.path.join(self.temp_dir.name, 'test.gif')
+        with open(self.image_path, 'wb') as f:
+            f.write(b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+    def _login_cookies(self):
+        """ログインしてPlaywrightの形式のCookieを取得する"""
+        import requests
+
+        session = requests.Session()
+        session.post(f'{self.server.url}/login/', data={'userId': 'standin', 'password': 'standin'})
+        return [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path, 'secure': c.secure}
+            for c in session.cookies
+        ]
+
+    def test_post(self):
+        """CSRFトークンを引き継いで画像アップロードと投稿を行うテスト"""
+        poster = SalonBoardHttpPoster(self.server.url, self._login_cookies(), self.selectors)
+
+        success = poster.post('タイトル', '本文\n2行目', '佐藤 花子', [self.image_path] * 2, '初回限定20%オフ')
+
+        # 検証
+        self.assertTrue(success)
+        post = self.standin.config['POSTS'][0]
+        self.assertEqual((post['title'], post['stylist'], post['coupon'], post['images']),
+                         ('タイトル', '佐藤 花子', '初回限定20%オフ', 2))
+        self.assertIn('本文<br>2行目', post['body'])
+
+    def test_login_required(self):
+        """ログイン状態が無効な場合のテスト"""
+        poster = SalonBoardHttpPoster(self.server.url, [], self.selectors)
+
+        with self.assertRaises(LoginRequiredError):
+            poster.post('タイトル', '本文', '佐藤 花子', [])
+
+    def test_form_changed(self):
+        """フォームの構造が変わった場合は投稿せずに FormChangedError を送出するテスト"""
+        selectors = dict(self.selectors, blog_form=dict(self.selectors['blog_form'], title_input='#renamedTitle'))
+        poster = SalonBoardHttpPoster(self.server.url, self._login_cookies(), selectors)
+
+        with self.assertRaises(FormChangedError):
+            poster.post('タイトル', '本文', '佐藤 花子', [self.image_path])
+
+        # 検証（画像アップロードも行わない）
+        self.assertEqual(self.standin.config['UPLOADS'], 0)
+        self.assertEqual(self.standin.config['POSTS'], [])
+
+@unittest.skipUnless(chromium_available(), 'Playwright の Chromium がインストールされていません')
+class TestSalonBoardAutomationEndToEnd(unittest.TestCase):
+    """スタンドインサーバーに対する SalonBoardAutomation の結合テスト"""
+
+    def setUp(self):
+        """テストの前処理"""
+        self.standin = create_standin_app(latencies={'long_poll': 2.0})
+        self.server = StandinServer(self.standin).start()
+        self.addCleanup(self.server.stop)
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.image_path = os.path.join(self.temp_dir.name, 'test.gif')
+        with open(self.image_path, 'wb') as f:
+            f.write(b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+        self.app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'SELECTORS': {'sb': load_sb_selectors()},
+            'SB_BASE_URL': self.server.url,
+            'SB_SESSION_CACHE_TTL': 0,
+            'SB_AUTOMATION_PROFILE': 'fast',
+            'SB_BLOCKED_RESOURCE_TYPES': ['image', 'media', 'font']
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.addCleanup(self.app_context.pop)
+
+    def test_post_to_sb(self):
+        """ログインから投稿までの一連の操作のテスト"""
+        from app.blueprints.blog.sb_automation import post_to_sb
+
+        result = asyncio.run(post_to_sb(
+            'standin', 'standin', 'テストタイトル', 'テスト本文', '山田 太郎',
+            [{'path': self.image_path}], '初回限定20%オフ'
+        ))
+
+        # 検証
+        self.assertTrue(result['success'], result['message'])
+        post = self.standin.config['POSTS'][0]
+        self.assertEqual(post['title'], 'テストタイトル')
+        self.assertEqual(post['stylist'], '山田 太郎')
+        self.assertEqual(post['coupon'], '初回限定20%オフ')
+        self.assertEqual(post['images'], 1)
+
+    def test_post_multiple_images(self):
+        """複数画像を1回のファイル選択でアップロードするテスト"""
+        from app.blueprints.blog.sb_automation import post_to_sb
+
+        result = asyncio.run(post_to_sb(
+            'standin', 'standin', 'テストタイトル', 'テスト本文', '山田 太郎', [{'path': self.image_path}] * 3
+        ))
+
+        # 検証
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(self.standin.config['POSTS'][0]['images'], 3)
+        self.assertIn('upload_images[1-3]', [span['name'] for span in result['spans']])
+
+    def test_login_failure(self):
+        """誤ったパスワードでのログイン失敗のテスト"""
+        from app.blueprints.blog.sb_automation import post_to_sb
+
+        result = asyncio.run(post_to_sb('standin', 'wrong', 'タイトル', '本文', '山田 太郎', []))
+
+        # 検証
+        self.assertFalse(result['success'])
+        self.assertIn('ログインに失敗しました', result['message'])
+
+    def test_post_batch_to_sb(self):
+        """1回のログインで複数投稿するテスト"""
+        from app.blueprints.blog.sb_automation import post_batch_to_sb
+
+        posts = [
+            {'title': f'タイトル{i}', 'body': '本文', 'stylist': '佐藤 花子', 'images': [], 'coupon': None}
+            for i in range(1, 4)
+        ]
+        result = asyncio.run(post_batch_to_sb('standin', 'standin', posts))
+
+        # 検証
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual([post['title'] for post in self.standin.config['POSTS']], ['タイトル1', 'タイトル2', 'タイトル3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""サロンボードの代替（スタンドイン）サーバー
+
+SalonBoardAutomation をオフラインで結合テスト・ベンチマークするための
+ローカルWebアプリケーション。selectors.json の sb セクションのセレクタに
+一致するログインフォーム、ナビゲーション、nicEditの本文エリア、
+画像アップロードモーダル、クーポン選択モーダル、確認処理を再現する。
+
+各処理の遅延（秒）を latencies で指定でき、本番のように通信が続く状況を
+再現するための長時間ポーリングや、画像・フォント・解析スクリプトの読み込みも含む。
+
+使用例:
+    python tests/sb_standin.py --port 5001 --latency page=0.2 --latency upload=0.5
+    python benchmarks/sb_profiles.py --base-url http://127.0.0.1:5001 \\
+        --sb-id standin --sb-password standin --stylist "山田 太郎"
+"""
+
+import sys
+import time
+import secrets
+import argparse
+import threading
+from typing import Dict, List, Optional
+from flask import Flask, request, session, redirect, jsonify, abort, render_template, Response
+from jinja2 import DictLoader
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+# 各処理の遅延（秒）の既定値
+DEFAULT_LATENCIES = {
+    'login': 0.0,      # ログイン処理
+    'page': 0.0,       # 各画面の表示
+    'upload': 0.0,     # 画像アップロード
+    'confirm': 0.0,    # 投稿の確定
+    'asset': 0.0,      # 画像・フォント・解析スクリプトの配信
+    'long_poll': 10.0  # 画面から常時発行される長時間ポーリング
+}
+
+DEFAULT_ACCOUNTS = {'standin': 'standin'}
+DEFAULT_STYLISTS = ['山田 太郎', '佐藤 花子']
+DEFAULT_COUPONS = ['初回限定20%オフ', 'カット+カラー']
+
+# 1x1 の透過GIF
+_PIXEL_GIF = b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+
+_LAYOUT = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="UTF-8">
+<title>SALON BOARD（スタンドイン）</title>
+<link rel="stylesheet" href="/assets/font.css">
+<script src="/assets/analytics.js" async></script>
+<style>
+  .modal { display: none; position: fixed; top: 10%; left: 20%; background: #fff; border: 1px solid #999; padding: 1em; }
+  .modal.is-open { display: block; }
+  .nicEdit-main { min-height: 200px; border: 1px solid #ccc; }
+</style>
+</head>
+<body>
+<img src="/assets/banner.gif" alt="">
+{% if logged_in %}
+<div id="globalNavi">
+  <ul class="common-CLPcommon__globalNavi">
+    <li><a href="/KLP/top/">トップ</a></li>
+    <li><a href="/CNB/draft/">掲載管理</a></li>
+    <li><a href="/KLP/reserve/">予約管理</a></li>
+  </ul>
+</div>
+{% endif %}
+{% block content %}{% endblock %}
+<script>
+  // 本番の画面と同様に通信が途切れない状態を再現する
+  (function poll() {
+    fetch('/api/poll').then(poll, function() { setTimeout(poll, 1000); });
+  })();
+</script>
+</body>
+</html>
+"""
+
+_LOGIN = """{% extends 'layout.html' %}{% block content %}
+{% if error %}<p class="error-message">{{ error }}</p>{% endif %}
+<form id="idPasswordInputForm" method="post" action="/login/">
+  <div>
+    <dl><dt>ユーザーID</dt><dd><input type="text" name="userId"></dd></dl>
+    <dl><dt>パスワード</dt><dd><input type="password" name="password" id="jsiPwInput"></dd></dl>
+    <div><a href="#" onclick="document.getElementById('idPasswordInputForm').submit(); return false;">ログイン</a></div>
+  </div>
+</form>
+{% endblock %}"""
+
+_TOP = """{% extends 'layout.html' %}{% block content %}
+<h1>トップ</h1>
+{% endblock %}"""
+
+_DRAFT = """{% extends 'layout.html' %}{% block content %}
+<form id="cmsForm">
+  <div><div><ul>
+    {% for i in range(1, 9) %}<li><a href="#">メニュー{{ i }}</a></li>{% endfor %}
+    <li><a href="/CNB/blog/list/">ブログ</a></li>
+  </ul></div></div>
+</form>
+{% endblock %}"""
+
+_BLOG_LIST = """{% extends 'layout.html' %}{% block content %}
+{% if message %}<p class="success-message">{{ message }}</p>{% endif %}
+<a id="newPosts" href="/CNB/blog/edit/">新規投稿</a>
+<ul>{% for post in posts %}<li>{{ post.title }}</li>{% endfor %}</ul>
+{% endblock %}"""
+
+_BLOG_EDIT = """{% extends 'layout.html' %}{% block content %}
+<form id="blogForm" method="post" action="/CNB/blog/confirm/">
+  <input type="hidden" name="csrfToken" value="{{ csrf_token }}">
+  <select id="stylistId" name="stylistId">
+    <option value="">選択してください</option>
+    {% for stylist in stylists %}<option value="{{ loop.index }}">{{ stylist }}</option>{% endfor %}
+  </select>
+  <select id="blogCategoryCd" name="blogCategoryCd"><option value="1">おしらせ</option></select>
+  <input type="text" id="blogTitle" name="blogTitle">
+  <div class="nicEdit-main" contenteditable="true"></div>
+  <input type="hidden" name="blogContents" id="blogContents">
+  <input type="hidden" name="couponName" id="couponName">
+  <button type="button" id="upload">画像アップロード</button>
+  <a href="#" class="jsc_SB_modal_trigger">クーポンを選択</a>
+  <a href="#" id="confirm">確認する</a>
+</form>
+
+<div class="modal" id="imageModal">
+  <input type="file" id="sendFile" accept="image/*"{% if multiple_upload %} multiple{% endif %}>
+  <p class="upload-status"></p>
+  <a href="#" class="jscImageUploaderModalSubmitButton">挿入する</a>
+</div>
+
+<div class="modal" id="couponModal">
+  {% for coupon in coupons %}<label><input type="radio" name="couponChoice" value="{{ coupon }}">{{ coupon }}</label>{% endfor %}
+  <a href="#" class="jsc_SB_modal_setting_btn">設定する</a>
+</div>
+
+<script>
+  const editor = document.querySelector('.nicEdit-main');
+  const imageModal = document.getElementById('imageModal');
+  const couponModal = document.getElementById('couponModal');
+  let uploadedUrls = [];
+
+  document.getElementById('upload').addEventListener('click', function() {
+    uploadedUrls = [];
+    imageModal.classList.add('is-open');
+  });
+  document.getElementById('sendFile').addEventListener('change', function() {
+    // ファイルごとに1リクエストでアップロードする
+    Array.from(this.files).forEach(function(file, index) {
+      const data = new FormData();
+      data.append('file', file);
+      data.append('csrfToken', document.querySelector('input[name="csrfToken"]').value);
+      fetch('/CNB/blog/imgUpload/', {method: 'POST', body: data})
+        .then(function(r) { return r.json(); })
+        .then(function(result) {
+          uploadedUrls[index] = result.url;
+          imageModal.querySelector('.upload-status').textContent = 'アップロード完了';
+        });
+    });
+  });
+  document.querySelector('.jscImageUploaderModalSubmitButton').addEventListener('click', function(e) {
+    e.preventDefault();
+    uploadedUrls.forEach(function(url) {
+      const img = document.createElement('img');
+      img.src = url;
+      editor.appendChild(img);
+    });
+    imageModal.classList.remove('is-open');
+  });
+  document.querySelector('.jsc_SB_modal_trigger').addEventListener('click', function(e) {
+    e.preventDefault();
+    couponModal.classList.add('is-open');
+  });
+  document.querySelector('.jsc_SB_modal_setting_btn').addEventListener('click', function(e) {
+    e.preventDefault();
+    const checked = couponModal.querySelector('input:checked');
+    document.getElementById('couponName').value = checked ? checked.value : '';
+    couponModal.classList.remove('is-open');
+  });
+  document.getElementById('confirm').addEventListener('click', function(e) {
+    e.preventDefault();
+    document.getElementById('blogContents').value = editor.innerHTML;
+    document.getElementById('blogForm').submit();
+  });
+</script>
+{% endblock %}"""
+
+_TEMPLATES = {
+    'layout.html': _LAYOUT,
+    'login.html': _LOGIN,
+    'top.html': _TOP,
+    'draft.html': _DRAFT,
+    'blog_list.html': _BLOG_LIST,
+    'blog_edit.html': _BLOG_EDIT
+}
+
+def create_standin_app(latencies: Optional[Dict[str, float]] = None, accounts: Optional[Dict[str, str]] = None,
+                       stylists: Optional[List[str]] = None, coupons: Optional[List[str]] = None,
+                       multiple_upload: bool = True) -> Flask:
+    """スタンドインサーバーのアプリケーションを作成する
+
+    Args:
+        latencies: 処理ごとの遅延（秒）。キーは DEFAULT_LATENCIES を参照
+        accounts: ログインできるアカウント（ID: パスワード）
+        stylists: 選択できるスタイリスト
+        coupons: 選択できるクーポン
+        multiple_upload: 画像のファイル選択で複数ファイルを選択できるようにするかどうか
+
+    Returns:
+        Flask: スタンドインサーバーのアプリケーション。投稿内容は app.config['POSTS'] に記録される
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = secrets.token_hex(16)
+    app.config['LATENCIES'] = dict(DEFAULT_LATENCIES, **(latencies or {}))
+    app.config['ACCOUNTS'] = accounts or dict(DEFAULT_ACCOUNTS)
+    app.config['STYLISTS'] = stylists or list(DEFAULT_STYLISTS)
+    app.config['COUPONS'] = coupons or list(DEFAULT_COUPONS)
+    app.config['MULTIPLE_UPLOAD'] = multiple_upload
+    app.config['POSTS'] = []
+    app.config['UPLOADS'] = 0
+    lock = threading.Lock()
+
+    app.jinja_loader = DictLoader(_TEMPLATES)
+
+    def delay(name: str):
+        seconds = app.config['LATENCIES'].get(name, 0)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def render_edit():
+        session.setdefault('csrf', secrets.token_hex(16))
+        return render('blog_edit.html', stylists=app.config['STYLISTS'], coupons=app.config['COUPONS'],
+                      multiple_upload=app.config['MULTIPLE_UPLOAD'], csrf_token=session['csrf'])
+
+    def check_csrf():
+        if not session.get('csrf') or request.form.get('csrfToken') != session['csrf']:
+            abort(403)
+
+    def render(name: str, **context):
+        return render_template(name, logged_in=bool(session.get('account')), **context)
+
+    def require_login():
+        if not session.get('account'):
+            return redirect('/login/')
+        delay('page')
+        return None
+
+    @app.route('/login/', methods=['GET', 'POST'])
+    def login():
+        error = None
+        if request.method == 'POST':
+            delay('login')
+            user_id = request.form.get('userId', '')
+            password = request.form.get('password', '')
+            if user_id and app.config['ACCOUNTS'].get(user_id) == password:
+                session['account'] = user_id
+                return redirect('/KLP/top/')
+            error = 'ユーザーIDまたはパスワードが正しくありません。'
+        else:
+            delay('page')
+        return render('login.html', error=error)
+
+    @app.route('/KLP/top/')
+    def top():
+        return require_login() or render('top.html')
+
+    @app.route('/CNB/draft/')
+    def draft():
+        return require_login() or render('draft.html')
+
+    @app.route('/CNB/blog/list/')
+    def blog_list():
+        posts = [post for post in app.config['POSTS'] if post['account'] == session.get('account')]
+        return require_login() or render('blog_list.html', posts=posts, message=request.args.get('message'))
+
+    @app.route('/CNB/blog/edit/')
+    def blog_edit():
+        return require_login() or render_edit()
+
+    @app.route('/CNB/blog/imgUpload/', methods=['POST'])
+    def image_upload():
+        if not session.get('account'):
+            abort(401)
+        check_csrf()
+        delay('upload')
+        file = request.files.get('file')
+        if file is None or not file.read():
+            abort(400)
+        with lock:
+            app.config['UPLOADS'] += 1
+            number = app.config['UPLOADS']
+        return jsonify({'url': f'/assets/uploaded/{number}.gif'})
+
+    @app.route('/CNB/blog/confirm/', methods=['POST'])
+    def blog_confirm():
+        if not session.get('account'):
+            return redirect('/login/')
+        check_csrf()
+        delay('confirm')
+        stylist_index = request.form.get('stylistId', '')
+        title = request.form.get('blogTitle', '')
+        if not title or not stylist_index.isdigit():
+            return render_edit()
+        body = request.form.get('blogContents', '')
+        with lock:
+            app.config['POSTS'].append({
+                'account': session['account'],
+                'title': title,
+                'body': body,
+                'stylist': app.config['STYLISTS'][int(stylist_index) - 1],
+                'coupon': request.form.get('couponName') or None,
+                'images': body.count('<img')
+            })
+        return redirect('/CNB/blog/list/?message=ブログの登録が完了しました。')
+
+    @app.route('/api/poll')
+    def long_poll():
+        delay('long_poll')
+        return jsonify({'events': []})
+
+    @app.route('/assets/<path:name>')
+    def assets(name):
+        delay('asset')
+        if name.endswith('.css'):
+            return Response("@font-face { font-family: standin; src: url('/assets/font.woff2'); }", mimetype='text/css')
+        if name.endswith('.js'):
+            return Response('window.standinAnalytics = true;', mimetype='application/javascript')
+        if name.endswith('.woff2'):
+            return Response(b'', mimetype='font/woff2')
+        return Response(_PIXEL_GIF, mimetype='image/gif')
+
+    return app
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """リクエストごとのアクセスログを出力しないハンドラ（テスト用）"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+class StandinServer:
+    """スタンドインサーバーを別スレッドで起動する（with 文で使用可能）"""
+
+    def __init__(self, app: Optional[Flask] = None, host: str = '127.0.0.1', port: int = 0, quiet: bool = True):
+        """初期化
+
+        Args:
+            app: スタンドインサーバーのアプリケーション（省略時は既定の設定で作成）
+            host: 待ち受けるホスト
+            port: 待ち受けるポート（0の場合は空いているポート）
+            quiet: アクセスログを出力しないかどうか
+        """
+        self.app = app or create_standin_app()
+        self._server = make_server(
+            host, port, self.app, threaded=True,
+            request_handler=_QuietRequestHandler if quiet else None
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """サーバーのベースURL"""
+        return f"http://{self._server.host}:{self._server.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='sb-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """現在のスレッドでサーバーを実行する"""
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+def parse_latencies(values: List[str]) -> Dict[str, float]:
+    """name=秒 形式の遅延指定を解析する"""
+    latencies = {}
+    for value in values:
+        name, _, seconds = value.partition('=')
+        if name not in DEFAULT_LATENCIES:
+            raise ValueError(f"不明な遅延の種類です: {name}")
+        latencies[name] = float(seconds)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description='サロンボードのスタンドインサーバーを起動します')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--latency', action='append', default=[],
+                        help=f"処理ごとの遅延（name=秒、name: {', '.join(DEFAULT_LATENCIES)}）")
+    args = parser.parse_args()
+
+    app = create_standin_app(latencies=parse_latencies(args.latency))
+    server = StandinServer(app, host=args.host, port=args.port, quiet=False)
+    print(f"スタンドインサーバーを起動しました: {server.url}（ID/パスワード: standin/standin）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
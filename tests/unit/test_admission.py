@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import unittest
+import tempfile
+import threading
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.admission import AdmissionGate, AdmissionRejected, get_admission_gate
+
+class TestAdmissionGate(unittest.TestCase):
+    """同時実行数を制限するゲートのユニットテスト"""
+    
+    def test_reject_when_queue_full(self):
+        """実行枠と待ち行列が埋まっている場合はすぐに拒否するテスト"""
+        gate = AdmissionGate('generate', limit=1, queue_size=0, default_retry_after=7)
+        gate.acquire()
+        
+        started = time.monotonic()
+        with self.assertRaises(AdmissionRejected) as cm:
+            gate.acquire()
+        
+        # 検証
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(cm.exception.position, 1)
+        self.assertEqual(cm.exception.retry_after, 7)
+    
+    def test_wait_for_release(self):
+        """待ち行列で空きを待ち、返却されたら実行するテスト"""
+        gate = AdmissionGate('generate', limit=1, queue_size=1, wait_seconds=5)
+        gate.acquire()
+        admitted = threading.Event()
+        
+        def wait():
+            gate.acquire()
+            admitted.set()
+        
+        thread = threading.Thread(target=wait)
+        thread.start()
+        time.sleep(0.05)
+        
+        # 検証（待ち行列に入り、待ち行列が埋まったため次は拒否される）
+        self.assertEqual(gate.waiting, 1)
+        with self.assertRaises(AdmissionRejected) as cm:
+            gate.acquire()
+        self.assertEqual(cm.exception.position, 2)
+        
+        gate.release(duration=4.0)
+        thread.join(5)
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(gate.stats()['running'], 1)
+        self.assertEqual(gate.retry_after(2), 8)
+    
+    def test_wait_timeout(self):
+        """待ち時間を超えた場合は拒否するテスト"""
+        gate = AdmissionGate('sb_post', limit=1, queue_size=2, wait_seconds=0.05)
+        gate.acquire()
+        
+        with self.assertRaises(AdmissionRejected) as cm:
+            gate.acquire()
+        
+        # 検証
+        self.assertEqual(cm.exception.position, 1)
+        self.assertEqual(gate.waiting, 0)
+
+class TestAdmissionRoutes(unittest.TestCase):
+    """重い処理のルートの混雑時の応答のテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'ADMISSION_LIMITS': {'generate': 1, 'sb_post': 1},
+            'ADMISSION_QUEUE_SIZE': 0,
+            'ADMISSION_RETRY_AFTER': 15
+        })
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['logged_in'] = True
+        self.gate = get_admission_gate(self.app, 'generate')
+    
+    def test_busy_response(self):
+        """実行枠が埋まっている場合は503と Retry-After を返すテスト"""
+        self.gate.acquire()
+        
+        response = self.client.get('/blog/generate')
+        
+        # 検証
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '15')
+        self.assertIn('1番目', response.get_data(as_text=True))
+        self.assertIn('http-equiv="refresh"', response.get_data(as_text=True))
+    
+    def test_busy_json(self):
+        """JSONを要求された場合は待ち順をJSONで返すテスト"""
+        self.gate.acquire()
+        
+        response = self.client.get('/blog/generate', headers={'Accept': 'application/json'})
+        
+        # 検証
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json(), {
+            'busy': True, 'operation': 'generate', 'position': 1, 'retry_after': 15
+        })
+    
+    def test_released_after_request(self):
+        """処理が終わると実行枠を返却するテスト"""
+        response = self.client.get('/blog/generate')
+        
+        # 検証（セッションに情報がないため作成画面にリダイレクトされる）
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.gate.stats()['running'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import os
+import sys
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.blueprints.blog.browser_pool import BrowserPool
+from app.blueprints.blog.automation_engine import AutomationEngine
+from app.blueprints.blog.sb_diagnostics import RunDiagnostics
+from tests.async_test_case import AsyncTestCase
+
+class TestBrowserPool(AsyncTestCase):
+    """ブラウザプールのユニットテスト"""
+
+    def setUp(self):
+        """テストの前処理"""
+        # Playwrightのモック
+        patcher = patch('app.blueprints.blog.browser_pool.async_playwright')
+        self.mock_async_playwright = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.launched = []
+
+        async def launch(**kwargs):
+            browser = MagicMock()
+            browser.is_connected.return_value = True
+            browser.close = AsyncMock()
+            self.launched.append(browser)
+            return browser
+
+        self.mock_playwright = MagicMock()
+        self.mock_playwright.chromium.launch = AsyncMock(side_effect=launch)
+        self.mock_playwright.stop = AsyncMock()
+        self.mock_async_playwright.return_value.start = AsyncMock(return_value=self.mock_playwright)
+
+    async def _lease_all(self, pool, count):
+        """プールから順にブラウザを借りて返却する"""
+        results = []
+        for _ in range(count):
+            async with pool.lease() as browser:
+                results.append(browser)
+        return results
+
+    async def test_lease_reuses_warm_browser(self):
+        """起動済みブラウザを複数のジョブで使い回すテスト"""
+        pool = BrowserPool(size=1, launch_options={'headless': True})
+
+        results = await self._lease_all(pool, 3)
+        await pool.close()
+
+        # 検証
+        self.assertEqual(self.mock_playwright.chromium.launch.call_count, 1)
+        self.assertTrue(all(browser is self.launched[0] for browser in results))
+        self.mock_playwright.chromium.launch.assert_called_with(headless=True)
+
+    async def test_recycle_after_max_jobs(self):
+        """規定回数のジョブ後にブラウザを再起動するテスト"""
+        pool = BrowserPool(size=1, launch_options={}, max_jobs_per_browser=2)
+
+        results = await self._lease_all(pool, 3)
+        await pool.close()
+
+        # 検証
+        self.assertIs(results[0], results[1])
+        self.assertIsNot(results[1], results[2])
+        self.launched[0].close.assert_called_once()
+
+    async def test_recycle_after_crash(self):
+        """ブラウザのクラッシュ後に再起動するテスト"""
+        pool = BrowserPool(size=1, launch_options={})
+
+        with self.assertRaises(RuntimeError):
+            async with pool.lease() as browser:
+                browser.is_connected.return_value = False
+                raise RuntimeError('Target closed')
+        results = await self._lease_all(pool, 1)
+        await pool.close()
+
+        # 検証
+        self.assertIs(results[0], self.launched[1])
+        self.assertEqual(self.mock_playwright.chromium.launch.call_count, 2)
+
+    async def test_concurrent_leases_wait_for_return(self):
+        """空きがない場合は返却を待つテスト"""
+        pool = BrowserPool(size=1, launch_options={})
+        release = asyncio.Event()
+
+        async def hold():
+            async with pool.lease():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(self._lease_all(pool, 1))
+        await asyncio.sleep(0)
+
+        # 検証（1つ貸し出し中、1つ待機中）
+        self.assertEqual((pool.stats()['busy'], pool.stats()['waiting']), (1, 1))
+
+        release.set()
+        await holder
+        results = await waiter
+        await pool.close()
+
+        self.assertIs(results[0], self.launched[0])
+        self.assertEqual((pool.stats()['busy'], pool.stats()['waiting']), (0, 0))
+
+    async def test_shared_browser_recycles_after_last_job(self):
+        """1つのブラウザを複数ジョブで共有し、全ジョブ終了後に再起動するテスト"""
+        pool = BrowserPool(size=1, launch_options={}, contexts_per_browser=2, max_jobs_per_browser=2)
+        first_done = asyncio.Event()
+        release = asyncio.Event()
+        browsers = []
+
+        async def job(done=None):
+            async with pool.lease() as browser:
+                browsers.append(browser)
+                if done is not None:
+                    done.set()
+                await release.wait()
+
+        jobs = [asyncio.ensure_future(job(first_done)), asyncio.ensure_future(job())]
+        await first_done.wait()
+        await asyncio.sleep(0)
+
+        # 検証（同じブラウザを2件で同時に使用）
+        self.assertEqual(pool.stats()['busy'], 2)
+        self.assertIs(browsers[0], browsers[1])
+
+        release.set()
+        await asyncio.gather(*jobs)
+        results = await self._lease_all(pool, 1)
+        await pool.close()
+
+        # 規定回数に達したため、2件とも終わった後に1回だけ再起動
+        self.launched[0].close.assert_called_once()
+        self.assertIs(results[0], self.launched[1])
+        self.assertEqual(self.mock_playwright.chromium.launch.call_count, 2)
+
+    async def test_close_stops_browsers(self):
+        """終了時にブラウザとPlaywrightを停止するテスト"""
+        pool = BrowserPool(size=1, launch_options={})
+        await self._lease_all(pool, 1)
+
+        await pool.close()
+
+        # 検証
+        self.launched[0].close.assert_called_once()
+        self.mock_playwright.stop.assert_called_once()
+        with self.assertRaises(RuntimeError):
+            await self._lease_all(pool, 1)
+
+class TestAutomationEngine(unittest.TestCase):
+    """自動操作エンジンのユニットテスト"""
+
+    def test_run_returns_result(self):
+        """エンジンのループでコルーチンを実行するテスト"""
+        engine = AutomationEngine()
+        self.addCleanup(engine.close)
+
+        async def job():
+            async with engine.lease_browser() as browser:
+                return browser, asyncio.get_running_loop()
+
+        browser, loop = engine.run(job(), timeout=5)
+
+        # 検証（プールなしの場合はブラウザを貸し出さない）
+        self.assertIsNone(browser)
+        self.assertIs(loop, engine.loop)
+
+    def test_run_post_job_collects_stats(self):
+        """投稿ジョブをスケジューラ経由で実行し、状況を集計するテスト"""
+        engine = AutomationEngine()
+        self.addCleanup(engine.close)
+
+        async def post(browser):
+            return {'success': True, 'message': ''}
+
+        result = engine.run(engine.run_post_job('account', post), timeout=5)
+        stats = engine.stats()
+
+        # 検証
+        self.assertTrue(result['success'])
+        self.assertEqual(stats['scheduler']['accounts'][RunDiagnostics.account_key('account')]['completed'], 1)
+        self.assertEqual(stats['scheduler']['running'], 0)
+
+    def test_run_propagates_exception(self):
+        """コルーチンの例外が呼び出し元に伝わるテスト"""
+        engine = AutomationEngine()
+        self.addCleanup(engine.close)
+
+        async def job():
+            raise ValueError('failed')
+
+        with self.assertRaises(ValueError):
+            engine.run(job(), timeout=5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import unittest
+import requests
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.metrics import REGISTRY
+from app.utils.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, get_circuit_breaker
+)
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.blueprints.blog.scraping import _fetch_page
+from app.blueprints.blog.services import generate_blog_with_gemini
+from app.blueprints.blog.sb_automation import SalonBoardAutomation
+from tests.async_test_case import AsyncTestCase
+
+class TestCircuitBreaker(unittest.TestCase):
+    """サーキットブレーカーのユニットテスト"""
+    
+    def test_open_on_failure_rate(self):
+        """失敗の割合が閾値以上になると開き、呼び出しをすぐ拒否するテスト"""
+        breaker = CircuitBreaker('hpb', failure_rate=0.5, min_calls=4, window=10, open_seconds=30)
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+        
+        # 検証（最低呼び出し数に達するまでは判定しない）
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as cm:
+            breaker.allow()
+        self.assertEqual(cm.exception.name, 'hpb')
+        self.assertGreater(cm.exception.retry_after, 25)
+    
+    def test_half_open_probe(self):
+        """開いている時間の経過後は1件だけ試行し、成功すれば閉じるテスト"""
+        breaker = CircuitBreaker('gemini', failure_rate=0.5, min_calls=1, open_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        
+        breaker.allow()
+        
+        # 検証（試行中は他の呼び出しを拒否する）
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.allow()
+    
+    def test_half_open_failure_reopens(self):
+        """試行が失敗した場合は再び開くテスト"""
+        breaker = CircuitBreaker('sb_login', failure_rate=0.5, min_calls=1, open_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        
+        with self.assertRaises(TimeoutError):
+            with breaker.guard():
+                raise TimeoutError()
+        
+        # 検証
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+    def test_deadline_and_cancel_are_neutral(self):
+        """制限時間による打ち切りとキャンセルは失敗に数えず、試行枠を戻すテスト"""
+        breaker = CircuitBreaker('gemini', failure_rate=0.5, min_calls=1, open_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        
+        for error in (DeadlineExceeded('制限時間を超えました'), asyncio.CancelledError()):
+            with self.assertRaises(type(error)):
+                with breaker.guard():
+                    raise error
+        
+        # 検証（half_open のまま、次の試行を許可する）
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()['failures'], 0)
+
+class TestCircuitBreakerIntegration(AsyncTestCase):
+    """依存先の呼び出しとメトリクスへの組み込みのテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'CIRCUIT_BREAKER_ENABLED': True,
+            'CIRCUIT_MIN_CALLS': 2,
+            'CIRCUIT_OPEN_SECONDS': 30
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.addCleanup(self.app_context.pop)
+    
+    @patch('app.blueprints.blog.scraping.get_scraper_session')
+    def test_fetch_page_fail_fast(self, mock_get_session):
+        """HPBの5xxが続くとページを取得せずに失敗するテスト"""
+        session = mock_get_session.return_value
+        session.get.return_value.status_code = 503
+        session.get.return_value.raise_for_status.side_effect = Exception('503 Server Error')
+        
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                _fetch_page('https://example.com/stylist/')
+        
+        # 検証
+        with self.assertRaises(CircuitOpenError):
+            _fetch_page('https://example.com/coupon/')
+        self.assertEqual(session.get.call_count, 2)
+        self.assertIn('hpb_circuit_state{dependency="hpb",state="open"} 1', REGISTRY.render())
+    
+    @patch('app.blueprints.blog.scraping.get_scraper_session')
+    def test_client_error_not_recorded(self, mock_get_session):
+        """4xxはHPBの障害として記録しないテスト"""
+        session = mock_get_session.return_value
+        session.get.return_value.status_code = 404
+        session.get.return_value.raise_for_status.side_effect = Exception('404 Not Found')
+        
+        for _ in range(3):
+            with self.assertRaises(Exception):
+                _fetch_page('https://example.com/stylist/')
+        
+        # 検証
+        self.assertEqual(get_circuit_breaker(self.app, 'hpb').state, CLOSED)
+    
+    @patch('app.blueprints.blog.scraping.get_scraper_session')
+    def test_deadline_capped_timeout_not_recorded(self, mock_get_session):
+        """残り時間で短くしたタイムアウトはHPBの障害として記録しないテスト"""
+        session = mock_get_session.return_value
+        session.get.side_effect = requests.Timeout('Read timed out')
+        
+        for _ in range(3):
+            with self.assertRaises(DeadlineExceeded):
+                _fetch_page('https://example.com/stylist/', Deadline(1))
+        
+        # 検証
+        self.assertEqual(get_circuit_breaker(self.app, 'hpb').state, CLOSED)
+        self.assertEqual(get_circuit_breaker(self.app, 'hpb').stats()['calls'], 0)
+        
+        # 設定どおりのタイムアウトで応答がない場合はHPBの障害として記録する
+        for _ in range(2):
+            with self.assertRaises(requests.Timeout):
+                _fetch_page('https://example.com/stylist/', Deadline(60))
+        self.assertEqual(get_circuit_breaker(self.app, 'hpb').state, OPEN)
+    
+    @patch('app.blueprints.blog.services.open', create=True)
+    @patch('app.blueprints.blog.services.get_gemini_model')
+    async def test_gemini_deadline_not_recorded(self, mock_get_model, mock_open):
+        """制限時間の残りが少ないためのGeminiのタイムアウトは障害として記録しないテスト"""
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+        mock_get_model.return_value.generate_content_async = hang
+        mock_open.return_value.__enter__.return_value.read.return_value = b'test_image_data'
+        
+        for _ in range(3):
+            result = await generate_blog_with_gemini(
+                [{'path': '/tmp/test.jpg', 'placeholder': '[IMAGE_1]'}], 'casual', deadline=Deadline(0.05)
+            )
+            self.assertEqual(result['title'], 'エラーが発生しました')
+        
+        # 検証
+        breaker = get_circuit_breaker(self.app, 'gemini')
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()['calls'], 0)
+    
+    async def test_login_errors_open_breaker(self):
+        """ログイン処理のエラーは記録し、IDとパスワードの誤りは記録しないテスト"""
+        automation = SalonBoardAutomation('test_id', 'test_password')
+        
+        async def wrong_password():
+            return False
+        
+        async def page_timeout():
+            automation.login_error = TimeoutError('Timeout 30000ms exceeded')
+            return False
+        
+        automation._login = wrong_password
+        for _ in range(3):
+            self.assertFalse(await automation.login())
+        breaker = get_circuit_breaker(self.app, 'sb_login')
+        self.assertEqual(breaker.state, CLOSED)
+        
+        automation._login = page_timeout
+        for _ in range(3):
+            self.assertFalse(await automation.login())
+        
+        # 検証
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            await automation.login()
+    
+    async def test_cancelled_login_not_recorded(self):
+        """ログイン中にキャンセルされた場合は失敗として記録せず、試行枠を戻すテスト"""
+        automation = SalonBoardAutomation('test_id', 'test_password')
+        
+        async def hang():
+            await asyncio.sleep(10)
+        
+        automation._login = hang
+        breaker = get_circuit_breaker(self.app, 'sb_login')
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        breaker._opened_at -= 60  # 開いている時間を経過させる
+        
+        task = asyncio.ensure_future(automation.login())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        
+        # 検証（half_open のまま、次の試行を許可する）
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.allow()
+
+if __name__ == '__main__':
+    unittest.main()
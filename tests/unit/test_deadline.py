@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.blueprints.blog.scraping import _fetch_page, _scrape_coupons
+from app.blueprints.blog.services import generate_blog_with_gemini
+
+class TestDeadline(unittest.TestCase):
+    """制限時間のユニットテスト"""
+    
+    def test_timeout_from_remaining(self):
+        """残り時間と上限からタイムアウトを求めるテスト"""
+        deadline = Deadline(30)
+        
+        # 検証
+        self.assertEqual(deadline.timeout(10), 10)
+        self.assertGreater(deadline.timeout(), 29)
+        self.assertFalse(deadline.expired)
+    
+    def test_child_bounded_by_parent(self):
+        """処理ごとの制限時間が親の期限を超えないテスト"""
+        deadline = Deadline(5)
+        
+        # 検証
+        self.assertLessEqual(deadline.child(60).remaining(), 5)
+        self.assertLessEqual(deadline.child(1).remaining(), 1)
+    
+    def test_expired(self):
+        """期限切れの場合はタイムアウトを求めると例外になるテスト"""
+        deadline = Deadline(0)
+        
+        # 検証
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining(), 0)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.timeout(10)
+
+class TestDeadlinePropagation(unittest.TestCase):
+    """スクレイピング・Gemini API呼び出しへの制限時間の伝搬のテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': '/tmp/test_uploads',
+            'SCRAPER_TIMEOUT': 10
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.addCleanup(self.app_context.pop)
+    
+    @patch('app.blueprints.blog.scraping.get_scraper_session')
+    def test_fetch_page_timeout(self, mock_get_session):
+        """ページ取得のタイムアウトを残り時間から決めるテスト"""
+        session = mock_get_session.return_value
+        session.get.return_value.status_code = 200
+        
+        _fetch_page('https://example.com/a/')
+        _fetch_page('https://example.com/b/', Deadline(3))
+        
+        # 検証
+        self.assertEqual(session.get.call_args_list[0].kwargs['timeout'], 10)
+        self.assertLessEqual(session.get.call_args_list[1].kwargs['timeout'], 3)
+        with self.assertRaises(DeadlineExceeded):
+            _fetch_page('https://example.com/c/', Deadline(0))
+        self.assertEqual(session.get.call_count, 2)
+    
+    @patch('app.blueprints.blog.scraping.time.sleep')
+    @patch('app.blueprints.blog.scraping._fetch_page')
+    def test_coupons_partial_on_deadline(self, mock_fetch_page, mock_sleep):
+        """制限時間を超えた場合は取得済みのページのクーポンを返すテスト"""
+        page1 = MagicMock()
+        page1.text = '''
+        <div class="pa bottom0 right0">1/3ページ</div>
+        <p class="couponMenuName">初回限定20%オフクーポン</p>
+        '''
+        mock_fetch_page.side_effect = [page1, DeadlineExceeded()]
+        selectors = {'hpb': {'coupon': {'coupon_name_selector': 'p.couponMenuName'}}}
+        
+        result = _scrape_coupons('https://example.com/slnH000XXXXX/', selectors, Deadline(30))
+        
+        # 検証
+        self.assertEqual(result, ['初回限定20%オフクーポン'])
+        self.assertEqual(mock_fetch_page.call_count, 2)
+    
+    @patch('app.blueprints.blog.services.open', create=True)
+    @patch('app.blueprints.blog.services.get_gemini_model')
+    def test_gemini_timeout(self, mock_get_model, mock_open):
+        """Gemini API呼び出しが制限時間を超えた場合はエラーのブログを返すテスト"""
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+        mock_get_model.return_value.generate_content_async = hang
+        mock_open.return_value.__enter__.return_value.read.return_value = b'test_image_data'
+        
+        started = time.monotonic()
+        result = asyncio.run(generate_blog_with_gemini(
+            [{'path': '/tmp/test.jpg', 'placeholder': '[IMAGE_1]'}], 'casual', deadline=Deadline(0.1)
+        ))
+        
+        # 検証
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(result['title'], 'エラーが発生しました')
+        self.assertIn('制限時間内に完了しませんでした', result['body'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import unittest
+import tempfile
+from PIL import Image
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.utils.images import file_content_hash, get_thumbnail, prepare_upload_image, THUMBNAIL_SIZES
+
+class TestImageFunctions(unittest.TestCase):
+    """画像処理関数のユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, 'thumbnails')
+        
+        # テスト用の大きな画像を作成
+        self.src_path = os.path.join(self.temp_dir.name, 'source.png')
+        Image.new('RGBA', (2000, 1000), (255, 0, 0, 255)).save(self.src_path)
+    
+    def tearDown(self):
+        """テストの後処理"""
+        self.temp_dir.cleanup()
+    
+    def test_file_content_hash(self):
+        """内容ハッシュが内容のみに依存するテスト"""
+        copy_path = os.path.join(self.temp_dir.name, 'copy.png')
+        with open(self.src_path, 'rb') as src, open(copy_path, 'wb') as dst:
+            dst.write(src.read())
+        
+        # 検証
+        self.assertEqual(file_content_hash(self.src_path), file_content_hash(copy_path))
+        self.assertEqual(len(file_content_hash(self.src_path)), 64)
+    
+    def test_get_thumbnail_generates_and_caches(self):
+        """サムネイル生成とキャッシュのテスト"""
+        content_hash = file_content_hash(self.src_path)
+        
+        # 1回目は生成
+        thumb_path, cache_hit = get_thumbnail(self.src_path, content_hash, 'small', self.cache_dir)
+        self.assertFalse(cache_hit)
+        self.assertTrue(os.path.exists(thumb_path))
+        
+        with Image.open(thumb_path) as thumb:
+            self.assertEqual(thumb.format, 'JPEG')
+            self.assertEqual(max(thumb.size), THUMBNAIL_SIZES['small'])
+        
+        # 2回目はキャッシュを利用
+        cached_path, cache_hit = get_thumbnail(self.src_path, content_hash, 'small', self.cache_dir)
+        self.assertTrue(cache_hit)
+        self.assertEqual(cached_path, thumb_path)
+        
+        # 一時ファイルが残っていないこと
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(thumb_path)])
+    
+    def test_prepare_upload_image_resizes_large_image(self):
+        """上限を超える画像をJPEGに縮小してキャッシュするテスト"""
+        cache_dir = os.path.join(self.temp_dir.name, 'sb_uploads')
+        
+        upload_path = prepare_upload_image(self.src_path, 1280, 2 * 1024 * 1024, 85, cache_dir)
+        
+        # 検証（透過PNGは白背景のJPEGに変換される）
+        self.assertNotEqual(upload_path, self.src_path)
+        with Image.open(upload_path) as img:
+            self.assertEqual(img.format, 'JPEG')
+            self.assertEqual(img.size, (1280, 640))
+        
+        # 同じ画像は縮小済みのファイルを再利用する
+        self.assertEqual(prepare_upload_image(self.src_path, 1280, 2 * 1024 * 1024, 85, cache_dir), upload_path)
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(upload_path)])
+    
+    def test_prepare_upload_image_keeps_small_image(self):
+        """上限内の画像はそのまま使用するテスト"""
+        cache_dir = os.path.join(self.temp_dir.name, 'sb_uploads')
+        small_path = os.path.join(self.temp_dir.name, 'small.jpg')
+        Image.new('RGB', (800, 600), (0, 128, 255)).save(small_path, format='JPEG')
+        
+        # 検証
+        self.assertEqual(prepare_upload_image(small_path, 1280, 2 * 1024 * 1024, 85, cache_dir), small_path)
+        self.assertFalse(os.path.exists(cache_dir))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from benchmarks.import_time import measure_import_time, parse_importtime
+
+class TestImportTime(unittest.TestCase):
+    """起動時のimportに関する回帰テスト"""
+    
+    def test_parse_importtime(self):
+        """-X importtime 出力の解析テスト"""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+        
+        # 検証
+        self.assertEqual(parse_importtime(stderr), [
+            ('json.decoder', 120, 120, 1),
+            ('json', 300, 420, 0)
+        ])
+    
+    def test_create_app_does_not_import_heavy_sdks(self):
+        """create_app()とログインページの表示で重いSDKを読み込まないテスト"""
+        statement = (
+            "import tempfile\n"
+            "from app import create_app\n"
+            "app = create_app({'TESTING': True, 'SECRET_KEY': 'test', "
+            "'UPLOAD_FOLDER': tempfile.mkdtemp()})\n"
+            "assert app.test_client().get('/auth/login').status_code == 200\n"
+        )
+        result = measure_import_time(statement)
+        
+        # 検証
+        self.assertEqual(result['heavy_modules'], [])
+        self.assertIn('app.blueprints.blog.routes', result['modules'])
+
+if __name__ == '__main__':
+    unittest.main()
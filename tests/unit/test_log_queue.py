@@ -0,0 +1,139 @@
+import os
+import sys
+import logging
+import tempfile
+import threading
+import unittest
+from logging.handlers import QueueHandler
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.metrics import REGISTRY
+from app.utils.log_queue import queue_logger, stop_log_queues
+
+class RecordingHandler(logging.Handler):
+    """書き込んだメッセージとスレッドを記録するハンドラ"""
+    
+    def __init__(self, block=None):
+        super().__init__()
+        self.records = []
+        self.block = block
+    
+    def emit(self, record):
+        if self.block is not None:
+            self.block.wait(5)
+        self.records.append((record.getMessage(), threading.current_thread().name))
+
+class TestLogQueue(unittest.TestCase):
+    """キュー経由のログ出力のユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.logger = logging.getLogger(f'test_log_queue.{self.id()}')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.addCleanup(stop_log_queues)
+    
+    def test_write_in_background(self):
+        """ハンドラの書き込みをバックグラウンドのスレッドで行うテスト"""
+        handler = RecordingHandler()
+        self.logger.addHandler(handler)
+        
+        queue_logger(self.logger, [handler])
+        self.assertEqual(len(self.logger.handlers), 1)
+        self.assertIsInstance(self.logger.handlers[0], QueueHandler)
+        self.logger.info('クーポン数: %d', 3)
+        stop_log_queues()
+        
+        # 検証（遅延した書式化もキューに入れる前に済ませる。停止後は元のハンドラに戻す）
+        self.assertEqual(self.logger.handlers, [handler])
+        self.assertEqual(len(handler.records), 1)
+        self.assertEqual(handler.records[0][0], 'クーポン数: 3')
+        self.assertNotEqual(handler.records[0][1], threading.current_thread().name)
+    
+    def test_drop_when_full(self):
+        """キューが満杯の場合は待たずにログを破棄するテスト"""
+        block = threading.Event()
+        handler = RecordingHandler(block)
+        before = REGISTRY.values().get(('hpb_log_dropped_total', ()), 0)
+        
+        queue_logger(self.logger, [handler], max_size=1)
+        for n in range(5):
+            self.logger.info('ページ%d', n)
+        block.set()
+        stop_log_queues()
+        
+        # 検証
+        self.assertLess(len(handler.records), 5)
+        self.assertGreater(REGISTRY.values().get(('hpb_log_dropped_total', ()), 0), before)
+
+class TestLogQueueApp(unittest.TestCase):
+    """アプリケーションのログ出力の設定のテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.addCleanup(stop_log_queues)
+    
+    def create_app(self):
+        return create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'LOG_QUEUE_ENABLED': True
+        })
+    
+    def test_app_logger_queued(self):
+        """LOG_QUEUE_ENABLED の場合はアプリケーションのロガーをキュー経由にするテスト"""
+        app = self.create_app()
+        original_handlers = app.extensions['log_queue'][app.logger.name].handlers
+        
+        # 検証
+        self.assertEqual(len(app.logger.handlers), 1)
+        self.assertIsInstance(app.logger.handlers[0], QueueHandler)
+        self.assertTrue(original_handlers)
+        
+        # 停止すると元のハンドラに戻す
+        stop_log_queues()
+        self.assertEqual(app.logger.handlers, list(original_handlers))
+    
+    def test_recreate_after_stop(self):
+        """リスナーを停止した後に作成したアプリケーションのログも書き込むテスト"""
+        self.create_app()
+        stop_log_queues()
+        app = self.create_app()
+        handler = RecordingHandler()
+        queue_logger(app.logger, [handler])
+        
+        app.logger.warning('再作成後のログ')
+        stop_log_queues()
+        
+        # 検証
+        self.assertEqual([message for message, _ in handler.records], ['再作成後のログ'])
+        self.assertFalse(any(isinstance(h, QueueHandler) for h in app.logger.handlers))
+        app.logger.removeHandler(handler)
+    
+    def test_listener_starts_lazily(self):
+        """リスナーのスレッドは最初のログで起動し、fork後は子プロセスで改めて起動するテスト"""
+        app = self.create_app()
+        listener = app.extensions['log_queue'][app.logger.name]
+        
+        # 検証（create_app() ではスレッドを起動しない）
+        self.assertFalse(listener.started)
+        app.logger.warning('最初のログ')
+        self.assertTrue(listener.started)
+        
+        # fork後の子プロセスと同じ状態にする
+        parent_queue = listener.queue
+        listener.stop()
+        listener.reset_after_fork()
+        app.logger.handlers[0].queue = listener.queue
+        app.logger.warning('子プロセスのログ')
+        self.assertTrue(listener.started)
+        self.assertIsNot(listener.queue, parent_queue)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import unittest
+import tempfile
+import threading
+import subprocess
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.metrics import MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+    """メトリクスのレジストリのユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.registry = MetricsRegistry()
+        self.registry.directory = self.temp_dir.name
+        self.registry.describe('test_requests_total', 'counter', 'リクエスト数')
+        self.registry.describe('test_duration_seconds', 'histogram', '所要時間', buckets=(0.1, 1))
+        self.registry.describe('test_busy', 'gauge', '使用中の数')
+    
+    def test_threads_aggregated(self):
+        """複数のスレッド（終了したスレッドを含む）の値を合計するテスト"""
+        def work():
+            for _ in range(100):
+                self.registry.inc('test_requests_total', endpoint='a')
+        
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.registry.inc('test_requests_total', endpoint='b')
+        
+        # 検証
+        output = self.registry.render()
+        self.assertIn('# TYPE test_requests_total counter', output)
+        self.assertIn('test_requests_total{endpoint="a"} 400', output)
+        self.assertIn('test_requests_total{endpoint="b"} 1', output)
+    
+    def test_histogram(self):
+        """ヒストグラムのバケットが累積で出力されるテスト"""
+        for value in (0.05, 0.1, 0.5, 3):
+            self.registry.observe('test_duration_seconds', value, stage='scrape')
+        
+        # 検証
+        output = self.registry.render()
+        self.assertIn('test_duration_seconds_bucket{stage="scrape",le="0.1"} 2', output)
+        self.assertIn('test_duration_seconds_bucket{stage="scrape",le="1"} 3', output)
+        self.assertIn('test_duration_seconds_bucket{stage="scrape",le="+Inf"} 4', output)
+        self.assertIn('test_duration_seconds_count{stage="scrape"} 4', output)
+        self.assertIn('test_duration_seconds_sum{stage="scrape"} 3.65', output)
+    
+    def _write_worker_snapshot(self, pid, requests, busy):
+        """他のワーカープロセスの書き出したファイルを作成する"""
+        with open(os.path.join(self.temp_dir.name, f'{pid}.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'values': {json.dumps(['test_requests_total', [['endpoint', 'a']]]): requests},
+                'gauges': {json.dumps(['test_busy', []]): busy}
+            }, f)
+    
+    def test_workers_aggregated(self):
+        """複数のワーカープロセスの値を合計するテスト（終了したプロセスのゲージは除く）"""
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        self._write_worker_snapshot(os.getppid(), requests=5, busy=2)
+        self._write_worker_snapshot(exited.pid, requests=7, busy=3)
+        self.registry.inc('test_requests_total', endpoint='a')
+        self.registry.register_collector('busy', lambda: [('test_busy', {}, 1)])
+        
+        # 検証
+        output = self.registry.render()
+        self.assertIn('test_requests_total{endpoint="a"} 13', output)
+        self.assertIn('test_busy 3', output)
+    
+    def test_snapshot_round_trip(self):
+        """書き出した値を同じpidの次のプロセスが引き継ぐテスト"""
+        self.registry.inc('test_requests_total', endpoint='a')
+        self.registry.observe('test_duration_seconds', 0.5)
+        self.registry.write_snapshot()
+        
+        restarted = MetricsRegistry()
+        restarted.directory = self.temp_dir.name
+        restarted.describe('test_duration_seconds', 'histogram', '所要時間', buckets=(0.1, 1))
+        restarted.inc('test_requests_total', endpoint='a')
+        
+        # 検証
+        output = restarted.render()
+        self.assertIn('test_requests_total{endpoint="a"} 2', output)
+        self.assertIn('test_duration_seconds_count 1', output)
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """/metrics エンドポイントのテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'METRICS_ENABLED': True,
+            'METRICS_TOKEN': 'metrics-token',
+            'METRICS_DIR': os.path.join(self.temp_dir.name, 'metrics')
+        })
+        self.client = self.app.test_client()
+    
+    def test_requires_token_or_login(self):
+        """トークンが一致しない場合は取得できないテスト"""
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'})
+        
+        # 検証
+        self.assertEqual(response.status_code, 401)
+        with self.client.session_transaction() as sess:
+            sess['logged_in'] = True
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+    
+    def test_metrics(self):
+        """リクエストの所要時間と一時ディレクトリのサイズを出力するテスト"""
+        with open(os.path.join(self.temp_dir.name, 'upload.jpg'), 'wb') as f:
+            f.write(b'x' * 1234)
+        self.client.get('/hello')
+        
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer metrics-token'})
+        
+        # 検証
+        output = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith('text/plain'))
+        self.assertIn('hpb_request_duration_seconds_count{endpoint="hello",method="GET"}', output)
+        self.assertIn('hpb_requests_total{endpoint="hello",status="2xx"}', output)
+        self.assertIn('hpb_temp_dir_bytes 1234', output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import unittest
+import tempfile
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.blueprints.blog.post_queue import PostQueue, claim_result
+
+class TestPostQueue(unittest.TestCase):
+    """投稿キューのユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.queue = PostQueue(os.path.join(self.temp_dir.name, 'queue.sqlite3'), lease_seconds=60)
+        self.image_path = os.path.join(self.temp_dir.name, 'test.gif')
+        with open(self.image_path, 'wb') as f:
+            f.write(b'GIF89a')
+        self.post = {
+            'title': 'タイトル', 'body': '本文', 'stylist': '山田 太郎',
+            'images': [{'path': self.image_path}], 'coupon': None
+        }
+    
+    def test_skip_after_success(self):
+        """投稿済みの内容は再投稿しないテスト"""
+        claim = self.queue.claim('test_id', self.post)
+        self.queue.complete(claim['id'], {'success': True, 'message': '投稿しました'})
+        
+        second = self.queue.claim('test_id', self.post)
+        
+        # 検証
+        self.assertEqual(claim['action'], 'run')
+        self.assertEqual(second['action'], 'skip')
+        self.assertTrue(claim_result(second)['success'])
+        self.assertEqual(self.queue.stats(), {'succeeded': 1})
+    
+    def test_fingerprint_uses_image_content(self):
+        """画像のパスが異なっても内容が同じなら同じ投稿とみなすテスト"""
+        copy_path = os.path.join(self.temp_dir.name, 'copy.gif')
+        with open(copy_path, 'wb') as f:
+            f.write(b'GIF89a')
+        copy = dict(self.post, images=[{'path': copy_path}])
+        
+        # 検証
+        self.assertEqual(PostQueue.fingerprint('test_id', self.post), PostQueue.fingerprint('test_id', copy))
+        self.assertNotEqual(PostQueue.fingerprint('test_id', self.post), PostQueue.fingerprint('other_id', self.post))
+    
+    def test_busy_while_running(self):
+        """実行中の投稿は他の呼び出しで実行しないテスト"""
+        self.queue.claim('test_id', self.post)
+        
+        second = self.queue.claim('test_id', self.post)
+        
+        # 検証
+        self.assertEqual(second['action'], 'busy')
+        self.assertFalse(claim_result(second)['success'])
+    
+    def test_resume_after_failure(self):
+        """失敗した投稿はチェックポイントのデータを引き継いで再開するテスト"""
+        claim = self.queue.claim('test_id', self.post)
+        self.queue.checkpoint(claim['id'], 'logged_in')
+        self.queue.checkpoint(claim['id'], 'images_uploaded', {'image_urls': ['https://example.com/1.jpg']})
+        self.queue.complete(claim['id'], {'success': False, 'message': 'エラー'})
+        
+        second = self.queue.claim('test_id', self.post)
+        
+        # 検証
+        self.assertEqual(second['action'], 'run')
+        self.assertEqual(second['checkpoint'], 'images_uploaded')
+        self.assertEqual(second['checkpoint_data'], {'image_urls': ['https://example.com/1.jpg']})
+        self.assertEqual(second['attempts'], 2)
+    
+    def test_expired_lease_resumes(self):
+        """実行期限が切れた投稿（ワーカーの異常終了）は再開するテスト"""
+        claim = self.queue.claim('test_id', self.post)
+        self.queue.checkpoint(claim['id'], 'logged_in')
+        
+        second = self.queue.claim('test_id', self.post, now=time.time() + 120)
+        
+        # 検証
+        self.assertEqual(second['action'], 'run')
+        self.assertEqual(second['id'], claim['id'])
+    
+    def test_uncertain_after_submit(self):
+        """フォーム送信後に中断した投稿は二重投稿を避けて再投稿しないテスト"""
+        claim = self.queue.claim('test_id', self.post)
+        self.queue.checkpoint(claim['id'], 'submitted')
+        
+        second = self.queue.claim('test_id', self.post, now=time.time() + 120)
+        
+        # 検証
+        self.assertEqual(second['action'], 'uncertain')
+        self.assertFalse(claim_result(second)['success'])
+        self.assertEqual(self.queue.get(claim['id'])['status'], 'uncertain')
+    
+    def test_retention(self):
+        """保持期間を過ぎた投稿は再投稿できるテスト"""
+        claim = self.queue.claim('test_id', self.post)
+        self.queue.complete(claim['id'], {'success': True, 'message': '投稿しました'})
+        
+        second = self.queue.claim('test_id', self.post, now=time.time() + 8 * 24 * 60 * 60)
+        
+        # 検証
+        self.assertEqual(second['action'], 'run')
+        self.assertIsNone(self.queue.get(claim['id']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import asyncio
+import unittest
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.blueprints.blog.post_scheduler import PostScheduler
+from app.blueprints.blog.sb_diagnostics import RunDiagnostics
+from tests.async_test_case import AsyncTestCase
+
+class TestPostScheduler(AsyncTestCase):
+    """投稿スケジューラのユニットテスト"""
+
+    def setUp(self):
+        """テストの前処理"""
+        self.running = set()
+        self.max_running = 0
+        self.same_account_overlap = False
+
+    def _job(self, account, success=True, delay=0.01):
+        """実行中のジョブを記録するテスト用ジョブを作成する"""
+        async def job():
+            if account in self.running:
+                self.same_account_overlap = True
+            self.running.add(account)
+            self.max_running = max(self.max_running, len(self.running))
+            await asyncio.sleep(delay)
+            self.running.discard(account)
+            return {'success': success, 'message': ''}
+        return job
+
+    async def test_different_accounts_run_in_parallel(self):
+        """異なるアカウントのジョブを並行に実行するテスト"""
+        scheduler = PostScheduler(max_parallel=3)
+
+        await asyncio.gather(*(scheduler.run(account, self._job(account)) for account in ('a', 'b', 'c')))
+
+        # 検証
+        self.assertEqual(self.max_running, 3)
+
+    async def test_same_account_is_serialized(self):
+        """同じアカウントのジョブは1件ずつ実行するテスト"""
+        scheduler = PostScheduler(max_parallel=3)
+
+        await asyncio.gather(*(scheduler.run('a', self._job('a')) for _ in range(3)))
+
+        # 検証
+        self.assertFalse(self.same_account_overlap)
+        self.assertEqual(scheduler.stats()['accounts'][RunDiagnostics.account_key('a')]['completed'], 3)
+
+    async def test_global_cap(self):
+        """同時実行数の上限を超えないテスト"""
+        scheduler = PostScheduler(max_parallel=2)
+        accounts = [f'account{i}' for i in range(5)]
+
+        tasks = [asyncio.ensure_future(scheduler.run(account, self._job(account))) for account in accounts]
+        await asyncio.sleep(0.005)
+
+        # 検証（2件実行中、3件待機中）
+        stats = scheduler.stats()
+        self.assertEqual((stats['running'], stats['queued']), (2, 3))
+
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.max_running, 2)
+        self.assertEqual(scheduler.stats()['queued'], 0)
+
+    async def test_stats_per_account(self):
+        """アカウントごとの成功数・失敗数・投稿数を集計するテスト"""
+        scheduler = PostScheduler(max_parallel=2)
+
+        await scheduler.run('a', self._job('a'))
+        await scheduler.run('a', self._job('a', success=False))
+
+        async def batch():
+            return {'success': False, 'results': [{'success': True}, {'success': True}, {'success': False}]}
+
+        await scheduler.run('b', batch)
+
+        # 検証
+        accounts = scheduler.stats()['accounts']
+        # サロンボードIDそのものは返さない
+        self.assertNotIn('a', accounts)
+        a = accounts[RunDiagnostics.account_key('a')]
+        self.assertEqual((a['completed'], a['failed'], a['posts']), (1, 1, 1))
+        self.assertEqual(accounts[RunDiagnostics.account_key('b')]['posts'], 2)
+        self.assertGreater(a['posts_per_minute'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
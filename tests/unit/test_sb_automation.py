@@ -1,14 +1,22 @@
 import os
 import sys
+import json
 import unittest
 from unittest.mock import patch, MagicMock, AsyncMock
 import asyncio
+from contextlib import asynccontextmanager
+import requests
 from flask import Flask
+from bs4 import BeautifulSoup
 
 # プロジェクトのルートディレクトリをパスに追加
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from app.blueprints.blog.sb_automation import SalonBoardAutomation, post_to_sb
+from app.blueprints.blog.sb_automation import (
+    SalonBoardAutomation, post_to_sb, post_batch_to_sb, post_to_sb_sync, post_batch_to_sb_sync,
+    get_browser_profile, build_request_filter
+)
+from app.blueprints.blog.sb_http import FormChangedError, LoginRequiredError, SalonBoardHttpPoster
 from tests.async_test_case import AsyncTestCase
 from app import create_app
 from app.config import Config
@@ -37,26 +45,28 @@ class TestSalonBoardAutomation(AsyncTestCase):
         self.test_id = 'test_id'
         self.test_password = 'test_password'
         
-        # テスト用のセレクタ設定
+        # テスト用のセレクタ設定（selectors.json の sb セクションと同じ構造）
         self.test_selectors = {
             'login': {
-                'id_selector': '#idPasswordInputForm > div > dl:nth-child(1) > dd > input',
-                'password_selector': '#jsiPwInput',
-                'login_button_selector': '#idPasswordInputForm > div > div > a'
+                'id_input': '#idPasswordInputForm > div > dl:nth-child(1) > dd > input',
+                'password_input': '#jsiPwInput',
+                'login_button': '#idPasswordInputForm > div > div > a'
             },
             'navigation': {
-                'publication_button_selector': '.nav-publication',
-                'blog_post_button_selector': '.nav-blog'
+                'publish_management': '.nav-publication',
+                'blog_button': '.nav-blog',
+                'new_post_button': '.new-post-button'
             },
-            'blog': {
-                'new_post_button_selector': '.new-post-button',
-                'title_selector': '#blog-title',
-                'stylist_selector': '#stylist-select',
-                'body_selector': '#blog-body',
-                'image_upload_button_selector': '.upload-image',
-                'file_input_selector': 'input[type="file"]',
-                'post_button_selector': '.post-button',
-                'success_message_selector': '.success-message'
+            'blog_form': {
+                'stylist_select': '#stylist-select',
+                'title_input': '#blog-title',
+                'nicEdit_area': '#blog-body',
+                'upload_button': '.upload-image',
+                'file_select': 'input[type="file"]',
+                'image_upload_submit': '.upload-submit',
+                'coupon_select_button': '.coupon-button',
+                'coupon_setting_button': '.coupon-setting',
+                'confirm_button': '.post-button'
             }
         }
         
@@ -69,6 +79,18 @@ class TestSalonBoardAutomation(AsyncTestCase):
             }
         ]
     
+    def _configure_app(self, mock_current_app, **overrides):
+        """current_app のモックに設定値を割り当てる"""
+        config = {
+            'SELECTORS': {'sb': self.test_selectors},
+            'SB_BASE_URL': 'https://salonboard.com',
+            'SB_SESSION_CACHE_TTL': 0
+        }
+        config.update(overrides)
+        mock_current_app.config.get = MagicMock(side_effect=lambda key, default=None: config.get(key, default))
+        mock_current_app._get_current_object = MagicMock(return_value=mock_current_app)
+        mock_current_app.logger = MagicMock()
+    
     def tearDown(self):
         """テストの後処理"""
         # アプリケーションコンテキストをポップ
@@ -82,14 +104,18 @@ class TestSalonBoardAutomation(AsyncTestCase):
     async def test_login_success(self, mock_current_app, mock_playwright):
         """ログイン成功のテスト"""
         # モックの設定
-        mock_current_app.config.get = MagicMock(return_value=self.test_selectors)
+        self._configure_app(mock_current_app)
         
         # Playwrightのモック
         mock_page = AsyncMock()
         mock_page.url = 'https://salonboard.com/dashboard'
         
+        mock_context = AsyncMock()
+        mock_context.set_default_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        
         mock_browser = AsyncMock()
-        mock_browser.new_page.return_value = mock_page
+        mock_browser.new_context.return_value = mock_context
         
         mock_chromium = AsyncMock()
         mock_chromium.launch.return_value = mock_browser
@@ -112,16 +138,16 @@ class TestSalonBoardAutomation(AsyncTestCase):
         # 検証
         self.assertTrue(result)
         mock_page.goto.assert_called_once_with('https://salonboard.com/login/')
-        mock_page.fill.assert_any_call(self.test_selectors['login']['id_selector'], self.test_id)
-        mock_page.fill.assert_any_call(self.test_selectors['login']['password_selector'], self.test_password)
-        mock_page.click.assert_called_once_with(self.test_selectors['login']['login_button_selector'])
+        mock_page.fill.assert_any_call(self.test_selectors['login']['id_input'], self.test_id)
+        mock_page.fill.assert_any_call(self.test_selectors['login']['password_input'], self.test_password)
+        mock_page.click.assert_called_once_with(self.test_selectors['login']['login_button'])
     
     @patch('app.blueprints.blog.sb_automation.async_playwright')
     @patch('app.blueprints.blog.sb_automation.current_app')
     async def test_login_failure(self, mock_current_app, mock_playwright):
         """ログイン失敗のテスト"""
         # モックの設定
-        mock_current_app.config.get = MagicMock(return_value=self.test_selectors)
+        self._configure_app(mock_current_app)
         mock_current_app.logger.error = MagicMock()
         
         # Playwrightのモック
@@ -129,8 +155,12 @@ class TestSalonBoardAutomation(AsyncTestCase):
         mock_page.url = 'https://salonboard.com/login/'  # ログインページのままなのでログイン失敗
         mock_page.inner_text.return_value = 'IDまたはパスワードが間違っています'
         
+        mock_context = AsyncMock()
+        mock_context.set_default_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        
         mock_browser = AsyncMock()
-        mock_browser.new_page.return_value = mock_page
+        mock_browser.new_context.return_value = mock_context
         
         mock_chromium = AsyncMock()
         mock_chromium.launch.return_value = mock_browser
@@ -159,13 +189,17 @@ class TestSalonBoardAutomation(AsyncTestCase):
     async def test_navigate_to_blog_post(self, mock_current_app, mock_playwright):
         """ブログ投稿ページへの移動テスト"""
         # モックの設定
-        mock_current_app.config.get = MagicMock(return_value=self.test_selectors)
+        self._configure_app(mock_current_app)
         
         # Playwrightのモック
         mock_page = AsyncMock()
         
+        mock_context = AsyncMock()
+        mock_context.set_default_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        
         mock_browser = AsyncMock()
-        mock_browser.new_page.return_value = mock_page
+        mock_browser.new_context.return_value = mock_context
         
         mock_chromium = AsyncMock()
         mock_chromium.launch.return_value = mock_browser
@@ -189,20 +223,40 @@ class TestSalonBoardAutomation(AsyncTestCase):
         self.assertTrue(result)
         # モックの呼び出しが行われたことを確認
         mock_page.click.assert_called()
+        # 各クリックの後は次に操作する要素の表示を待つ
+        mock_page.wait_for_load_state.assert_not_called()
+        mock_page.wait_for_selector.assert_any_call(
+            self.test_selectors['navigation']['new_post_button'], state='visible', timeout=None
+        )
+        self.assertEqual(
+            [timing['step'] for timing in automation.step_timings],
+            ['publish_management', 'blog_button', 'new_post_button']
+        )
     
     @patch('app.blueprints.blog.sb_automation.async_playwright')
     @patch('app.blueprints.blog.sb_automation.current_app')
     async def test_post_blog(self, mock_current_app, mock_playwright):
         """ブログ投稿処理のテスト"""
         # モックの設定
-        mock_current_app.config.get = MagicMock(return_value=self.test_selectors)
+        self._configure_app(mock_current_app)
         
         # Playwrightのモック
         mock_page = AsyncMock()
         mock_page.url = 'https://salonboard.com/blog/list'  # 投稿後のURL
         
+        # アップロードのレスポンス待機のモック
+        upload_response = asyncio.Future()
+        upload_response.set_result(MagicMock())
+        mock_response_info = MagicMock()
+        mock_response_info.__aenter__.return_value = MagicMock(value=upload_response)
+        mock_page.expect_response = MagicMock(return_value=mock_response_info)
+        
+        mock_context = AsyncMock()
+        mock_context.set_default_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        
         mock_browser = AsyncMock()
-        mock_browser.new_page.return_value = mock_page
+        mock_browser.new_context.return_value = mock_context
         
         mock_chromium = AsyncMock()
         mock_chromium.launch.return_value = mock_browser
@@ -234,6 +288,113 @@ class TestSalonBoardAutomation(AsyncTestCase):
         mock_page.fill.assert_called()
         mock_page.click.assert_called()
         mock_page.set_input_files.assert_called_once()
+        mock_page.expect_response.assert_called_once()
+        mock_page.wait_for_load_state.assert_not_called()
+        # 画像アップロードモーダルが閉じるまで待機
+        mock_page.wait_for_selector.assert_any_call(
+            self.test_selectors['blog_form']['image_upload_submit'], state='hidden', timeout=None
+        )
+        self.assertIn('file_select', [timing['step'] for timing in automation.step_timings])
+        self.assertCountEqual(
+            [span['name'] for span in automation.spans],
+            ['fill_body', 'fill_title', 'select_stylist', 'upload_image[1]', 'select_coupon', 'confirm']
+        )
+        self.assertTrue(all(span['ok'] for span in automation.spans))
+    
+    @patch('app.blueprints.blog.sb_automation.current_app')
+    async def test_post_blog_multiple_upload(self, mock_current_app):
+        """複数ファイルの選択に対応している場合は全画像を1回でアップロードするテスト"""
+        self._configure_app(mock_current_app)
+        
+        mock_page = AsyncMock()
+        mock_page.url = 'https://salonboard.com/blog/list'
+        mock_page.eval_on_selector.return_value = True
+        
+        # ファイル選択時にファイルごとのアップロードのレスポンスを通知する
+        handlers = []
+        mock_page.on = MagicMock(side_effect=lambda event, handler: handlers.append(handler))
+        mock_page.remove_listener = MagicMock()
+        
+        async def set_input_files(selector, files):
+            for _ in files:
+                response = MagicMock(url='https://salonboard.com/CNB/blog/imgUpload/')
+                response.request.method = 'POST'
+                for handler in handlers:
+                    handler(response)
+        
+        mock_page.set_input_files.side_effect = set_input_files
+        mock_context = AsyncMock()
+        mock_context.set_default_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        mock_browser = AsyncMock()
+        mock_browser.new_context.return_value = mock_context
+        
+        automation = SalonBoardAutomation(self.test_id, self.test_password, browser=mock_browser)
+        await automation.setup()
+        images = [{'path': f'/path/to/test{i}.jpg'} for i in range(1, 4)]
+        
+        result = await automation.post_blog('テストタイトル', '本文', '山田 太郎', images)
+        
+        # 検証
+        self.assertTrue(result)
+        mock_page.set_input_files.assert_awaited_once_with(
+            self.test_selectors['blog_form']['file_select'], [img['path'] for img in images]
+        )
+        mock_page.remove_listener.assert_called_once()
+        self.assertIn('upload_images[1-3]', [span['name'] for span in automation.spans])
+    
+    @patch('app.blueprints.blog.sb_automation.current_app')
+    async def test_finish_saves_diagnostics_on_failure(self, mock_current_app):
+        """失敗した実行のスパン・スクリーンショット・トレースを保存するテスト"""
+        # モックの設定（前回失敗したアカウントとしてトレースを記録する）
+        diagnostics_dir = os.path.join(self.temp_dir.name, 'diagnostics')
+        self._configure_app(mock_current_app, SB_DIAGNOSTICS_MODE='auto', SB_DIAGNOSTICS_DIR=diagnostics_dir)
+        mock_current_app.extensions = {}
+        
+        mock_page = AsyncMock()
+        mock_page.screenshot.return_value = b'png'
+        mock_page.fill.side_effect = Exception('timeout')
+        mock_context = AsyncMock()
+        mock_context.set_default_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        mock_browser = AsyncMock()
+        mock_browser.new_context.return_value = mock_context
+        
+        automation = SalonBoardAutomation(self.test_id, self.test_password, browser=mock_browser)
+        automation.diagnostics.record_outcome(self.test_id, True)
+        await automation.setup()
+        mock_context.tracing.start.assert_awaited_once()
+        
+        result = await automation.post_blog('タイトル', '本文', '山田 太郎', [])
+        report = await automation.finish(result)
+        
+        # 検証
+        self.assertFalse(result)
+        self.assertEqual(automation.spans[0]['name'], 'fill_body')
+        self.assertFalse(automation.spans[0]['ok'])
+        run_dir = report['diagnostics_dir']
+        self.assertTrue(run_dir.startswith(diagnostics_dir))
+        self.assertTrue(os.path.exists(os.path.join(run_dir, 'final.png')))
+        with open(os.path.join(run_dir, 'spans.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['spans'][0]['name'], 'fill_body')
+        mock_context.tracing.stop.assert_awaited_once_with(path=os.path.join(run_dir, 'trace.zip'))
+        self.assertTrue(automation.diagnostics.should_trace(self.test_id))
+    
+    @patch('app.blueprints.blog.sb_automation.current_app')
+    async def test_finish_skips_capture_for_fast_success(self, mock_current_app):
+        """閾値内で成功した実行では診断情報を保存しないテスト"""
+        diagnostics_dir = os.path.join(self.temp_dir.name, 'diagnostics')
+        self._configure_app(mock_current_app, SB_DIAGNOSTICS_MODE='auto', SB_DIAGNOSTICS_DIR=diagnostics_dir)
+        mock_current_app.extensions = {}
+        
+        automation = SalonBoardAutomation(self.test_id, self.test_password)
+        automation.diagnostics.record_outcome(self.test_id, True)
+        report = await automation.finish(True)
+        
+        # 検証（次回のトレース記録も解除される）
+        self.assertIsNone(report['diagnostics_dir'])
+        self.assertFalse(os.path.exists(diagnostics_dir))
+        self.assertFalse(automation.diagnostics.should_trace(self.test_id))
     
     @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
     @patch('app.blueprints.blog.sb_automation.current_app')
@@ -247,6 +408,7 @@ class TestSalonBoardAutomation(AsyncTestCase):
         mock_automation.login = AsyncMock(return_value=True)
         mock_automation.navigate_to_blog_post = AsyncMock(return_value=True)
         mock_automation.post_blog = AsyncMock(return_value=True)
+        mock_automation.finish = AsyncMock(return_value={'duration_ms': 10.0, 'spans': [], 'diagnostics_dir': None})
         
         # コンテキストマネージャのモック
         MockSalonBoardAutomation.return_value.__aenter__.return_value = mock_automation
@@ -265,6 +427,8 @@ class TestSalonBoardAutomation(AsyncTestCase):
         # 検証
         self.assertTrue(result['success'])
         self.assertEqual(result['message'], 'ブログが正常に投稿されました。')
+        self.assertEqual(result['duration_ms'], 10.0)
+        mock_automation.finish.assert_awaited_once_with(True)
         mock_automation.login.assert_called_once()
         mock_automation.navigate_to_blog_post.assert_called_once()
         mock_automation.post_blog.assert_called_once_with(
@@ -281,6 +445,7 @@ class TestSalonBoardAutomation(AsyncTestCase):
         # SalonBoardAutomationのモック
         mock_automation = AsyncMock()
         mock_automation.login = AsyncMock(return_value=False)
+        mock_automation.finish = AsyncMock(return_value={'duration_ms': 10.0, 'spans': [], 'diagnostics_dir': None})
         
         # コンテキストマネージャのモック
         MockSalonBoardAutomation.return_value.__aenter__.return_value = mock_automation
@@ -299,8 +464,343 @@ class TestSalonBoardAutomation(AsyncTestCase):
         self.assertFalse(result['success'])
         self.assertIn('ログインに失敗しました', result['message'])
         mock_automation.login.assert_called_once()
+        mock_automation.finish.assert_awaited_once_with(False)
         mock_automation.navigate_to_blog_post.assert_not_called()
         mock_automation.post_blog.assert_not_called()
 
+class TestPostBatchToSb(AsyncTestCase):
+    """バッチ投稿のユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.app = Flask(__name__)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.addCleanup(self.app_context.pop)
+        
+        self.posts = [
+            {'title': f'タイトル{i}', 'body': '本文', 'stylist': '山田 太郎', 'images': [], 'coupon': None}
+            for i in range(1, 4)
+        ]
+    
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    @patch('app.blueprints.blog.sb_automation.current_app')
+    async def test_failed_post_recovers_and_continues(self, mock_current_app, MockSalonBoardAutomation):
+        """失敗した投稿の後にページを復旧して次の投稿に進むテスト"""
+        mock_automation = AsyncMock()
+        mock_automation.login = AsyncMock(return_value=True)
+        mock_automation.navigate_to_blog_post = AsyncMock(return_value=True)
+        mock_automation.post_blog = AsyncMock(side_effect=[True, False, True])
+        mock_automation.recover = AsyncMock(return_value=True)
+        mock_automation.finish = AsyncMock(return_value={'duration_ms': 10.0, 'spans': [], 'diagnostics_dir': None})
+        MockSalonBoardAutomation.return_value.__aenter__.return_value = mock_automation
+        
+        result = await post_batch_to_sb('test_id', 'test_password', self.posts)
+        
+        # 検証（ログインは1回、2件目の失敗後に復旧して3件目を投稿）
+        self.assertFalse(result['success'])
+        self.assertEqual([r['success'] for r in result['results']], [True, False, True])
+        self.assertEqual(result['message'], '3件中2件のブログを投稿しました。')
+        mock_automation.login.assert_called_once()
+        mock_automation.recover.assert_called_once()
+        mock_automation.capture_failure.assert_awaited_once_with('post2')
+        mock_automation.finish.assert_awaited_once_with(False, posts=3)
+        self.assertEqual(mock_automation.navigate_to_blog_post.call_count, 3)
+    
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    @patch('app.blueprints.blog.sb_automation.current_app')
+    async def test_stops_when_recovery_fails(self, mock_current_app, MockSalonBoardAutomation):
+        """ページを復旧できない場合は残りの投稿を行わないテスト"""
+        mock_automation = AsyncMock()
+        mock_automation.login = AsyncMock(return_value=True)
+        mock_automation.navigate_to_blog_post = AsyncMock(return_value=False)
+        mock_automation.recover = AsyncMock(return_value=False)
+        mock_automation.finish = AsyncMock(return_value={'duration_ms': 10.0, 'spans': [], 'diagnostics_dir': None})
+        MockSalonBoardAutomation.return_value.__aenter__.return_value = mock_automation
+        
+        result = await post_batch_to_sb('test_id', 'test_password', self.posts)
+        
+        # 検証
+        self.assertEqual(len(result['results']), 3)
+        self.assertFalse(any(r['success'] for r in result['results']))
+        self.assertIn('復旧できなかった', result['results'][2]['message'])
+        mock_automation.navigate_to_blog_post.assert_called_once()
+
+class TestHttpEngine(AsyncTestCase):
+    """HTTPでの直接投稿（SB_POST_ENGINE=http）のユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.app = Flask(__name__)
+        self.app.config.update(SB_POST_ENGINE='http', SB_SESSION_CACHE_TTL=0)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.addCleanup(self.app_context.pop)
+        
+        self.mock_automation = AsyncMock()
+        self.mock_automation.login = AsyncMock(return_value=True)
+        self.mock_automation.navigate_to_blog_post = AsyncMock(return_value=True)
+        self.mock_automation.post_blog = AsyncMock(return_value=True)
+        self.mock_automation.finish = AsyncMock(return_value={'duration_ms': 10.0, 'spans': [], 'diagnostics_dir': None})
+        self.mock_automation.checkpoint_handler = None
+        
+        @asynccontextmanager
+        async def span(name):
+            yield {'name': name}
+        
+        self.mock_automation._span = span
+    
+    @patch('app.blueprints.blog.sb_automation._http_poster')
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    async def test_http_post(self, MockSalonBoardAutomation, mock_http_poster):
+        """ブラウザでログインした後、フォームをHTTPで送信するテスト"""
+        MockSalonBoardAutomation.return_value.__aenter__.return_value = self.mock_automation
+        mock_http_poster.return_value.post = MagicMock(return_value=True)
+        
+        result = await post_to_sb('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        
+        # 検証
+        self.assertTrue(result['success'])
+        mock_http_poster.return_value.post.assert_called_once_with(
+            'タイトル', '本文', '山田 太郎', [], None, uploaded_urls=None, on_checkpoint=None
+        )
+        self.mock_automation.navigate_to_blog_post.assert_not_called()
+    
+    def test_body_html_replaces_placeholders(self):
+        """[IMAGE_N] をN枚目の画像に置き換え、プレースホルダーのない画像は末尾に追加するテスト"""
+        body = '前半<b>\n[IMAGE_2]\n後半[IMAGE_1][IMAGE_5]'
+        urls = ['https://example.com/1.jpg', 'https://example.com/2.jpg', 'https://example.com/3.jpg']
+        
+        result = SalonBoardHttpPoster._body_html(body, urls)
+        
+        # 検証
+        self.assertEqual(result, (
+            '前半&lt;b&gt;<br><img src="https://example.com/2.jpg"><br>後半<img src="https://example.com/1.jpg">'
+            '<img src="https://example.com/3.jpg">'
+        ))
+    
+    @patch('app.blueprints.blog.sb_automation._http_poster')
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    async def test_falls_back_to_browser_when_form_changed(self, MockSalonBoardAutomation, mock_http_poster):
+        """フォームの構造が変わった場合はブラウザで投稿するテスト"""
+        MockSalonBoardAutomation.return_value.__aenter__.return_value = self.mock_automation
+        mock_http_poster.return_value.post = MagicMock(side_effect=FormChangedError('投稿フォームが見つかりません'))
+        
+        result = await post_to_sb('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        
+        # 検証
+        self.assertTrue(result['success'])
+        self.mock_automation.navigate_to_blog_post.assert_awaited_once()
+        self.mock_automation.post_blog.assert_awaited_once()
+    
+    @patch('app.blueprints.blog.sb_automation._http_poster')
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    async def test_submit_failure_does_not_fall_back(self, MockSalonBoardAutomation, mock_http_poster):
+        """フォーム送信後の失敗ではブラウザで再投稿しないテスト"""
+        MockSalonBoardAutomation.return_value.__aenter__.return_value = self.mock_automation
+        mock_http_poster.return_value.post = MagicMock(return_value=False)
+        
+        result = await post_to_sb('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        
+        # 検証
+        self.assertFalse(result['success'])
+        self.mock_automation.post_blog.assert_not_called()
+    
+    @patch('app.blueprints.blog.sb_automation.get_session_cache')
+    @patch('app.blueprints.blog.sb_automation._http_poster')
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    async def test_cached_session_skips_browser(self, MockSalonBoardAutomation, mock_http_poster, mock_get_session_cache):
+        """キャッシュしたログイン状態がある場合はブラウザを起動しないテスト"""
+        cookies = [{'name': 'JSESSIONID', 'value': 'abc', 'domain': 'salonboard.com', 'path': '/'}]
+        mock_get_session_cache.return_value.load.return_value = {'cookies': cookies}
+        mock_http_poster.return_value.post = MagicMock(return_value=True)
+        
+        result = await post_to_sb('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        
+        # 検証
+        self.assertTrue(result['success'])
+        self.assertEqual(result['spans'][0]['name'], 'http_post')
+        mock_http_poster.assert_called_once_with(cookies)
+        MockSalonBoardAutomation.assert_not_called()
+    
+    def test_http_post_checkpoints_logged_in(self):
+        """投稿フォームを取得できた時点で logged_in のチェックポイントを記録するテスト"""
+        poster = SalonBoardHttpPoster('https://salonboard.com', [], {'blog_form': {'title_input': '#title'}})
+        form = BeautifulSoup('<form id="blogForm"></form>', 'html.parser').form
+        on_checkpoint = MagicMock()
+        
+        # ログイン状態が無効な場合は記録しない
+        with patch.object(poster, '_load_form', side_effect=LoginRequiredError('ログイン状態が無効です')):
+            with self.assertRaises(LoginRequiredError):
+                poster.post('タイトル', '本文', '山田 太郎', [], on_checkpoint=on_checkpoint)
+        on_checkpoint.assert_not_called()
+        
+        # フォームの構造が想定と異なっても、ログイン済みであることは記録する
+        with patch.object(poster, '_load_form', return_value=('https://salonboard.com/CNB/blog/confirm/', form)):
+            with self.assertRaises(FormChangedError):
+                poster.post('タイトル', '本文', '山田 太郎', [], on_checkpoint=on_checkpoint)
+        on_checkpoint.assert_called_once_with('logged_in', None)
+    
+    def test_is_success(self):
+        """投稿完了後のURLまたは完了のメッセージの要素でのみ成功と判定するテスト"""
+        poster = SalonBoardHttpPoster('https://salonboard.com', [], {'blog_form': {'success_message': '.successMsg'}})
+        
+        def response(url, text):
+            return MagicMock(url=url, text=text)
+        
+        # 検証（本文やメニューに「完了」を含むだけのページは成功としない）
+        self.assertTrue(poster._is_success(response('https://salonboard.com/CNB/blog/list/', '')))
+        self.assertTrue(poster._is_success(response(
+            'https://salonboard.com/CNB/blog/confirm/', '<p class="successMsg">登録が完了しました</p>'
+        )))
+        self.assertFalse(poster._is_success(response(
+            'https://salonboard.com/CNB/blog/confirm/', '<a>予約完了一覧</a><p class="errorMsg">タイトルを入力してください</p>'
+        )))
+    
+    def test_network_error_before_submit_falls_back(self):
+        """フォーム送信前の通信エラーはブラウザでの投稿に切り替える FormChangedError にするテスト"""
+        poster = SalonBoardHttpPoster('https://salonboard.com', [], {'blog_form': {}})
+        
+        with patch.object(poster.session, 'get', side_effect=requests.ConnectionError('接続できません')):
+            with self.assertRaises(FormChangedError):
+                poster.post('タイトル', '本文', '山田 太郎', [])
+        with patch.object(poster.session, 'post', side_effect=requests.Timeout('Read timed out')), \
+                patch('app.blueprints.blog.sb_http.open', create=True):
+            with self.assertRaises(FormChangedError):
+                poster._upload('/tmp/test.jpg', None)
+    
+    @patch('app.blueprints.blog.sb_automation.get_session_cache')
+    @patch('app.blueprints.blog.sb_automation._http_poster')
+    @patch('app.blueprints.blog.sb_automation.SalonBoardAutomation')
+    async def test_expired_cached_session_logs_in_with_browser(self, MockSalonBoardAutomation, mock_http_poster,
+                                                              mock_get_session_cache):
+        """キャッシュしたログイン状態が無効な場合はブラウザでログインし直すテスト"""
+        MockSalonBoardAutomation.return_value.__aenter__.return_value = self.mock_automation
+        mock_get_session_cache.return_value.load.return_value = {'cookies': []}
+        mock_http_poster.return_value.post = MagicMock(side_effect=[LoginRequiredError('ログイン状態が無効です'), True])
+        
+        result = await post_to_sb('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        
+        # 検証
+        self.assertTrue(result['success'])
+        mock_get_session_cache.return_value.invalidate.assert_called_once_with('test_id', 'test_password')
+        self.mock_automation.login.assert_awaited_once()
+
+class TestBrowserProfile(AsyncTestCase):
+    """ブラウザプロファイルと通信遮断のユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SB_BLOCKED_RESOURCE_TYPES=['image', 'font'],
+            SB_BLOCKED_DOMAINS=['google-analytics.com']
+        )
+    
+    def test_fast_profile(self):
+        """fastプロファイルはヘッドレスで通信を遮断するテスト"""
+        self.app.config['SB_AUTOMATION_PROFILE'] = 'fast'
+        profile = get_browser_profile(self.app)
+        
+        # 検証
+        self.assertTrue(profile['launch_options']['headless'])
+        self.assertNotIn('slow_mo', profile['launch_options'])
+        self.assertEqual(profile['blocked_resource_types'], ['image', 'font'])
+        self.assertEqual(profile['blocked_domains'], ['google-analytics.com'])
+    
+    def test_debug_profile(self):
+        """debugプロファイルは画面表示・操作遅延ありで通信を遮断しないテスト"""
+        self.app.config['SB_AUTOMATION_PROFILE'] = 'debug'
+        profile = get_browser_profile(self.app)
+        
+        # 検証
+        self.assertFalse(profile['launch_options']['headless'])
+        self.assertEqual(profile['launch_options']['slow_mo'], 50)
+        self.assertEqual(profile['blocked_resource_types'], [])
+        self.assertEqual(profile['blocked_domains'], [])
+    
+    def test_unknown_profile_falls_back_to_fast(self):
+        """不明なプロファイル名はfastとして扱うテスト"""
+        self.app.config['SB_AUTOMATION_PROFILE'] = 'turbo'
+        
+        # 検証
+        self.assertEqual(get_browser_profile(self.app)['name'], 'fast')
+    
+    async def test_request_filter(self):
+        """リソース種別とドメインで通信を遮断するテスト"""
+        handle = build_request_filter(['image', 'font'], ['google-analytics.com'])
+        
+        async def route_for(url, resource_type):
+            route = AsyncMock()
+            route.request = MagicMock(url=url, resource_type=resource_type)
+            await handle(route)
+            return route
+        
+        image = await route_for('https://salonboard.com/img/logo.png', 'image')
+        tracker = await route_for('https://ssl.google-analytics.com/ga.js', 'script')
+        document = await route_for('https://salonboard.com/KLP/top/', 'document')
+        
+        # 検証
+        image.abort.assert_called_once()
+        tracker.abort.assert_called_once()
+        document.abort.assert_not_called()
+        document.continue_.assert_called_once()
+
+class TestPostQueueFacade(unittest.TestCase):
+    """投稿キューを使用する同期ファサードのテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        import tempfile
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SB_POST_QUEUE_ENABLED=True,
+            SB_POST_QUEUE_PATH=os.path.join(self.temp_dir.name, 'queue.sqlite3')
+        )
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.addCleanup(self.app_context.pop)
+    
+    @patch('app.blueprints.blog.sb_automation._wait_for_result')
+    @patch('app.blueprints.blog.sb_automation.submit_post_to_sb')
+    def test_duplicate_post_skipped(self, mock_submit, mock_wait):
+        """投稿済みの内容は自動操作エンジンに投入しないテスト"""
+        mock_wait.return_value = {'success': True, 'message': '投稿しました'}
+        
+        first = post_to_sb_sync('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        second = post_to_sb_sync('test_id', 'test_password', 'タイトル', '本文', '山田 太郎', [])
+        
+        # 検証
+        self.assertTrue(first['success'])
+        self.assertTrue(second['success'])
+        self.assertTrue(second['duplicate'])
+        mock_submit.assert_called_once()
+    
+    @patch('app.blueprints.blog.sb_automation._wait_for_result')
+    @patch('app.blueprints.blog.sb_automation.submit_post_batch_to_sb')
+    def test_batch_posts_only_pending(self, mock_submit, mock_wait):
+        """バッチ投稿では投稿済みの内容を除いて投入し、結果を元の順序に戻すテスト"""
+        posts = [
+            {'title': f'タイトル{i}', 'body': '本文', 'stylist': '山田 太郎', 'images': [], 'coupon': None}
+            for i in range(1, 4)
+        ]
+        mock_wait.return_value = {'success': True, 'message': '', 'results': [{'success': True, 'message': '投稿しました'}]}
+        post_batch_to_sb_sync('test_id', 'test_password', posts[1:2])
+        
+        mock_wait.return_value = {
+            'success': False, 'message': '',
+            'results': [{'success': True, 'message': '投稿しました'}, {'success': False, 'message': 'エラー'}]
+        }
+        result = post_batch_to_sb_sync('test_id', 'test_password', posts)
+        
+        # 検証
+        batch = mock_submit.call_args[0][2]
+        self.assertEqual([post['title'] for post in batch], ['タイトル1', 'タイトル3'])
+        self.assertEqual([r['success'] for r in result['results']], [True, True, False])
+        self.assertTrue(result['results'][1]['duplicate'])
+        self.assertEqual(result['message'], '3件中2件のブログを投稿しました。')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import unittest
+import tempfile
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.blueprints.blog.sb_session_cache import StorageStateCache
+
+class TestStorageStateCache(unittest.TestCase):
+    """ログイン状態キャッシュのユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = StorageStateCache(self.temp_dir.name, 'test-secret', ttl_seconds=600)
+        self.storage_state = {
+            'cookies': [{'name': 'SESSIONID', 'value': 'secret-session-value', 'domain': 'salonboard.com'}],
+            'origins': [{'origin': 'https://salonboard.com', 'localStorage': []}]
+        }
+    
+    def tearDown(self):
+        """テストの後処理"""
+        self.temp_dir.cleanup()
+    
+    def test_save_and_load(self):
+        """保存したログイン状態を取得できるテスト"""
+        self.cache.save('test_id', 'test_password', self.storage_state)
+        
+        # 検証
+        self.assertEqual(self.cache.load('test_id', 'test_password'), self.storage_state)
+    
+    def test_encrypted_at_rest(self):
+        """ディスク上のデータが暗号化されているテスト"""
+        self.cache.save('test_id', 'test_password', self.storage_state)
+        
+        files = os.listdir(self.temp_dir.name)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(self.temp_dir.name, files[0]), 'rb') as f:
+            data = f.read()
+        
+        # 検証（Cookieの値やIDがファイル名・内容に含まれないこと）
+        self.assertNotIn(b'secret-session-value', data)
+        self.assertNotIn('test_id', files[0])
+    
+    def test_wrong_password_misses(self):
+        """パスワードが異なる場合はキャッシュを使用しないテスト"""
+        self.cache.save('test_id', 'test_password', self.storage_state)
+        
+        # 検証
+        self.assertIsNone(self.cache.load('test_id', 'wrong_password'))
+    
+    def test_expired_state_is_discarded(self):
+        """有効期限切れのログイン状態を破棄するテスト"""
+        now = time.time()
+        self.cache.save('test_id', 'test_password', self.storage_state, now=now)
+        
+        # 検証
+        self.assertIsNone(self.cache.load('test_id', 'test_password', now=now + 601))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+    
+    def test_other_key_cannot_decrypt(self):
+        """暗号化キーが異なる場合は読み込めないテスト"""
+        self.cache.save('test_id', 'test_password', self.storage_state)
+        other = StorageStateCache(self.temp_dir.name, 'other-secret', ttl_seconds=600)
+        
+        # 検証
+        self.assertIsNone(other.load('test_id', 'test_password'))
+    
+    def test_invalidate(self):
+        """ログイン状態の破棄テスト"""
+        self.cache.save('test_id', 'test_password', self.storage_state)
+        self.cache.invalidate('test_id', 'test_password')
+        
+        # 検証
+        self.assertIsNone(self.cache.load('test_id', 'test_password'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,11 +3,13 @@ import sys
 import unittest
 from unittest.mock import patch, MagicMock, AsyncMock
 import asyncio
+import time
 
 # プロジェクトのルートディレクトリをパスに追加
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from app.blueprints.blog.scraping import scrape_hpb_data, _scrape_stylists, _scrape_coupons
+from app.utils.deadline import Deadline
 from tests.async_test_case import AsyncTestCase
 from app import create_app
 
@@ -48,13 +50,14 @@ class TestScrapingFunctions(AsyncTestCase):
         self.stylist_html = """
         <html>
         <body>
-            <div class="staffList">
-                <div class="staffItem">
-                    <div class="staffName">山田 太郎</div>
-                </div>
-                <div class="staffItem">
-                    <div class="staffName">佐藤 花子</div>
-                </div>
+            <h2>スタイリスト</h2>
+            <div class="oh">
+                <p class="mT10 fs16 b"><a href="#">山田 太郎</a></p>
+                <p class="mT10 fs16 b"><a href="#">佐藤 花子</a></p>
+            </div>
+            <h2>アシスタント</h2>
+            <div class="oh">
+                <p class="mT10 fs16 b"><a href="#">鈴木 一郎</a></p>
             </div>
         </body>
         </html>
@@ -71,12 +74,7 @@ class TestScrapingFunctions(AsyncTestCase):
                     <div class="couponTitle">平日限定クーポン</div>
                 </div>
             </div>
-            <div class="pagination">
-                <ul>
-                    <li><a>1</a></li>
-                    <li><a>2</a></li>
-                </ul>
-            </div>
+            <div class="pa bottom0 right0">1/2ページ</div>
         </body>
         </html>
         """
@@ -93,9 +91,9 @@ class TestScrapingFunctions(AsyncTestCase):
         </html>
         """
     
-    @patch('app.blueprints.blog.scraping.requests.get')
+    @patch('app.blueprints.blog.scraping._fetch_page')
     @patch('app.blueprints.blog.scraping.current_app')
-    def test_scrape_stylists(self, mock_current_app, mock_requests_get):
+    def test_scrape_stylists(self, mock_current_app, mock_fetch_page):
         """スタイリスト情報のスクレイピングテスト"""
         # モックの設定
         mock_current_app.logger.error = MagicMock()
@@ -103,7 +101,7 @@ class TestScrapingFunctions(AsyncTestCase):
         mock_response = MagicMock()
         mock_response.text = self.stylist_html
         mock_response.raise_for_status = MagicMock()
-        mock_requests_get.return_value = mock_response
+        mock_fetch_page.return_value = mock_response
         
         # 関数を実行
         result = _scrape_stylists(self.test_url, self.test_selectors)
@@ -112,21 +110,19 @@ class TestScrapingFunctions(AsyncTestCase):
         self.assertEqual(len(result), 2)
         self.assertIn('山田 太郎', result)
         self.assertIn('佐藤 花子', result)
+        self.assertNotIn('鈴木 一郎', result)  # アシスタントは含めない
         
-        # 実際の関数の動作に合わせて期待するURLを修正
-        expected_url = self.test_url + 'stylist/'
-        mock_requests_get.assert_called_once_with(
-            expected_url,
-            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        )
+        # 店舗URLの末尾にスラッシュを補ってからページのURLを生成する
+        expected_url = self.test_url + '/stylist/'
+        mock_fetch_page.assert_called_once_with(expected_url, None)
     
-    @patch('app.blueprints.blog.scraping.requests.get')
+    @patch('app.blueprints.blog.scraping._fetch_page')
     @patch('app.blueprints.blog.scraping.current_app')
-    def test_scrape_stylists_error(self, mock_current_app, mock_requests_get):
+    def test_scrape_stylists_error(self, mock_current_app, mock_fetch_page):
         """スタイリスト情報のスクレイピングエラーテスト"""
         # モックの設定
         mock_current_app.logger.error = MagicMock()
-        mock_requests_get.side_effect = Exception('Connection error')
+        mock_fetch_page.side_effect = Exception('Connection error')
         
         # 関数を実行
         result = _scrape_stylists(self.test_url, self.test_selectors)
@@ -135,10 +131,10 @@ class TestScrapingFunctions(AsyncTestCase):
         self.assertEqual(result, [])
         mock_current_app.logger.error.assert_called_once()
     
-    @patch('app.blueprints.blog.scraping.requests.get')
+    @patch('app.blueprints.blog.scraping._fetch_page')
     @patch('app.blueprints.blog.scraping.current_app')
     @patch('app.blueprints.blog.scraping.time.sleep')
-    def test_scrape_coupons(self, mock_sleep, mock_current_app, mock_requests_get):
+    def test_scrape_coupons(self, mock_sleep, mock_current_app, mock_fetch_page):
         """クーポン情報のスクレイピングテスト"""
         # モックの設定
         mock_current_app.logger.error = MagicMock()
@@ -153,8 +149,8 @@ class TestScrapingFunctions(AsyncTestCase):
         mock_response2.text = self.coupon_page2_html
         mock_response2.raise_for_status = MagicMock()
         
-        # requests.getの戻り値を順番に設定
-        mock_requests_get.side_effect = [mock_response1, mock_response2]
+        # _fetch_pageの戻り値を順番に設定
+        mock_fetch_page.side_effect = [mock_response1, mock_response2]
         
         # 関数を実行
         result = _scrape_coupons(self.test_url, self.test_selectors)
@@ -164,11 +160,44 @@ class TestScrapingFunctions(AsyncTestCase):
         self.assertIn('初回限定20%オフ', result)
         self.assertIn('平日限定クーポン', result)
         self.assertIn('学割クーポン', result)
-        self.assertEqual(mock_requests_get.call_count, 2)
-        # 2ページ分のデータを取得するため、2回呼び出される
-        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(mock_fetch_page.call_count, 2)
+        mock_fetch_page.assert_any_call(self.test_url + '/coupon/PN2.html', None)
+        # ページ間でのみ待機するため、2ページの場合は1回呼び出される
+        self.assertEqual(mock_sleep.call_count, 1)
         mock_sleep.assert_any_call(1)  # 過負荷防止の待機
     
+    @patch('app.blueprints.blog.scraping._fetch_page')
+    @patch('app.blueprints.blog.scraping.time.sleep')
+    def test_scrape_deadline_on_second_page(self, mock_sleep, mock_fetch_page):
+        """2ページ目の取得前に制限時間を超えた場合は取得済みのクーポンを返すテスト"""
+        self.app.config['SELECTORS'] = self.test_selectors
+        deadline = Deadline(30)
+        pages = {
+            'stylist/': self.stylist_html,
+            'coupon/': self.coupon_html,
+            'coupon/PN2.html': self.coupon_page2_html
+        }
+        
+        def fetch_page(url, page_deadline=None):
+            # 実際の _fetch_page と同様に残り時間を確認する
+            page_deadline.timeout()
+            if url.endswith('coupon/'):
+                # 1ページ目の取得で制限時間を使い切る
+                deadline.expires_at = time.monotonic()
+            return MagicMock(text=pages[url[len(self.test_url) + 1:]])
+        
+        mock_fetch_page.side_effect = fetch_page
+        
+        # 関数を実行
+        result = scrape_hpb_data(self.test_url, deadline)
+        
+        # 検証
+        self.assertTrue(result['partial'])
+        self.assertEqual(len(result['stylists']), 2)
+        self.assertEqual(result['coupons'], ['初回限定20%オフ', '平日限定クーポン'])
+        self.assertEqual(mock_fetch_page.call_count, 3)
+        mock_sleep.assert_called_once_with(0)  # 残り時間を超えて待機しない
+    
     @patch('app.blueprints.blog.scraping._scrape_stylists')
     @patch('app.blueprints.blog.scraping._scrape_coupons')
     @patch('app.blueprints.blog.scraping.current_app')
@@ -187,8 +216,8 @@ class TestScrapingFunctions(AsyncTestCase):
         self.assertIn('coupons', result)
         self.assertEqual(len(result['stylists']), 2)
         self.assertEqual(len(result['coupons']), 2)
-        mock_scrape_stylists.assert_called_once_with(self.test_url + '/', self.test_selectors)
-        mock_scrape_coupons.assert_called_once_with(self.test_url + '/', self.test_selectors)
+        mock_scrape_stylists.assert_called_once_with(self.test_url + '/', self.test_selectors, None)
+        mock_scrape_coupons.assert_called_once_with(self.test_url + '/', self.test_selectors, None)
 
     def tearDown(self):
         """テストの後処理"""
@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.selectors import SelectorRegistry, SelectorSet, SelectorValidationError, compiled_css
+
+SELECTORS = {
+    'hpb': {'coupon': {'page_url_suffix': 'coupon/', 'coupon_name_selector': 'p.couponMenuName, .couponTitle'}},
+    'sb': {'login': {'id_input': '#id'}, 'ready': {'file_select': {'response': '(?i)upload'}}}
+}
+
+class TestSelectorRegistry(unittest.TestCase):
+    """セレクタ設定の再読み込みのユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, 'selectors.json')
+        self.write(SELECTORS)
+    
+    def write(self, data, text=None):
+        """設定ファイルを書き込み、更新時刻を進める"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text if text is not None else json.dumps(data))
+        stat = os.stat(self.path)
+        self.mtime = getattr(self, 'mtime', stat.st_mtime_ns) + 1_000_000_000
+        os.utime(self.path, ns=(stat.st_atime_ns, self.mtime))
+    
+    def test_reload_on_change(self):
+        """ファイルが変更されたら新しい設定に置き換えるテスト"""
+        registry = SelectorRegistry(self.path, check_interval=0.001)
+        before = registry.get()
+        updated = json.loads(json.dumps(SELECTORS))
+        updated['hpb']['coupon']['coupon_name_selector'] = 'li.coupon'
+        
+        self.write(updated)
+        time.sleep(0.01)
+        after = registry.get()
+        
+        # 検証（読み込み済みの設定は変更されない）
+        self.assertIsNot(before, after)
+        self.assertEqual(before.data, SELECTORS)
+        self.assertEqual(after.data['hpb']['coupon']['coupon_name_selector'], 'li.coupon')
+        self.assertIn('li.coupon', after.css)
+    
+    def test_check_interval(self):
+        """確認の間隔が過ぎるまではファイルを確認しないテスト"""
+        registry = SelectorRegistry(self.path, check_interval=60)
+        self.write({'hpb': {}})
+        
+        # 検証
+        self.assertEqual(registry.get().data, SELECTORS)
+        self.assertTrue(registry.reload())
+        self.assertEqual(registry.get().data, {'hpb': {}})
+    
+    def test_keep_previous_on_invalid(self):
+        """不正なファイルの場合は以前の設定を使い続けるテスト"""
+        registry = SelectorRegistry(self.path, check_interval=60)
+        current = registry.current
+        
+        self.write(None, text='{"hpb": ')
+        self.assertFalse(registry.reload())
+        invalid_css = json.loads(json.dumps(SELECTORS))
+        invalid_css['hpb']['coupon']['coupon_name_selector'] = 'p.coupon[,'
+        self.write(invalid_css)
+        self.assertFalse(registry.reload())
+        
+        # 検証（同じ更新時刻のファイルは再び読み込まない）
+        self.assertIs(registry.current, current)
+        self.assertFalse(registry.reload())
+    
+    def test_validate_initial_load(self):
+        """起動時に読み込んだ設定のCSSセレクタを後から検証するテスト"""
+        invalid_css = json.loads(json.dumps(SELECTORS))
+        invalid_css['hpb']['coupon']['coupon_name_selector'] = 'p.coupon[,'
+        self.write(invalid_css)
+        registry = SelectorRegistry(self.path, check_interval=60)
+        
+        # 検証（起動時の読み込みではコンパイルしない）
+        self.assertEqual(registry.current.data, invalid_css)
+        with self.assertRaises(SelectorValidationError):
+            registry.validate()
+        
+        # ファイルを修正すると検証済みの設定に置き換える
+        self.write(SELECTORS)
+        self.assertTrue(registry.reload())
+        validated = registry.validate()
+        self.assertIs(validated, registry.current)
+        self.assertIn('.couponTitle', validated.css)
+    
+    def test_validation(self):
+        """構造と正規表現を検証するテスト"""
+        # 検証
+        with self.assertRaises(SelectorValidationError):
+            SelectorSet({'sb': {'login': {'id_input': ''}}})
+        with self.assertRaises(SelectorValidationError):
+            SelectorSet({'sb': {'ready': {'file_select': {'response': '(upload'}}}})
+        with self.assertRaises(SelectorValidationError):
+            SelectorSet({'hpb': {'coupon': {'coupon_name_selector': 'p[,'}}})
+        # 起動時はCSSセレクタをコンパイルしない
+        self.assertEqual(SelectorSet({'hpb': {'coupon': {'coupon_name_selector': 'p[,'}}}, compile_css=False).css, {})
+
+class TestSelectorsInApp(unittest.TestCase):
+    """アプリケーションでのセレクタ設定の再読み込みのテスト"""
+    
+    def test_request_refreshes_config(self):
+        """リクエストの開始時に SELECTORS を最新の設定に置き換えるテスト"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'selectors.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(SELECTORS, f)
+            app = create_app({
+                'TESTING': True,
+                'SECRET_KEY': 'test-secret-key',
+                'UPLOAD_FOLDER': temp_dir,
+                'SELECTORS_PATH': path,
+                'SELECTORS_RELOAD_INTERVAL': 0.001
+            })
+            self.assertEqual(app.config['SELECTORS'], SELECTORS)
+            with app.app_context():
+                pattern = compiled_css('.couponTitle')
+                self.assertIs(compiled_css('.couponTitle'), pattern)
+            
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'hpb': {}}, f)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            time.sleep(0.01)
+            app.test_client().get('/hello')
+            
+            # 検証
+            self.assertEqual(app.config['SELECTORS'], {'hpb': {}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,7 @@ import asyncio
 # プロジェクトのルートディレクトリをパスに追加
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from app.blueprints.blog.services import build_gemini_prompt, generate_blog_with_gemini
+from app.blueprints.blog.services import build_gemini_prompt, generate_blog_with_gemini, get_gemini_model
 from tests.async_test_case import AsyncTestCase
 from app import create_app
 
@@ -115,6 +115,22 @@ class TestGeminiServices(AsyncTestCase):
         self.assertIn('ブログの生成中にエラーが発生しました', result['body'])
         mock_current_app.logger.error.assert_called_once()
 
+    @patch('app.blueprints.blog.services.genai')
+    def test_get_gemini_model_cached(self, mock_genai):
+        """Geminiモデルの初期化を1回だけ行うテスト"""
+        first = get_gemini_model()
+        second = get_gemini_model()
+        
+        # 検証
+        self.assertIs(first, second)
+        mock_genai.configure.assert_called_once_with(api_key='test-api-key')
+        mock_genai.GenerativeModel.assert_called_once_with('gemini-2.0-flash')
+        
+        # APIキーが変わった場合は初期化し直す
+        self.app.config['GEMINI_API_KEY'] = 'new-api-key'
+        get_gemini_model()
+        self.assertEqual(mock_genai.GenerativeModel.call_count, 2)
+
     def tearDown(self):
         """テストの後処理"""
         # アプリケーションコンテキストをポップ
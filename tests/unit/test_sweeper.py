@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import unittest
+import tempfile
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.utils.sweeper import TempUploadSweeper
+from app.utils.helpers import touch_session_images
+from app.blueprints.blog.batch_store import BatchStore
+
+class TestTempUploadSweeper(unittest.TestCase):
+    """一時ファイルスイーパーのユニットテスト"""
+
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.now = time.time()
+
+    def tearDown(self):
+        """テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def _create_file(self, name, size, age):
+        """指定サイズ・経過時間のファイルを作成する"""
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        mtime = self.now - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_sweep_removes_expired_files(self):
+        """TTLを超えたファイルの削除テスト"""
+        old_path = self._create_file('old.jpg', 100, age=7200)
+        new_path = self._create_file('new.jpg', 50, age=60)
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=0)
+        result = sweeper.sweep(now=self.now)
+
+        # 検証
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(new_path))
+        self.assertEqual(result['scanned'], 2)
+        self.assertEqual(result['removed'], 1)
+        self.assertEqual(result['reclaimed_bytes'], 100)
+        self.assertEqual(result['remaining_bytes'], 50)
+
+    def test_sweep_enforces_size_cap_lru(self):
+        """容量上限超過時のLRU削除テスト"""
+        oldest = self._create_file('a.jpg', 100, age=3000)
+        middle = self._create_file('b.jpg', 100, age=2000)
+        recent = self._create_file('c.jpg', 100, age=1000)
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=150,
+                                    grace_seconds=10, batch_size=1)
+        result = sweeper.sweep(now=self.now)
+
+        # 検証（古い順に削除され、上限以下になった時点で停止）
+        self.assertFalse(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(middle))
+        self.assertTrue(os.path.exists(recent))
+        self.assertEqual(result['reclaimed_bytes'], 200)
+        self.assertEqual(result['remaining_bytes'], 100)
+
+    def test_sweep_size_cap_continues_after_failed_remove(self):
+        """削除に失敗したファイルの容量を残りに含めて次のファイルを削除するテスト"""
+        oldest = self._create_file('a.jpg', 100, age=3000)
+        middle = self._create_file('b.jpg', 100, age=2000)
+        recent = self._create_file('c.jpg', 100, age=1000)
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=150,
+                                    grace_seconds=10, batch_size=1)
+        original_remove = sweeper._remove
+        sweeper._remove = lambda path: False if path == oldest else original_remove(path)
+        result = sweeper.sweep(now=self.now)
+
+        # 検証（削除できなかったファイルの分は解放されていないため、さらに古い順に削除を続ける）
+        self.assertTrue(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(middle))
+        self.assertFalse(os.path.exists(recent))
+        self.assertEqual(result['removed'], 2)
+        self.assertEqual(result['reclaimed_bytes'], 200)
+        self.assertEqual(result['remaining_bytes'], 100)
+
+    def test_sweep_keeps_files_within_grace(self):
+        """猶予期間内のファイルは容量超過時も削除しないテスト"""
+        path = self._create_file('in_use.jpg', 500, age=5)
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=100,
+                                    grace_seconds=600)
+        result = sweeper.sweep(now=self.now)
+
+        # 検証
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(result['removed'], 0)
+
+    def test_sweep_ignores_subdirectories(self):
+        """サブディレクトリを削除対象にしないテスト"""
+        sub_dir = os.path.join(self.temp_dir.name, 'sub')
+        os.makedirs(sub_dir)
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=0, max_bytes=0)
+        result = sweeper.sweep(now=self.now + 10)
+
+        # 検証
+        self.assertTrue(os.path.isdir(sub_dir))
+        self.assertEqual(result['scanned'], 0)
+
+    def test_touch_session_images_protects_referenced_files(self):
+        """セッション参照中のファイルが削除されないテスト"""
+        path = self._create_file('referenced.jpg', 100, age=7200)
+
+        # セッションが参照していることを記録
+        touch_session_images([{'path': path}])
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=0)
+        result = sweeper.sweep()
+
+        # 検証
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(result['removed'], 0)
+
+    def test_sweep_keeps_images_referenced_by_batches(self):
+        """バッチが参照している画像はTTL・容量上限を超えても削除しないテスト"""
+        referenced = self._create_file('batch.jpg', 300, age=7200)
+        orphan = self._create_file('orphan.jpg', 100, age=7200)
+        store = BatchStore(os.path.join(self.temp_dir.name, 'sb_batches'), ttl_seconds=86400)
+        store.save(BatchStore.new_batch_id(), [{'title': 'タイトル', 'images': [{'path': referenced}]}])
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=100,
+                                    grace_seconds=0, batch_store=store)
+        result = sweeper.sweep(now=self.now)
+
+        # 検証
+        self.assertTrue(os.path.exists(referenced))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(result['removed'], 1)
+        self.assertEqual(result['remaining_bytes'], 300)
+        self.assertEqual(result['batches_removed'], 0)
+
+    def test_sweep_prunes_expired_batches(self):
+        """保持期間を過ぎたバッチを削除し、その画像も削除するテスト"""
+        image = self._create_file('batch.jpg', 100, age=7200)
+        store = BatchStore(os.path.join(self.temp_dir.name, 'sb_batches'), ttl_seconds=3600)
+        batch_id = BatchStore.new_batch_id()
+        store.save(batch_id, [{'title': 'タイトル', 'images': [{'path': image}]}])
+        batch_path = os.path.join(store.directory, f'{batch_id}.json')
+        os.utime(batch_path, (self.now - 7200, self.now - 7200))
+
+        sweeper = TempUploadSweeper([self.temp_dir.name], ttl_seconds=3600, max_bytes=0,
+                                    batch_store=store)
+        result = sweeper.sweep(now=self.now)
+
+        # 検証
+        self.assertFalse(os.path.exists(batch_path))
+        self.assertFalse(os.path.exists(image))
+        self.assertEqual(result['batches_removed'], 1)
+        self.assertEqual(store.load(batch_id), [])
+
+if __name__ == '__main__':
+    unittest.main()
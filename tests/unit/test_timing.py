@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import time
+import unittest
+import tempfile
+from flask import session
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.timing import record_spans, span
+
+class TestRequestTiming(unittest.TestCase):
+    """リクエストの計測のユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.log_path = os.path.join(self.temp_dir.name, 'logs', 'slow.log')
+        self.profile_dir = os.path.join(self.temp_dir.name, 'profiles')
+    
+    def _create_app(self, **overrides):
+        """計測用のルートを追加したアプリケーションを作成する"""
+        config = {
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'SERVER_TIMING_ENABLED': True,
+            'SLOW_REQUEST_MS': 0,
+            'SLOW_REQUEST_LOG': self.log_path,
+            'PROFILE_DIR': self.profile_dir
+        }
+        config.update(overrides)
+        app = create_app(config)
+        
+        def timed():
+            with span('scrape', desc='/slnH000/stylist/'):
+                time.sleep(0.005)
+            record_spans('sb', [{'name': 'upload_images[1-3]', 'duration_ms': 12.5, 'post': 2}])
+            session['visited'] = True
+            return 'ok'
+        
+        app.add_url_rule('/timed', 'timed', timed)
+        return app
+    
+    def test_server_timing_header(self):
+        """スパン・セッションの保存・合計が Server-Timing ヘッダーに含まれるテスト"""
+        response = self._create_app().test_client().get('/timed')
+        
+        # 検証
+        header = response.headers['Server-Timing']
+        self.assertIn('scrape;dur=', header)
+        self.assertIn('desc="/slnH000/stylist/"', header)
+        self.assertIn('sb.upload_images_1-3_;dur=12.5;desc="post2"', header)
+        self.assertIn('total;dur=', header)
+        self.assertIn('session_save;dur=', header)
+    
+    def test_disabled(self):
+        """計測が無効な場合はヘッダーを付与しないテスト"""
+        response = self._create_app(SERVER_TIMING_ENABLED=False).test_client().get('/timed')
+        
+        # 検証
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response.headers)
+    
+    def test_slow_request_log(self):
+        """閾値を超えたリクエストをログファイルに記録するテスト"""
+        app = self._create_app(SLOW_REQUEST_MS=4)
+        app.test_client().get('/timed')
+        app.test_client().get('/hello')
+        
+        # 検証（/hello は閾値未満）
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['path'] for record in records], ['/timed'])
+        self.assertIn('scrape', [s['name'] for s in records[0]['spans']])
+        self.assertIn('session_save', [s['name'] for s in records[0]['spans']])
+    
+    def test_profile_sampling(self):
+        """サンプリングしたリクエストのプロファイルを保存するテスト"""
+        app = self._create_app(PROFILE_SAMPLE_RATE=1.0, PROFILE_KEEP=1)
+        client = app.test_client()
+        client.get('/timed')
+        client.get('/timed')
+        
+        # 検証（保持数を超えた古いものは削除する）
+        profiles = os.listdir(self.profile_dir)
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].endswith('-timed.prof'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+from io import BytesIO
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.utils.upload_guard import sniff_image_type, GuardedUploadFile
+from app.utils.images import verify_images
+
+class TestUploadGuard(unittest.TestCase):
+    """アップロード検査機能のユニットテスト"""
+    
+    def _image_bytes(self, fmt):
+        """指定形式の画像データを作成する"""
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), (10, 20, 30)).save(buffer, format=fmt)
+        return buffer.getvalue()
+    
+    def test_sniff_image_type(self):
+        """先頭バイトによる形式判定のテスト"""
+        self.assertEqual(sniff_image_type(self._image_bytes('JPEG')[:12]), 'image/jpeg')
+        self.assertEqual(sniff_image_type(self._image_bytes('PNG')[:12]), 'image/png')
+        self.assertEqual(sniff_image_type(self._image_bytes('GIF')[:12]), 'image/gif')
+        self.assertEqual(sniff_image_type(self._image_bytes('WEBP')[:12]), 'image/webp')
+        self.assertIsNone(sniff_image_type(b'<html><body>'))
+    
+    def test_guarded_file_accepts_image_chunks(self):
+        """画像データをチャンク単位で受信できるテスト"""
+        data = self._image_bytes('PNG')
+        stream = GuardedUploadFile(max_bytes=len(data))
+        
+        # 判定に必要なバイト数より小さいチャンクで書き込む
+        for start in range(0, len(data), 5):
+            stream.write(data[start:start + 5])
+        
+        # 検証
+        self.assertEqual(stream.detected_type, 'image/png')
+        self.assertEqual(stream.bytes_received, len(data))
+        stream.seek(0)
+        self.assertEqual(stream.read(), data)
+    
+    def test_guarded_file_rejects_oversized(self):
+        """上限超過時に受信を中断するテスト"""
+        data = self._image_bytes('JPEG')
+        stream = GuardedUploadFile(max_bytes=len(data) - 1)
+        
+        with self.assertRaises(RequestEntityTooLarge):
+            stream.write(data)
+    
+    def test_guarded_file_rejects_non_image(self):
+        """画像以外のデータを最初のチャンクで拒否するテスト"""
+        stream = GuardedUploadFile(max_bytes=None)
+        
+        with self.assertRaises(UnsupportedMediaType):
+            stream.write(b'#!/bin/sh\necho "not an image"\n')
+    
+    def test_verify_images(self):
+        """デコード検証のテスト"""
+        valid = FileStorage(stream=BytesIO(self._image_bytes('JPEG')), filename='valid.jpg')
+        # 先頭バイトのみ正しい壊れた画像
+        broken = FileStorage(stream=BytesIO(self._image_bytes('PNG')[:40]), filename='broken.png')
+        
+        # 検証
+        self.assertEqual(verify_images([valid, broken]), [True, False])
+        self.assertEqual(valid.stream.tell(), 0)
+        self.assertEqual(verify_images([]), [])
+
+if __name__ == '__main__':
+    unittest.main()
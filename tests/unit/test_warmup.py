@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+import tempfile
+import threading
+
+# プロジェクトのルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.utils.warmup import WarmUp, warm_selectors
+
+class TestWarmUp(unittest.TestCase):
+    """ウォームアップのユニットテスト"""
+    
+    def setUp(self):
+        """テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name
+        })
+        self.client = self.app.test_client()
+    
+    def test_run_records_steps(self):
+        """各ステップの結果と所要時間を記録するテスト"""
+        def fail(app):
+            raise RuntimeError('接続できません')
+        
+        warmup = WarmUp(self.app, steps=[
+            ('ok', lambda app: None),
+            ('skipped', lambda app: 'skipped'),
+            ('failed', fail)
+        ])
+        warmup.run()
+        
+        # 検証（失敗したステップがあっても準備完了とする）
+        report = warmup.report()
+        self.assertTrue(report['ready'])
+        self.assertEqual([step['status'] for step in report['steps']], ['ok', 'skipped', 'failed'])
+        self.assertEqual(report['steps'][2]['error'], '接続できません')
+        self.assertIsNotNone(report['duration_ms'])
+    
+    def test_selectors_step_validates_css(self):
+        """起動時に読み込んだセレクタ設定のCSSセレクタを検証するテスト"""
+        path = os.path.join(self.temp_dir.name, 'selectors.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"hpb": {"coupon": {"coupon_name_selector": "p.coupon[,"}}}')
+        app = create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test-secret-key',
+            'UPLOAD_FOLDER': self.temp_dir.name,
+            'SELECTORS_PATH': path
+        })
+        
+        warmup = WarmUp(app, steps=[('selectors', warm_selectors)])
+        warmup.run()
+        
+        # 検証
+        step = warmup.report()['steps'][0]
+        self.assertEqual(step['status'], 'failed')
+        self.assertIn('hpb.coupon.coupon_name_selector', step['error'])
+    
+    def test_ready_route(self):
+        """ウォームアップが終わるまで /ready が503を返すテスト"""
+        release = threading.Event()
+        warmup = WarmUp(self.app, steps=[('slow', lambda app: release.wait(5))])
+        self.app.extensions['warmup'] = warmup
+        warmup.start()
+        
+        response = self.client.get('/ready')
+        release.set()
+        warmup.wait(5)
+        
+        # 検証
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()['ready'])
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['steps'][0]['name'], 'slow')
+    
+    def test_ready_without_warmup(self):
+        """ウォームアップが無効な場合は常に準備完了とするテスト"""
+        response = self.client.get('/ready')
+        
+        # 検証
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['ready'])
+
+if __name__ == '__main__':
+    unittest.main()